@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -12,6 +13,84 @@ class Settings(BaseSettings):
     
     # 資料庫設定
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None  # 未設定時由 DATABASE_URL 轉換為 postgresql+asyncpg
+    DB_POOL_SIZE: int = 5             # 常駐連線數
+    DB_MAX_OVERFLOW: int = 10         # 尖峰時可額外建立的連線數
+    DB_POOL_RECYCLE: int = 1800       # 連線重建週期（秒），避免被 DB / proxy 端逾時關閉
+    DB_POOL_TIMEOUT: float = 30.0     # 等待可用連線的秒數
+    HEALTH_DB_SATURATION_THRESHOLD: float = 0.9  # 連線池使用率超過此值時 /health 回傳 503
+    
+    # AI Service 設定
+    AI_SERVICE_URL: str = "http://ai-service:8001"
+    AI_SERVICE_HTTP2: bool = False                      # 需安裝 h2（pip install "httpx[http2]"）
+    AI_SERVICE_MAX_CONNECTIONS: int = 100               # 連線池上限（含使用中）
+    AI_SERVICE_MAX_KEEPALIVE_CONNECTIONS: int = 20      # 閒置保留的 keep-alive 連線數
+    AI_SERVICE_KEEPALIVE_EXPIRY: float = 30.0           # 閒置連線保留秒數
+    AI_SERVICE_CONNECT_TIMEOUT: float = 5.0
+    AI_SERVICE_POOL_TIMEOUT: float = 5.0                # 等待連線池釋出連線的秒數
+    AI_ANALYZE_COLOR_TIMEOUT: float = 30.0              # /analyze-color 讀取逾時
+    AI_RECOMMEND_TIMEOUT: float = 60.0                  # /recommend 讀取逾時
+    
+    # AI Service 斷路器：最近 AI_CIRCUIT_WINDOW 次呼叫的失敗率（連線錯誤、逾時、5xx）過高時暫停呼叫
+    AI_CIRCUIT_FAILURE_THRESHOLD: float = 0.5          # 失敗率門檻
+    AI_CIRCUIT_MIN_REQUESTS: int = 10                   # 至少累積幾次呼叫才判斷
+    AI_CIRCUIT_WINDOW: int = 20
+    AI_CIRCUIT_OPEN_SECONDS: float = 30.0               # 開啟後多久放行試探請求
+    AI_CIRCUIT_HALF_OPEN_CALLS: int = 1                 # 半開狀態可同時放行的試探請求數
+    
+    # /recommend 併發上限（AIMD：延遲低於目標時逐步放寬，失敗或過慢時減半）
+    AI_RECOMMEND_CONCURRENCY_INITIAL: int = 20
+    AI_RECOMMEND_CONCURRENCY_MIN: int = 2
+    AI_RECOMMEND_CONCURRENCY_MAX: int = 100
+    AI_RECOMMEND_LATENCY_TARGET: float = 20.0           # 目標延遲（秒）
+    AI_RECOMMEND_QUEUE_TIMEOUT: float = 2.0             # 已達上限時最多排隊等待秒數，逾時回傳 503
+    
+    # 色彩分析本地判斷（提供膚色 / 髮色 / 眼睛色碼時）
+    COLOR_ANALYSIS_FAST_PATH: bool = False  # 以 scripts/benchmark_season_classifier.py 驗證與 AI 結果的一致率後再啟用
+    COLOR_ANALYSIS_LOCAL_CONFIDENCE: float = 0.25  # 信心度低於此值時改呼叫 AI Service
+    
+    # 色彩分析結果快取（以圖片內容雜湊為 key）
+    COLOR_ANALYSIS_CACHE_ENABLED: bool = True
+    COLOR_ANALYSIS_CACHE_SIZE: int = 1024         # 記憶體層最多保留的結果數
+    COLOR_ANALYSIS_CACHE_TTL: float = 86400.0     # 結果保留秒數（0 = 不過期）
+    COLOR_ANALYSIS_CACHE_DIR: str | None = None   # 磁碟層目錄（可為多個 worker 共用的 volume），未設定時只用記憶體
+    
+    # Session / Round 建立的重複請求處理
+    IDEMPOTENCY_KEY_TTL: float = 86400.0   # Idempotency-Key 回應保存秒數
+    IDEMPOTENCY_MAX_KEYS: int = 10000      # 最多保存的 Idempotency-Key 數量
+    RECOMMEND_STREAM_BATCH_SIZE: int = 10  # 串流模式每累積幾筆推薦結果寫入一次資料庫
+    
+    # 推薦結果寫入模式：sync = 與 Session / Round 同一交易寫入；write_behind = 回應後由背景佇列合併寫入
+    RESULT_PERSIST_MODE: Literal["sync", "write_behind"] = "sync"
+    RESULT_WRITE_QUEUE_SIZE: int = 1000        # 佇列上限（Round 數），滿了會等待 RESULT_WRITE_ENQUEUE_TIMEOUT 秒
+    RESULT_WRITE_ENQUEUE_TIMEOUT: float = 1.0  # 仍無空位時改為同步寫入
+    RESULT_WRITE_BATCH_ROWS: int = 2000        # 單次 INSERT 最多合併的筆數
+    RESULT_WRITE_FLUSH_INTERVAL: float = 0.05  # 等待合併更多 Round 的秒數
+    RESULT_WRITE_MAX_RETRIES: int = 3
+    RESULT_WRITE_RETRY_BACKOFF: float = 0.5    # 重試間隔（秒，指數退避）
+    
+    # 推薦結果儲存格式：rows = 每張圖片一列 round_recommended_result；
+    # packed = 整輪結果存於 round 的陣列欄位，使用者操作另存 round_image_action（不使用 write-behind 佇列）
+    RESULT_STORAGE_MODE: Literal["rows", "packed"] = "rows"
+    
+    # 回應序列化：大型列表回應（Session / Round / 購物車）直接以 pydantic-core 序列化為 JSON
+    FAST_JSON_RESPONSES: bool = False
+    
+    # 請求耗時統計：Server-Timing 標頭與 /metrics（Prometheus）
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True  # 不希望對外揭露耗時細節時關閉（/metrics 不受影響）
+    
+    # 購物車列表
+    CART_PAGE_SIZE: int = 50         # 預設每頁筆數（最多 200）
+    CART_CACHE_SIZE: int = 5000      # 快取的使用者數
+    CART_CACHE_TTL: float = 30.0     # 快取秒數（其他 worker 的寫入最多延遲此秒數反映，0 = 不過期）
+    
+    # 查找表快取設定
+    LOOKUP_REFRESH_INTERVAL: float = 60.0  # 檢查 lookup_version 的間隔秒數（0 = 只在啟動與手動 reload 時載入）
+    
+    # 圖片 metadata 索引（image_catalog 載入記憶體，用於推薦結果過濾與補上分類 / 連結）
+    IMAGE_CATALOG_REFRESH_INTERVAL: float = 60.0  # 檢查 catalog_version 的間隔秒數（0 = 只在啟動與手動 reload 時載入）
+    RECOMMEND_FILTER_OVERFETCH: float = 1.5       # 有過濾條件時向 AI Service 多要求的倍數，過濾後仍能補滿 k 張
     
     # CORS 設定
     BACKEND_CORS_ORIGINS: list[str] = [
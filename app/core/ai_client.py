@@ -0,0 +1,216 @@
+import importlib.util
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from fastapi import Request
+
+from app.config import Settings
+from app.core.metrics import record_ai_call
+from app.core.resilience import CIRCUIT_CLOSED, AIMDLimiter, CircuitBreaker
+
+
+class AIServiceClient:
+    """
+    AI Service 共用 HTTP client
+
+    整個 App 生命週期只建立一個 httpx.AsyncClient，
+    讓 /analyze-color 與 /recommend 重複使用 keep-alive 連線，
+    避免每個請求都重新建立 TCP / TLS 連線。
+
+    AI Service 異常時由斷路器直接拒絕請求（不等到逾時）；
+    /recommend 另有依延遲調整的 AIMD 併發上限。
+    """
+
+    ANALYZE_COLOR_PATH = "/analyze-color"
+    RECOMMEND_PATH = "/recommend"
+
+    def __init__(self, settings: Settings):
+        if settings.AI_SERVICE_HTTP2 and importlib.util.find_spec("h2") is None:
+            raise RuntimeError(
+                "AI_SERVICE_HTTP2=True 需要安裝 h2 套件：pip install \"httpx[http2]\""
+            )
+
+        self._max_connections = settings.AI_SERVICE_MAX_CONNECTIONS
+        self._connect_timeout = settings.AI_SERVICE_CONNECT_TIMEOUT
+        self._pool_timeout = settings.AI_SERVICE_POOL_TIMEOUT
+
+        # 各 endpoint 的讀取逾時
+        self._timeouts = {
+            self.ANALYZE_COLOR_PATH: settings.AI_ANALYZE_COLOR_TIMEOUT,
+            self.RECOMMEND_PATH: settings.AI_RECOMMEND_TIMEOUT,
+        }
+
+        self._client = httpx.AsyncClient(
+            base_url=settings.AI_SERVICE_URL,
+            http2=settings.AI_SERVICE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.AI_SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_SERVICE_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.AI_SERVICE_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+        # 連線錯誤、逾時與 5xx 計為失敗；失敗率過高時開啟斷路器
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+            min_requests=settings.AI_CIRCUIT_MIN_REQUESTS,
+            window=settings.AI_CIRCUIT_WINDOW,
+            open_seconds=settings.AI_CIRCUIT_OPEN_SECONDS,
+            half_open_calls=settings.AI_CIRCUIT_HALF_OPEN_CALLS,
+        )
+        self._limiters = {
+            self.RECOMMEND_PATH: AIMDLimiter(
+                initial_limit=settings.AI_RECOMMEND_CONCURRENCY_INITIAL,
+                min_limit=settings.AI_RECOMMEND_CONCURRENCY_MIN,
+                max_limit=settings.AI_RECOMMEND_CONCURRENCY_MAX,
+                latency_target=settings.AI_RECOMMEND_LATENCY_TARGET,
+                queue_timeout=settings.AI_RECOMMEND_QUEUE_TIMEOUT,
+            ),
+        }
+
+        # 連線池使用統計
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._total_requests = 0
+
+    def _timeout_for(self, path: str) -> httpx.Timeout:
+        read_timeout = self._timeouts.get(path, self._timeouts[self.RECOMMEND_PATH])
+        return httpx.Timeout(read_timeout, connect=self._connect_timeout, pool=self._pool_timeout)
+
+    @asynccontextmanager
+    async def _guarded(self, path: str) -> AsyncIterator[None]:
+        """
+        呼叫 AI Service 的共用流程：斷路器檢查、併發名額、統計與結果回報
+
+        斷路器開啟或併發已達上限時拋出 AIServiceUnavailable，不會送出請求。
+        """
+        self.circuit_breaker.before_call()
+        limiter = self._limiters.get(path)
+        if limiter:
+            try:
+                await limiter.acquire()
+            except BaseException:
+                self.circuit_breaker.record_cancelled()
+                raise
+
+        self._in_flight += 1
+        self._total_requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        start = time.monotonic()
+        succeeded: Optional[bool] = None
+        try:
+            yield
+            succeeded = True
+        except httpx.HTTPStatusError as e:
+            # 4xx 為請求內容問題，不代表 AI Service 異常
+            succeeded = e.response.status_code < 500
+            raise
+        except httpx.RequestError:
+            succeeded = False
+            raise
+        finally:
+            self._in_flight -= 1
+            record_ai_call(time.monotonic() - start)
+            if succeeded is True:
+                self.circuit_breaker.record_success()
+            elif succeeded is False:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_cancelled()
+            if limiter:
+                limiter.release(time.monotonic() - start, succeeded)
+
+    async def post(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        送出 POST 請求（使用該 endpoint 的逾時設定），非 2xx 會拋出 HTTPStatusError
+
+        斷路器開啟或併發已達上限時拋出 AIServiceUnavailable，不會送出請求。
+        """
+        async with self._guarded(path):
+            response = await self._client.post(path, json=payload, timeout=self._timeout_for(path))
+            response.raise_for_status()
+            return response
+
+    async def analyze_color(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """呼叫 AI Service 色彩分析"""
+        response = await self.post(self.ANALYZE_COLOR_PATH, payload)
+        return response.json()
+
+    async def recommend(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """呼叫 AI Service 推薦"""
+        response = await self.post(self.RECOMMEND_PATH, payload)
+        return response.json()
+
+    async def stream_recommend(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐筆讀取 AI Service 推薦結果
+
+        AI Service 回應 NDJSON（application/x-ndjson）時每讀到一行就 yield：
+        含 image_id 的行為推薦圖片，其餘（如 {"vector_saved": true}）為 metadata。
+        回應一般 JSON 時，整份解析後依序 yield 每張圖片，最後 yield 其餘欄位。
+        """
+        async with self._guarded(self.RECOMMEND_PATH):
+            async with self._client.stream(
+                "POST",
+                self.RECOMMEND_PATH,
+                json=payload,
+                headers={"Accept": "application/x-ndjson, application/json"},
+                timeout=self._timeout_for(self.RECOMMEND_PATH),
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+
+                if "ndjson" in response.headers.get("content-type", ""):
+                    async for line in response.aiter_lines():
+                        if line.strip():
+                            yield json.loads(line)
+                    return
+
+                data = json.loads(await response.aread())
+                for image in data.pop("recommended_images", []):
+                    yield image
+                yield data
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """連線池使用狀況（用於依實際併發量調整連線池大小）"""
+        # httpx 未公開連線池物件，取不到時只回傳請求層級的統計
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+
+        return {
+            "max_connections": self._max_connections,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "in_flight_requests": self._in_flight,
+            "peak_in_flight_requests": self._peak_in_flight,
+            "total_requests": self._total_requests,
+        }
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        """斷路器與併發上限狀態"""
+        return {
+            "circuit_breaker": self.circuit_breaker.snapshot(),
+            "limiters": {path: limiter.snapshot() for path, limiter in self._limiters.items()},
+        }
+
+    @property
+    def degraded(self) -> bool:
+        """斷路器非關閉狀態，或 /recommend 併發已達上限"""
+        return self.circuit_breaker.state != CIRCUIT_CLOSED or any(
+            limiter.saturated for limiter in self._limiters.values()
+        )
+
+    async def aclose(self) -> None:
+        """關閉連線池（App 關閉時呼叫）"""
+        await self._client.aclose()
+
+
+def get_ai_client(request: Request) -> AIServiceClient:
+    """取得 App 共用的 AI Service client（依賴注入用）"""
+    return request.app.state.ai_client
@@ -0,0 +1,155 @@
+import asyncio
+import binascii
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.schemas.color_analysis import ColorAnalysisResponse
+
+# 每次解碼的 base64 字元數（4 的倍數）
+_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = {ord(c): None for c in " \t\r\n"}
+
+
+def image_digest(image: str) -> str:
+    """
+    計算圖片內容的 BLAKE2b 雜湊（快取 key）
+
+    base64（含 data URI）以固定大小分段解碼後逐段餵入雜湊，不會複製整份 payload；
+    相同圖片不論 data URI 前綴或換行格式都得到相同 key。URL 則以 URL 字串雜湊。
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+
+    if image.startswith(("http://", "https://")):
+        hasher.update(b"url:")
+        hasher.update(image.encode("utf-8"))
+        return hasher.hexdigest()
+
+    start = 0
+    if image.startswith("data:"):
+        start = image.find(",") + 1
+
+    try:
+        carry = ""
+        for offset in range(start, len(image), _CHUNK_SIZE):
+            chunk = carry + image[offset:offset + _CHUNK_SIZE].translate(_WHITESPACE)
+            usable = len(chunk) - len(chunk) % 4
+            hasher.update(binascii.a2b_base64(chunk[:usable]))
+            carry = chunk[usable:]
+        if carry:
+            hasher.update(binascii.a2b_base64(carry + "=" * (-len(carry) % 4)))
+    except binascii.Error:
+        # 非合法 base64 時退回以原始字串雜湊
+        hasher = hashlib.blake2b(digest_size=32)
+        hasher.update(b"raw:")
+        hasher.update(image.encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+class AnalysisResultCache:
+    """
+    色彩分析結果快取（以圖片內容雜湊為 key）
+
+    第一層為記憶體 LRU；設定 directory 時另有磁碟層（可放在多個 worker 共用的 volume），
+    每筆結果存成一個 JSON 檔。兩層皆支援 TTL 與手動清除。
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float], directory: Optional[str] = None):
+        self.ttl = ttl
+        self.directory = directory
+        self._memory = TTLCache(max_entries, ttl)
+        self.disk_hits = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _read_disk(self, digest: str) -> Optional[dict]:
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry.get("expires_at") and entry["expires_at"] <= time.time():
+            self._delete_disk(digest)
+            return None
+        return entry["response"]
+
+    def _write_disk(self, digest: str, response: ColorAnalysisResponse) -> None:
+        entry = {
+            "expires_at": time.time() + self.ttl if self.ttl else None,
+            "response": response.model_dump(),
+        }
+        # 先寫暫存檔再 rename，避免其他 worker 讀到寫到一半的檔案
+        tmp_path = f"{self._path(digest)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(digest))
+
+    def _delete_disk(self, digest: str) -> bool:
+        try:
+            os.remove(self._path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _clear_disk(self) -> int:
+        count = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                count += self._delete_disk(name[:-len(".json")])
+        return count
+
+    async def get(self, digest: str) -> Optional[ColorAnalysisResponse]:
+        """依序查詢記憶體層、磁碟層；磁碟命中時回填記憶體層"""
+        response = self._memory.get(digest)
+        if response is not None or not self.directory:
+            return response
+
+        data = await asyncio.to_thread(self._read_disk, digest)
+        if data is None:
+            return None
+        response = ColorAnalysisResponse.model_validate(data)
+        self._memory.set(digest, response)
+        self.disk_hits += 1
+        return response
+
+    async def set(self, digest: str, response: ColorAnalysisResponse) -> None:
+        self._memory.set(digest, response)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, digest, response)
+            except OSError:
+                # 磁碟層寫入失敗不影響回應（記憶體層仍有結果）
+                pass
+
+    async def purge(self, digest: Optional[str] = None) -> int:
+        """清除指定 key（未指定時清除全部），回傳清除筆數"""
+        if digest is None:
+            count = self._memory.clear()
+            if self.directory:
+                count = max(count, await asyncio.to_thread(self._clear_disk))
+            return count
+
+        removed = self._memory.delete(digest)
+        if self.directory:
+            removed = await asyncio.to_thread(self._delete_disk, digest) or removed
+        return int(removed)
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "disk_enabled": bool(self.directory), "disk_hits": self.disk_hits}
+
+
+settings = get_settings()
+
+analysis_cache = AnalysisResultCache(
+    max_entries=settings.COLOR_ANALYSIS_CACHE_SIZE,
+    ttl=settings.COLOR_ANALYSIS_CACHE_TTL or None,
+    directory=settings.COLOR_ANALYSIS_CACHE_DIR,
+)
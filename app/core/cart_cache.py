@@ -0,0 +1,47 @@
+from typing import Any, Optional
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+
+
+class CartReadCache:
+    """
+    購物車列表快取（每位使用者一組）
+
+    快取每位使用者各分頁（cursor, limit）的回應；add_to_cart / remove_from_cart 後
+    以 invalidate 清除該使用者的所有分頁。只保存在目前 process，其他 worker 的寫入
+    需等 TTL 到期才會反映。
+    """
+
+    def __init__(self, max_users: int, ttl: Optional[float]):
+        self._users = TTLCache(max_users, ttl)
+        # 每次失效遞增；查詢期間發生過失效時不寫入快取，避免存入舊資料
+        self.generation = 0
+
+    def get(self, user_id: str, cursor: Optional[str], limit: int) -> Any:
+        pages = self._users.get(user_id)
+        return pages.get((cursor, limit)) if pages else None
+
+    def set(self, user_id: str, cursor: Optional[str], limit: int, response: Any, generation: int) -> None:
+        if generation != self.generation:
+            return
+        pages = self._users.get(user_id)
+        if pages is None:
+            pages = {}
+            self._users.set(user_id, pages)
+        pages[(cursor, limit)] = response
+
+    def invalidate(self, user_id: str) -> None:
+        self.generation += 1
+        self._users.delete(user_id)
+
+    def stats(self) -> dict:
+        return self._users.stats()
+
+
+settings = get_settings()
+
+cart_cache = CartReadCache(
+    max_users=settings.CART_CACHE_SIZE,
+    ttl=settings.CART_CACHE_TTL or None,
+)
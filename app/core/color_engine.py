@@ -0,0 +1,213 @@
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.lookups import ColorEntry, LookupRegistry
+
+METRIC_CIE76 = "cie76"
+METRIC_CIEDE2000 = "ciede2000"
+
+# D65 白點與 sRGB → XYZ 轉換矩陣
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_LAB_EPSILON = (6 / 29) ** 3
+_POW25_7 = 25.0 ** 7
+
+
+def hex_to_rgb(hex_colors: Sequence[str]) -> np.ndarray:
+    """十六進制色碼（#RRGGBB）轉為 (n, 3) RGB 陣列（0-255）"""
+    packed = np.array([int(color.lstrip("#"), 16) for color in hex_colors], dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1).astype(np.float64)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (n, 3) 轉為 CIELAB (n, 3)（D65）"""
+    srgb = rgb / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _SRGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > _LAB_EPSILON, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([
+        116 * f[:, 1] - 16,
+        500 * (f[:, 0] - f[:, 1]),
+        200 * (f[:, 1] - f[:, 2]),
+    ], axis=-1)
+
+
+def hex_to_lab(hex_colors: Sequence[str]) -> np.ndarray:
+    """十六進制色碼轉為 CIELAB (n, 3)"""
+    return rgb_to_lab(hex_to_rgb(hex_colors))
+
+
+def delta_e_76(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """ΔE*76（Lab 歐氏距離），lab1 (q, 3) × lab2 (n, 3) → (q, n)"""
+    diff = lab1[:, None, :] - lab2[None, :, :]
+    return np.sqrt(np.einsum("qnc,qnc->qn", diff, diff))
+
+
+def delta_e_2000(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """CIEDE2000 色差，lab1 (q, 3) × lab2 (n, 3) → (q, n)"""
+    L1, a1, b1 = (lab1[:, i, None] for i in range(3))
+    L2, a2, b2 = (lab2[None, :, i] for i in range(3))
+
+    C_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    C_bar7 = C_bar ** 7
+    G = 0.5 * (1 - np.sqrt(C_bar7 / (C_bar7 + _POW25_7)))
+    a1p = (1 + G) * a1
+    a2p = (1 + G) * a2
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    chroma_product = C1p * C2p
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(chroma_product == 0, 0, dhp)
+    dHp = 2 * np.sqrt(chroma_product) * np.sin(np.radians(dhp) / 2)
+
+    Lbp = (L1 + L2) / 2
+    Cbp = (C1p + C2p) / 2
+    h_sum = h1p + h2p
+    hbp = np.where(
+        np.abs(h1p - h2p) <= 180,
+        h_sum / 2,
+        np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2),
+    )
+    hbp = np.where(chroma_product == 0, h_sum, hbp)
+
+    T = (
+        1
+        - 0.17 * np.cos(np.radians(hbp - 30))
+        + 0.24 * np.cos(np.radians(2 * hbp))
+        + 0.32 * np.cos(np.radians(3 * hbp + 6))
+        - 0.20 * np.cos(np.radians(4 * hbp - 63))
+    )
+    d_theta = 30 * np.exp(-(((hbp - 275) / 25) ** 2))
+    Cbp7 = Cbp ** 7
+    Rc = 2 * np.sqrt(Cbp7 / (Cbp7 + _POW25_7))
+    Sl = 1 + 0.015 * (Lbp - 50) ** 2 / np.sqrt(20 + (Lbp - 50) ** 2)
+    Sc = 1 + 0.045 * Cbp
+    Sh = 1 + 0.015 * Cbp * T
+    Rt = -np.sin(np.radians(2 * d_theta)) * Rc
+
+    dL = dLp / Sl
+    dC = dCp / Sc
+    dH = dHp / Sh
+    return np.sqrt(dL ** 2 + dC ** 2 + dH ** 2 + Rt * dC * dH)
+
+
+_METRICS = {
+    METRIC_CIE76: delta_e_76,
+    METRIC_CIEDE2000: delta_e_2000,
+}
+
+
+class ColorEngine:
+    """
+    季節色顏色最近鄰查詢
+
+    所有調色盤顏色啟動時一次轉為 CIELAB，存放於連續的 (n, 3) 陣列；
+    每次查詢對整批輸入色碼做單次向量化距離計算。
+    顏色依 season_palette_id 排序，可用 reduceat 直接取得每個色盤的最小距離。
+    """
+
+    def __init__(self, colors: Sequence[ColorEntry], palette_names: Mapping[int, str]):
+        ordered = sorted(colors, key=lambda color: (color.season_palette_id, color.id))
+        self._colors: Tuple[ColorEntry, ...] = tuple(ordered)
+        self._palette_names = dict(palette_names)
+        self._lab = np.ascontiguousarray(hex_to_lab([color.color_hex for color in ordered]))
+        self._palette_ids = np.array([color.season_palette_id for color in ordered], dtype=np.int64)
+
+        # 每個色盤在陣列中的起始位置（reduceat 用）
+        self._palette_order, self._palette_offsets = np.unique(self._palette_ids, return_index=True)
+
+        # 每個色盤的代表色：最接近該色盤 Lab 重心的顏色
+        self._representatives = {}
+        for start, end, palette_id in zip(
+            self._palette_offsets,
+            list(self._palette_offsets[1:]) + [len(ordered)],
+            self._palette_order,
+        ):
+            block = self._lab[start:end]
+            offset = int(np.argmin(((block - block.mean(axis=0)) ** 2).sum(axis=1)))
+            self._representatives[int(palette_id)] = ordered[start + offset]
+
+    @property
+    def colors(self) -> Tuple[ColorEntry, ...]:
+        return self._colors
+
+    def palette_name(self, palette_id: int) -> str:
+        return self._palette_names.get(palette_id, "")
+
+    def palette_representative(self, palette_id: int) -> Optional[ColorEntry]:
+        """色盤代表色（最接近色盤 Lab 重心的顏色）"""
+        return self._representatives.get(palette_id)
+
+    def distances(self, lab: np.ndarray, metric: str = METRIC_CIEDE2000) -> np.ndarray:
+        """查詢色 (q, 3) 對所有調色盤顏色的距離 (q, n)"""
+        if metric not in _METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        return _METRICS[metric](lab, self._lab)
+
+    def nearest(
+        self,
+        hex_colors: Sequence[str],
+        k: int = 5,
+        metric: str = METRIC_CIEDE2000,
+        palette_ids: Optional[Sequence[int]] = None
+    ) -> List[List[Tuple[ColorEntry, float]]]:
+        """每個查詢色回傳最接近的 k 個調色盤顏色（可限定季節色盤），依距離由近到遠"""
+        columns = np.arange(len(self._colors))
+        if palette_ids:
+            columns = np.flatnonzero(np.isin(self._palette_ids, palette_ids))
+        if not len(hex_colors) or not len(columns):
+            return [[] for _ in hex_colors]
+
+        dist = self.distances(hex_to_lab(hex_colors), metric)[:, columns]
+        k = min(k, len(columns))
+        top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        top_dist = np.take_along_axis(dist, top, axis=1)
+        order = np.argsort(top_dist, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_dist = np.take_along_axis(top_dist, order, axis=1)
+
+        return [
+            [(self._colors[columns[index]], float(distance)) for index, distance in zip(row, row_dist)]
+            for row, row_dist in zip(top, top_dist)
+        ]
+
+    def palette_distances(
+        self,
+        hex_colors: Sequence[str],
+        metric: str = METRIC_CIEDE2000,
+        weights: Optional[Sequence[float]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        各季節色盤與輸入色（如膚色、髮色）的距離，由近到遠排序
+
+        距離 = 每個輸入色到該色盤最接近顏色的距離，依 weights 加權平均。
+        """
+        dist = self.distances(hex_to_lab(hex_colors), metric)
+        per_palette = np.minimum.reduceat(dist, self._palette_offsets, axis=1)
+        scores = np.average(per_palette, axis=0, weights=weights)
+        order = np.argsort(scores)
+        return [(int(self._palette_order[i]), float(scores[i])) for i in order]
+
+
+_engine: Optional[ColorEngine] = None
+_engine_registry: Optional[LookupRegistry] = None
+
+
+def get_color_engine(registry: LookupRegistry) -> ColorEngine:
+    """取得目前查找表快照對應的 ColorEngine（快照重新載入後才重建）"""
+    global _engine, _engine_registry
+    if _engine is None or _engine_registry is not registry:
+        _engine = ColorEngine(registry.colors.values(), registry.season_palettes.names)
+        _engine_registry = registry
+    return _engine
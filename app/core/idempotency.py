@@ -0,0 +1,47 @@
+from typing import Any, Hashable, Optional
+
+from fastapi import HTTPException, status
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key 回應保存
+
+    以 (scope, Idempotency-Key) 保存成功的回應與請求指紋；相同 key 重送時直接回傳保存的回應，
+    相同 key 但請求內容不同時回傳 409。只保存在目前 process 的記憶體中。
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float]):
+        self._responses = TTLCache(max_entries, ttl)
+        self.replays = 0
+
+    def get(self, scope: Hashable, key: str, request_fingerprint: str) -> Any:
+        entry = self._responses.get((scope, key))
+        if entry is None:
+            return None
+
+        stored_fingerprint, response = entry
+        if stored_fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Idempotency-Key has already been used with a different request"
+            )
+        self.replays += 1
+        return response
+
+    def set(self, scope: Hashable, key: str, request_fingerprint: str, response: Any) -> None:
+        self._responses.set((scope, key), (request_fingerprint, response))
+
+    def stats(self) -> dict:
+        return {"keys": len(self._responses), "replays": self.replays}
+
+
+settings = get_settings()
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_MAX_KEYS,
+    ttl=settings.IDEMPOTENCY_KEY_TTL or None,
+)
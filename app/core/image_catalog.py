@@ -0,0 +1,167 @@
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, List, Mapping, NamedTuple, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.lookups import LookupRegistry
+from app.models.catalog import ImageCatalog
+from app.models.lookups import LookupVersion
+
+LOAD_BATCH_SIZE = 10000
+
+
+class ImageMetadata(NamedTuple):
+    """單張圖片的 metadata（NamedTuple 比 dict / dataclass 省記憶體，索引可容納數百萬張）"""
+    category_id: Optional[int]
+    gender_id: Optional[int]
+    style_id: Optional[int]
+    image_url: Optional[str]
+    link: Optional[str]
+
+
+@dataclass(frozen=True)
+class ImageCatalogIndex:
+    """
+    image_catalog 的唯讀記憶體快照（image_id → ImageMetadata）
+
+    與查找表快取相同：catalog_version 變更時建立新快照整個替換，讀取端不需加鎖。
+    """
+    version: int
+    images: Mapping[str, ImageMetadata]
+
+    def get(self, image_id: str) -> Optional[ImageMetadata]:
+        return self.images.get(image_id)
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+
+_index = ImageCatalogIndex(version=0, images=MappingProxyType({}))
+
+
+async def _fetch_version(db: AsyncSession) -> int:
+    return await db.scalar(select(LookupVersion.catalog_version).where(LookupVersion.id == 1)) or 0
+
+
+async def load_index(db: AsyncSession) -> ImageCatalogIndex:
+    """從資料庫分批讀取 image_catalog，建立新快照並替換目前的快照"""
+    global _index
+
+    version = await _fetch_version(db)
+    images = {}
+    rows = await db.stream(
+        select(
+            ImageCatalog.image_id,
+            ImageCatalog.category_id,
+            ImageCatalog.gender_id,
+            ImageCatalog.style_id,
+            ImageCatalog.image_url,
+            ImageCatalog.link,
+        ).execution_options(yield_per=LOAD_BATCH_SIZE)
+    )
+    async for partition in rows.partitions():
+        for image_id, *metadata in partition:
+            images[image_id] = ImageMetadata(*metadata)
+
+    _index = ImageCatalogIndex(version=version, images=MappingProxyType(images))
+    return _index
+
+
+async def refresh_if_stale(db: AsyncSession) -> bool:
+    """資料庫版本與快照不同時重新載入（只需一次單列查詢），回傳是否有重新載入"""
+    if await _fetch_version(db) == _index.version:
+        return False
+    await load_index(db)
+    return True
+
+
+async def invalidate(db: AsyncSession) -> ImageCatalogIndex:
+    """遞增 catalog_version（通知其他 worker）並重新載入本機快照"""
+    await db.execute(
+        update(LookupVersion).where(LookupVersion.id == 1).values(catalog_version=LookupVersion.catalog_version + 1)
+    )
+    await db.commit()
+    return await load_index(db)
+
+
+async def refresh_periodically(session_factory, interval: float) -> None:
+    """背景定期檢查版本（匯入圖片資料後，各 worker 會在 interval 秒內重新載入）"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                await refresh_if_stale(db)
+        except Exception:
+            # 資料庫暫時無法連線時沿用目前快照，下次再試
+            continue
+
+
+def get_image_catalog() -> ImageCatalogIndex:
+    """取得目前的圖片索引快照（依賴注入用；尚未載入時為空索引）"""
+    return _index
+
+
+class RecommendationSelector:
+    """
+    依使用者條件過濾 AI Service 的推薦圖片，並由圖片索引補上分類與連結
+
+    - exclude_image_ids：不回傳的圖片（例如已在購物車中）
+    - category_ids：只回傳這些分類的圖片（圖片索引中沒有的圖片視為不符合）
+    最多選出 limit 張（AI Service 可多推薦一些，過濾後仍能補滿）；保留 AI Service 的 rank_order。
+    """
+
+    def __init__(
+        self,
+        catalog: ImageCatalogIndex,
+        lookups: LookupRegistry,
+        limit: int,
+        exclude_image_ids: Iterable[str] = (),
+        category_ids: Optional[Iterable[int]] = None
+    ):
+        self.catalog = catalog
+        self.lookups = lookups
+        self.limit = limit
+        self.exclude_image_ids: FrozenSet[str] = frozenset(exclude_image_ids)
+        self.category_ids: Optional[FrozenSet[int]] = frozenset(category_ids) if category_ids else None
+        self.selected = 0
+        self.filtered = 0
+
+    @property
+    def filtering(self) -> bool:
+        return bool(self.exclude_image_ids) or self.category_ids is not None
+
+    def select(self, image: dict) -> Optional[dict]:
+        """回傳補上 metadata 的圖片，不符合條件或已選滿時回傳 None"""
+        if self.selected >= self.limit:
+            return None
+
+        image_id = image["image_id"]
+        metadata = self.catalog.get(image_id)
+        if image_id in self.exclude_image_ids or (
+            self.category_ids is not None and (metadata is None or metadata.category_id not in self.category_ids)
+        ):
+            self.filtered += 1
+            return None
+
+        self.selected += 1
+        if metadata is None:
+            return image
+        return {
+            **image,
+            "category": self.lookups.categories.names.get(metadata.category_id),
+            "image_url": metadata.image_url,
+            "link": metadata.link,
+        }
+
+    def select_all(self, images: Iterable[dict]) -> List[dict]:
+        selected = []
+        for image in images:
+            if self.selected >= self.limit:
+                break
+            enriched = self.select(image)
+            if enriched is not None:
+                selected.append(enriched)
+        return selected
@@ -0,0 +1,146 @@
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.lookups import (
+    Sex,
+    StyleOption,
+    SeasonPalette,
+    Category,
+    ImageAction,
+    Color,
+    LookupVersion,
+)
+
+
+@dataclass(frozen=True)
+class LookupTable:
+    """單一查找表（id ↔ name）"""
+    names: Mapping[int, str]
+    ids: Mapping[str, int]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, str]]) -> "LookupTable":
+        names = {row_id: name for row_id, name in rows}
+        return cls(
+            names=MappingProxyType(names),
+            ids=MappingProxyType({name: row_id for row_id, name in names.items()}),
+        )
+
+    def __contains__(self, row_id: int) -> bool:
+        return row_id in self.names
+
+
+@dataclass(frozen=True)
+class ColorEntry:
+    """季節色顏色"""
+    id: int
+    season_palette_id: int
+    color_code: str
+    name: str
+    color_hex: str
+
+
+@dataclass(frozen=True)
+class LookupRegistry:
+    """
+    查找表與 216 色調色盤的唯讀快照
+
+    啟動時一次載入，重新載入時建立新快照整個替換，讀取端不需加鎖。
+    """
+    version: int
+    sexes: LookupTable
+    styles: LookupTable
+    season_palettes: LookupTable
+    categories: LookupTable
+    image_actions: LookupTable
+    colors: Mapping[int, ColorEntry]
+    colors_by_code: Mapping[str, ColorEntry]
+    palette_colors: Mapping[int, Tuple[ColorEntry, ...]]
+
+    def invalid_palette_ids(self, palette_ids: Iterable[int]) -> list:
+        """回傳不存在的季節色盤 ID"""
+        return [palette_id for palette_id in palette_ids if palette_id not in self.season_palettes]
+
+
+_registry: Optional[LookupRegistry] = None
+
+
+async def _fetch_version(db: AsyncSession) -> int:
+    return await db.scalar(select(LookupVersion.version).where(LookupVersion.id == 1)) or 0
+
+
+async def load_registry(db: AsyncSession) -> LookupRegistry:
+    """從資料庫載入查找表，建立新快照並替換目前的快照"""
+    global _registry
+
+    version = await _fetch_version(db)
+    tables = {}
+    for key, model in (
+        ("sexes", Sex),
+        ("styles", StyleOption),
+        ("season_palettes", SeasonPalette),
+        ("categories", Category),
+        ("image_actions", ImageAction),
+    ):
+        rows = (await db.execute(select(model.id, model.name))).all()
+        tables[key] = LookupTable.from_rows(rows)
+
+    color_rows = (await db.execute(
+        select(Color.id, Color.season_palette_id, Color.color_code, Color.name, Color.color_hex)
+        .order_by(Color.season_palette_id, Color.id)
+    )).all()
+    colors = [ColorEntry(*row) for row in color_rows]
+
+    palette_colors = {}
+    for color in colors:
+        palette_colors.setdefault(color.season_palette_id, []).append(color)
+
+    _registry = LookupRegistry(
+        version=version,
+        colors=MappingProxyType({color.id: color for color in colors}),
+        colors_by_code=MappingProxyType({color.color_code: color for color in colors}),
+        palette_colors=MappingProxyType({
+            palette_id: tuple(entries) for palette_id, entries in palette_colors.items()
+        }),
+        **tables,
+    )
+    return _registry
+
+
+async def refresh_if_stale(db: AsyncSession) -> bool:
+    """資料庫版本與快照不同時重新載入（只需一次單列查詢），回傳是否有重新載入"""
+    if _registry is not None and await _fetch_version(db) == _registry.version:
+        return False
+    await load_registry(db)
+    return True
+
+
+async def invalidate(db: AsyncSession) -> LookupRegistry:
+    """遞增資料庫版本（通知其他 worker）並重新載入本機快照"""
+    await db.execute(update(LookupVersion).where(LookupVersion.id == 1).values(version=LookupVersion.version + 1))
+    await db.commit()
+    return await load_registry(db)
+
+
+async def refresh_periodically(session_factory, interval: float) -> None:
+    """背景定期檢查版本（migration 遞增版本後，各 worker 會在 interval 秒內重新載入）"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                await refresh_if_stale(db)
+        except Exception:
+            # 資料庫暫時無法連線時沿用目前快照，下次再試
+            continue
+
+
+def get_lookups() -> LookupRegistry:
+    """取得目前的查找表快照（依賴注入用）"""
+    if _registry is None:
+        raise RuntimeError("Lookup registry has not been loaded")
+    return _registry
@@ -0,0 +1,215 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestTimings:
+    """單一請求的耗時統計（由 middleware 建立，放在 contextvar 中供 DB / AI Service hook 累加）"""
+
+    __slots__ = ("start", "db_queries", "db_seconds", "ai_calls", "ai_seconds", "endpoint_done", "response_start")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.ai_calls = 0
+        self.ai_seconds = 0.0
+        self.endpoint_done: Optional[float] = None
+        self.response_start: Optional[float] = None
+
+    @property
+    def serialize_seconds(self) -> Optional[float]:
+        """endpoint 回傳到送出回應標頭之間（response_model 驗證、JSON 序列化）"""
+        if self.endpoint_done is None or self.response_start is None:
+            return None
+        return max(self.response_start - self.endpoint_done, 0.0)
+
+    def server_timing(self) -> str:
+        total = (self.response_start or time.perf_counter()) - self.start
+        parts = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'ai;dur={self.ai_seconds * 1000:.1f};desc="{self.ai_calls} calls"',
+        ]
+        serialize = self.serialize_seconds
+        if serialize is not None:
+            parts.append(f"serialize;dur={serialize * 1000:.1f}")
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_db_query(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+
+
+def record_ai_call(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.ai_calls += 1
+        timings.ai_seconds += seconds
+
+
+class Histogram:
+    """Prometheus histogram（依 label 組合分別累計，累積 bucket 於輸出時計算）"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [各 bucket 次數..., +Inf 次數, sum]
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """各 route template 的請求耗時 histogram"""
+
+    def __init__(self):
+        labels = ("method", "route")
+        self.duration = Histogram(
+            "http_request_duration_seconds", "Time until the response headers are sent.",
+            labels + ("status",), LATENCY_BUCKETS,
+        )
+        self.db_seconds = Histogram(
+            "http_request_db_seconds", "Time spent executing SQL per request.", labels, LATENCY_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", labels, QUERY_COUNT_BUCKETS,
+        )
+        self.ai_seconds = Histogram(
+            "http_request_ai_service_seconds", "Time spent in AI Service calls per request.", labels, LATENCY_BUCKETS,
+        )
+        self.serialize_seconds = Histogram(
+            "http_request_serialize_seconds", "Time from endpoint return to response headers.", labels, LATENCY_BUCKETS,
+        )
+
+    def observe(self, method: str, route: str, status_code: int, timings: RequestTimings) -> None:
+        labels = (method, route)
+        end = timings.response_start or time.perf_counter()
+        self.duration.observe(labels + (str(status_code),), end - timings.start)
+        self.db_seconds.observe(labels, timings.db_seconds)
+        self.db_queries.observe(labels, timings.db_queries)
+        if timings.ai_calls:
+            self.ai_seconds.observe(labels, timings.ai_seconds)
+        serialize = timings.serialize_seconds
+        if serialize is not None:
+            self.serialize_seconds.observe(labels, serialize)
+
+    def expose(self) -> str:
+        histograms = (self.duration, self.db_seconds, self.db_queries, self.ai_seconds, self.serialize_seconds)
+        return "\n".join(h.expose() for h in histograms) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    請求耗時 middleware（ASGI）
+
+    為每個請求建立 RequestTimings，回應標頭加上 Server-Timing（db / ai / serialize / total），
+    並依 route template（未對應到 route 時為 unmatched，避免 label 數量無上限）記錄 histogram。
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timings.response_start = time.perf_counter()
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            metrics_registry.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                timings,
+            )
+
+
+def _mark_endpoint_done(endpoint: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timings = _current.get()
+                if timings is not None:
+                    timings.endpoint_done = time.perf_counter()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timings = _current.get()
+                if timings is not None:
+                    timings.endpoint_done = time.perf_counter()
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """記錄 endpoint 結束時間的 APIRoute，用於計算序列化耗時（APIRouter(route_class=InstrumentedRoute)）"""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
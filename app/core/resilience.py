@@ -0,0 +1,226 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class AIServiceUnavailable(Exception):
+    """AI Service 暫時無法接受請求（不送出請求，直接失敗）"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AIServiceUnavailable):
+    """斷路器開啟中"""
+
+
+class ConcurrencyLimitExceeded(AIServiceUnavailable):
+    """同時進行的請求數已達上限，且等待逾時"""
+
+
+class CircuitBreaker:
+    """
+    AI Service 斷路器
+
+    以最近 window 次呼叫的結果計算失敗率，達 failure_threshold（且至少 min_requests 次）時開啟，
+    open_seconds 內的呼叫直接失敗；之後進入半開狀態，放行 half_open_calls 個試探請求，
+    成功則關閉，失敗則重新開啟。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float,
+        min_requests: int,
+        window: int,
+        open_seconds: float,
+        half_open_calls: int = 1
+    ):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._state = CIRCUIT_CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = 失敗
+        self._opened_at = 0.0
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = CIRCUIT_HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self) -> None:
+        """送出請求前檢查，斷路器開啟（或半開且試探名額已滿）時拋出 CircuitOpenError"""
+        state = self.state
+        if state == CIRCUIT_CLOSED:
+            return
+        if state == CIRCUIT_HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return
+
+        self.rejected += 1
+        raise CircuitOpenError("AI Service circuit breaker is open", retry_after=self._retry_after())
+
+    def _retry_after(self) -> float:
+        return max(self.open_seconds - (time.monotonic() - self._opened_at), 1.0)
+
+    def check(self) -> None:
+        """斷路器開啟時拋出 CircuitOpenError（不佔用半開狀態的試探名額），供呼叫前的前置檢查使用"""
+        if self.state == CIRCUIT_OPEN:
+            raise CircuitOpenError("AI Service circuit breaker is open", retry_after=self._retry_after())
+
+    def record_success(self) -> None:
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._state = CIRCUIT_CLOSED
+            self._outcomes.clear()
+        self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        if self._state == CIRCUIT_HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(True)
+        if self._state == CIRCUIT_CLOSED and len(self._outcomes) >= self.min_requests \
+                and self._failure_rate() >= self.failure_threshold:
+            self._open()
+
+    def record_cancelled(self) -> None:
+        """呼叫端取消、結果未知：歸還半開狀態的試探名額"""
+        if self._state == CIRCUIT_HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _open(self) -> None:
+        self._state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def _failure_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self._failure_rate(), 4),
+            "window_requests": len(self._outcomes),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class AIMDLimiter:
+    """
+    AIMD 併發上限（additive increase / multiplicative decrease）
+
+    請求成功且延遲低於 latency_target 時，上限每輪約增加 1（每次 +1/limit）；
+    失敗或延遲超過目標時，上限乘以 backoff_ratio（每個延遲週期最多一次）。已達上限時最多等待 queue_timeout 秒，
+    逾時拋出 ConcurrencyLimitExceeded，不讓請求無限排隊佔住 worker。
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        queue_timeout: float,
+        backoff_ratio: float = 0.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.queue_timeout = queue_timeout
+        self.backoff_ratio = backoff_ratio
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.rejected = 0
+        self._latency_ewma: Optional[float] = None
+        self._last_backoff = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def saturated(self) -> bool:
+        return self._in_flight >= self.limit
+
+    async def acquire(self) -> None:
+        """取得一個請求名額（已達上限時排隊等待）"""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # 逾時的同時剛好被分配到名額，視為取得成功
+            if waiter.done() and not waiter.cancelled():
+                return
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(
+                f"Too many concurrent AI Service requests (limit {self.limit})",
+                retry_after=max(self.latency_target / 2, 1.0)
+            )
+        except asyncio.CancelledError:
+            # 呼叫端取消但名額已分配，需歸還
+            if waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, latency: Optional[float], succeeded: Optional[bool]) -> None:
+        """
+        歸還名額並依結果調整上限
+
+        succeeded 為 None（呼叫端取消，結果未知）時只歸還名額，不調整上限。
+        """
+        self._in_flight -= 1
+        if succeeded is not None:
+            if latency is not None:
+                self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+            if succeeded and latency is not None and latency <= self.latency_target:
+                self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+            elif time.monotonic() - self._last_backoff >= (latency or 0.0):
+                # 同一批併發請求一起變慢時只減半一次（每個延遲週期最多一次）
+                self._limit = max(self._limit * self.backoff_ratio, self.min_limit)
+                self._last_backoff = time.monotonic()
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._in_flight += 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "latency_ewma_ms": round(self._latency_ewma * 1000, 1) if self._latency_ewma is not None else None,
+        }
@@ -0,0 +1,38 @@
+from typing import Any, Optional
+
+import pydantic_core
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class PydanticJSONResponse(JSONResponse):
+    """以 pydantic-core 直接將回應 model 序列化為 JSON bytes（不經 jsonable_encoder 與中介 dict）"""
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+def model_response(
+    content: BaseModel,
+    status_code: int = status.HTTP_200_OK,
+    response: Optional[Response] = None
+) -> Any:
+    """
+    回傳已建立的回應 model
+
+    FAST_JSON_RESPONSES 開啟時包成 PydanticJSONResponse，略過 FastAPI 依 response_model
+    重新驗證與 jsonable_encoder 的轉換（content 須已是該 response_model 的實例）；
+    關閉時原樣回傳，由 FastAPI 處理。response 為 endpoint 注入的 Response，其標頭會一併帶入。
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+
+    fast_response = PydanticJSONResponse(content, status_code=status_code)
+    if response is not None:
+        fast_response.raw_headers.extend(response.raw_headers)
+    return fast_response
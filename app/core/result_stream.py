@@ -0,0 +1,81 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.repositories.session import RoundRepository, RoundRecommendedResultRepository
+
+STREAM_NDJSON = "ndjson"
+STREAM_SSE = "sse"
+
+MEDIA_TYPES = {
+    STREAM_NDJSON: "application/x-ndjson",
+    STREAM_SSE: "text/event-stream",
+}
+
+
+def encode_event(stream_format: str, event: str, data: Dict[str, Any]) -> str:
+    """
+    將事件編碼為串流格式
+
+    NDJSON：每行 {"event": ..., "data": {...}}
+    SSE：event: ...\\ndata: {...}\\n\\n
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if stream_format == STREAM_SSE:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f'{{"event": "{event}", "data": {payload}}}\n'
+
+
+class ResultBatchWriter:
+    """
+    串流模式的推薦結果背景寫入
+
+    每累積 batch_size 筆交由背景 task 以獨立 DB session 寫入（每批 commit 一次），
+    轉送圖片給 client 時不必等待資料庫。packed 時附加到 Round 的陣列欄位，否則寫入 round_recommended_result。
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, round_id: int, batch_size: int, packed: bool = False):
+        self._session_factory = session_factory
+        self._round_id = round_id
+        self._batch_size = batch_size
+        self._packed = packed
+        self._pending: List[dict] = []
+        self._queue: "asyncio.Queue[Optional[List[dict]]]" = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        self.closed = False
+        self.written = 0
+
+    def add(self, image: dict) -> None:
+        self._pending.append(image)
+        if len(self._pending) >= self._batch_size:
+            self._queue.put_nowait(self._pending)
+            self._pending = []
+
+    async def close(self) -> int:
+        """寫入剩餘結果並等待背景 task 結束，回傳寫入筆數（寫入失敗時拋出例外）"""
+        self.closed = True
+        if self._pending:
+            self._queue.put_nowait(self._pending)
+            self._pending = []
+        self._queue.put_nowait(None)
+        await self._task
+        return self.written
+
+    async def _run(self) -> None:
+        async with self._session_factory() as db:
+            while (batch := await self._queue.get()) is not None:
+                if self._packed:
+                    await RoundRepository.append_packed_results(
+                        db=db,
+                        round_id=self._round_id,
+                        recommended_images=batch
+                    )
+                else:
+                    await RoundRecommendedResultRepository.bulk_create_results(
+                        db=db,
+                        round_id=self._round_id,
+                        recommended_images=batch
+                    )
+                self.written += len(batch)
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.core.color_engine import ColorEngine
+from app.core.lookups import ColorEntry
+
+# 膚色、髮色、眼睛顏色的權重
+FEATURE_WEIGHTS = (0.5, 0.3, 0.2)
+
+
+@dataclass(frozen=True)
+class SeasonClassification:
+    """本地季節色判斷結果"""
+    season_palette_id: int
+    season: str
+    confidence: float
+    representative: Optional[ColorEntry]
+
+
+def classify_season(engine: ColorEngine, skin_hex: str, hair_hex: str, eye_hex: str) -> SeasonClassification:
+    """
+    依膚色、髮色、眼睛顏色在 Lab 空間判斷最接近的季節色盤
+
+    信心度 = 1 - 最近距離 / 次近距離：兩個色盤距離越接近，信心度越低。
+    """
+    ranking = engine.palette_distances([skin_hex, hair_hex, eye_hex], weights=FEATURE_WEIGHTS)
+    best_id, best_distance = ranking[0]
+    second_distance = ranking[1][1] if len(ranking) > 1 else 0.0
+    confidence = 1 - best_distance / second_distance if second_distance > 0 else 0.0
+
+    return SeasonClassification(
+        season_palette_id=best_id,
+        season=engine.palette_name(best_id),
+        confidence=round(confidence, 4),
+        representative=engine.palette_representative(best_id),
+    )
+
+
+@dataclass(frozen=True)
+class ThresholdAgreement:
+    """某個信心度門檻下，本地判斷與 AI Service 結果的比較"""
+    threshold: float
+    samples: int
+    local: int       # 信心度 ≥ 門檻、會由本地判斷的樣本數
+    matched: int     # 其中季節色與 AI Service 相同的樣本數
+
+    @property
+    def coverage(self) -> float:
+        return self.local / self.samples if self.samples else 0.0
+
+    @property
+    def agreement(self) -> float:
+        return self.matched / self.local if self.local else 0.0
+
+
+def agreement_by_threshold(
+    engine: ColorEngine,
+    samples: Iterable[Tuple[str, str, str, str]],
+    thresholds: Sequence[float]
+) -> List[ThresholdAgreement]:
+    """
+    以 AI Service 的分析結果評估本地判斷
+
+    samples 為 (膚色, 髮色, 眼睛色碼, AI Service 判斷的 season_12)；
+    回傳各門檻下本地判斷涵蓋的比例與季節色一致率。
+    """
+    judged = []
+    for skin_hex, hair_hex, eye_hex, expected_season in samples:
+        result = classify_season(engine, skin_hex, hair_hex, eye_hex)
+        judged.append((result.confidence, result.season == expected_season))
+
+    return [
+        ThresholdAgreement(
+            threshold=threshold,
+            samples=len(judged),
+            local=sum(1 for confidence, _ in judged if confidence >= threshold),
+            matched=sum(1 for confidence, matched in judged if confidence >= threshold and matched),
+        )
+        for threshold in thresholds
+    ]
+
+
+def undertone_of(season: str) -> str:
+    """季節色對應的冷暖調性（Spring / Autumn 為暖調，Summer / Winter 為冷調）"""
+    return "warm" if ("Spring" in season or "Autumn" in season) else "cool"
+
+
+class FastPathStats:
+    """色彩分析本地判斷的命中率與節省的延遲"""
+
+    def __init__(self):
+        self.local_hits = 0          # 本地判斷完成
+        self.low_confidence = 0      # 有提供色碼但信心度不足，改呼叫 AI Service
+        self.ai_requests = 0         # 呼叫 AI Service 的總次數
+        self._local_ms_total = 0.0
+        self._ai_ms_total = 0.0
+
+    def record_local(self, elapsed_ms: float) -> None:
+        self.local_hits += 1
+        self._local_ms_total += elapsed_ms
+
+    def record_low_confidence(self) -> None:
+        self.low_confidence += 1
+
+    def record_ai(self, elapsed_ms: float) -> None:
+        self.ai_requests += 1
+        self._ai_ms_total += elapsed_ms
+
+    def snapshot(self) -> dict:
+        eligible = self.local_hits + self.low_confidence
+        total = self.local_hits + self.ai_requests
+        avg_local_ms = self._local_ms_total / self.local_hits if self.local_hits else 0.0
+        avg_ai_ms = self._ai_ms_total / self.ai_requests if self.ai_requests else 0.0
+        return {
+            "local_hits": self.local_hits,
+            "low_confidence_fallbacks": self.low_confidence,
+            "ai_requests": self.ai_requests,
+            "hit_rate": round(self.local_hits / eligible, 4) if eligible else 0.0,
+            "overall_hit_rate": round(self.local_hits / total, 4) if total else 0.0,
+            "avg_local_ms": round(avg_local_ms, 3),
+            "avg_ai_ms": round(avg_ai_ms, 3),
+            # 以 AI Service 平均延遲估算本地判斷省下的時間
+            "estimated_saved_ms": round(self.local_hits * max(avg_ai_ms - avg_local_ms, 0.0), 1),
+        }
+
+
+fast_path_stats = FastPathStats()
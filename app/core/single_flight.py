@@ -0,0 +1,50 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+def fingerprint(*parts: Any) -> str:
+    """將請求內容轉為 canonical JSON（key 排序、無空白）後計算 BLAKE2b 雜湊"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    """
+    合併相同 key 的進行中請求
+
+    同一 key 已有請求執行中時，後到的請求直接等待同一個結果（含例外），
+    不會重複呼叫上游或重複寫入。執行本身放在獨立 task 中，
+    任一等待者被取消（例如 client 斷線）都不會中斷其他等待者。
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0      # 實際執行次數
+        self.coalesced = 0    # 共用結果的重複請求數
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # 所有等待者都已取消時，避免出現 "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
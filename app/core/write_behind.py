@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.repositories.session import RoundRecommendedResultRepository
+
+logger = logging.getLogger(__name__)
+
+PERSIST_SYNC = "sync"
+PERSIST_WRITE_BEHIND = "write_behind"
+
+
+class PendingResultsTimeout(Exception):
+    """等待 Session 前一輪結果寫入逾時（worker 寫入緩慢或重試中）"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _ResultBatch:
+    session_id: int
+    round_id: int
+    recommended_images: List[dict]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ResultWriteBehind:
+    """
+    推薦結果 write-behind 佇列
+
+    API 在 Session / Round commit 後把推薦結果放入有上限的佇列即可回應，
+    背景 worker 將多個 Round 的結果合併成一次多列 INSERT（每次 flush commit 一次）。
+
+    - 佇列已滿時 submit 最多等待 enqueue_timeout 秒（backpressure），逾時改為同步寫入
+    - 寫入失敗時以指數退避重試 max_retries 次；違反約束（如 Round 已刪除）時改為逐 Round 寫入
+      （逐 Round 寫入同樣重試），只略過仍寫入失敗的 Round，dropped_rounds 只計算這些 Round
+    - App 關閉時 close() 會寫完佇列中的所有結果
+    - mode = sync 時不啟動 worker，由 API 在原本的交易中同步寫入
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        mode: str = PERSIST_SYNC,
+        max_queue_size: int = 1000,
+        max_batch_rows: int = 2000,
+        flush_interval: float = 0.05,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        enqueue_timeout: float = 1.0
+    ):
+        self._session_factory = session_factory
+        self.enabled = mode == PERSIST_WRITE_BEHIND
+        self.max_batch_rows = max_batch_rows
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue: "asyncio.Queue[_ResultBatch]" = asyncio.Queue(maxsize=max_queue_size)
+        self._worker: Optional[asyncio.Task] = None
+        # 各 Session 尚未寫入的 Round 數（下一輪 apply_feedback 前需等待寫入完成）
+        self._pending_by_session: Dict[int, int] = defaultdict(int)
+        self._session_flushed = asyncio.Condition()
+
+        # 統計
+        self.enqueued = 0
+        self.sync_fallbacks = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.retries = 0
+        self.dropped_rounds = 0
+        self.session_wait_timeouts = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_max = 0.0
+        self._last_flush_ms = 0.0
+
+    def start(self) -> None:
+        if self.enabled and self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """寫完佇列中的所有結果後停止 worker（App 關閉時呼叫）"""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(self, session_id: int, round_id: int, recommended_images: List[dict]) -> None:
+        """
+        放入一個 Round 的推薦結果（Round 需已 commit）
+
+        佇列已滿時等待最多 enqueue_timeout 秒，仍無空位則直接同步寫入。
+        """
+        if not recommended_images:
+            return
+
+        batch = _ResultBatch(session_id, round_id, recommended_images)
+        self._pending_by_session[session_id] += 1
+        try:
+            await asyncio.wait_for(self._queue.put(batch), self.enqueue_timeout)
+            self.enqueued += 1
+        except asyncio.TimeoutError:
+            self.sync_fallbacks += 1
+            try:
+                await self._write([batch])
+            finally:
+                await self._mark_written([batch])
+        except BaseException:
+            # 放入佇列前被取消：不會有 worker 寫入，撤銷等待計數
+            await self._mark_written([batch])
+            raise
+
+    async def wait_for_session(self, session_id: int, timeout: float = 10.0) -> None:
+        """
+        等待此 Session 已送出的結果寫入完成（建立下一輪並更新前一輪 like / dislike 前呼叫）
+
+        timeout 秒內仍未寫入時丟出 PendingResultsTimeout（retry_after 為 worker 重試一輪的最長時間）。
+        """
+        if not self._pending_by_session.get(session_id):
+            return
+        try:
+            async with self._session_flushed:
+                await asyncio.wait_for(
+                    self._session_flushed.wait_for(lambda: not self._pending_by_session.get(session_id)),
+                    timeout
+                )
+        except asyncio.TimeoutError:
+            self.session_wait_timeouts += 1
+            raise PendingResultsTimeout(
+                f"Previous round results of session {session_id} are still being saved",
+                retry_after=self.retry_backoff * 2 ** self.max_retries
+            )
+
+    async def _run(self) -> None:
+        while True:
+            batches = [await self._queue.get()]
+            rows = len(batches[0].recommended_images)
+
+            # 短暫等待更多 Round，合併成一次 INSERT
+            deadline = time.monotonic() + self.flush_interval
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batches.append(batch)
+                rows += len(batch.recommended_images)
+
+            try:
+                failed = await self._flush(batches)
+                self.dropped_rounds += len(failed)
+            finally:
+                await self._mark_written(batches)
+                for _ in batches:
+                    self._queue.task_done()
+
+    async def _flush(self, batches: List[_ResultBatch]) -> List[_ResultBatch]:
+        """寫入多個 Round 的結果，回傳重試後仍未寫入的 Round"""
+        start = time.perf_counter()
+        try:
+            await self._write_with_retry(batches)
+            failed = []
+        except IntegrityError:
+            if len(batches) == 1:
+                logger.exception("Dropping recommended results for round %s", batches[0].round_id)
+                failed = batches
+            else:
+                # 合併寫入違反約束：改為逐 Round 寫入（同樣重試），只略過出錯的 Round
+                failed = [batch for batch in batches if not await self._write_round(batch)]
+        except Exception:
+            logger.exception("Failed to persist recommended results for rounds %s", [b.round_id for b in batches])
+            failed = batches
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self._last_flush_ms = elapsed_ms
+        self._flush_ms_total += elapsed_ms
+        self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        return failed
+
+    async def _write_round(self, batch: _ResultBatch) -> bool:
+        """逐 Round 寫入（合併寫入違反約束後），失敗時記錄並回傳 False"""
+        try:
+            await self._write_with_retry([batch])
+            return True
+        except Exception:
+            logger.exception("Dropping recommended results for round %s", batch.round_id)
+            return False
+
+    async def _write_with_retry(self, batches: List[_ResultBatch]) -> None:
+        """寫入失敗時以指數退避重試；違反約束（IntegrityError）重試也不會成功，直接丟出"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._write(batches)
+                return
+            except IntegrityError:
+                raise
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _write(self, batches: List[_ResultBatch]) -> None:
+        async with self._session_factory() as db:
+            await RoundRecommendedResultRepository.bulk_create_results_for_rounds(
+                db=db,
+                results_by_round={batch.round_id: batch.recommended_images for batch in batches}
+            )
+        self.rows_written += sum(len(batch.recommended_images) for batch in batches)
+
+    async def _mark_written(self, batches: List[_ResultBatch]) -> None:
+        for batch in batches:
+            self._pending_by_session[batch.session_id] -= 1
+            if self._pending_by_session[batch.session_id] <= 0:
+                del self._pending_by_session[batch.session_id]
+        async with self._session_flushed:
+            self._session_flushed.notify_all()
+
+    def stats(self) -> dict:
+        oldest_ms = None
+        if self._queue.qsize():
+            # asyncio.Queue 未公開內部 deque，取最舊一筆的等待時間
+            oldest_ms = round((time.monotonic() - self._queue._queue[0].enqueued_at) * 1000, 1)
+        return {
+            "mode": PERSIST_WRITE_BEHIND if self.enabled else PERSIST_SYNC,
+            "queue_depth": self._queue.qsize(),
+            "queue_max_size": self._queue.maxsize,
+            "pending_rounds": sum(self._pending_by_session.values()),  # 含 worker 正在寫入的 Round
+            "oldest_pending_ms": oldest_ms,
+            "enqueued_rounds": self.enqueued,
+            "sync_fallbacks": self.sync_fallbacks,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "retries": self.retries,
+            "dropped_rounds": self.dropped_rounds,
+            "session_wait_timeouts": self.session_wait_timeouts,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "avg_flush_ms": round(self._flush_ms_total / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self._flush_ms_max, 2),
+        }
+
+
+def get_result_writer(request: Request) -> ResultWriteBehind:
+    """取得 App 共用的推薦結果 write-behind 佇列（依賴注入用）"""
+    return request.app.state.result_writer
@@ -1,15 +1,34 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import get_settings
+from app.core.metrics import record_db_query
 
 settings = get_settings()
 
-# 建立資料庫引擎
+# 連線池設定（同步與非同步引擎共用）
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+
+def _async_database_url(url: str) -> str:
+    """將 DATABASE_URL 轉為 asyncpg driver（postgresql:// → postgresql+asyncpg://）"""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# 建立資料庫引擎（同步，供 Alembic 與 scripts 使用）
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # 檢查連線是否有效
     echo=False,          # 生產環境設為 False
+    **POOL_OPTIONS,
 )
 
 # 建立 Session 工廠
@@ -19,6 +38,51 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# 建立非同步資料庫引擎（供 API 使用，DB I/O 不會阻塞 event loop）
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    echo=False,
+    **POOL_OPTIONS,
+)
+
+# 建立非同步 Session 工廠
+# expire_on_commit=False：commit 後仍可讀取物件屬性，不會觸發隱式 I/O
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany) -> None:
+    """將 SQL 執行時間累加到目前請求的 RequestTimings（不在請求中時略過）"""
+    record_db_query(time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+@event.listens_for(async_engine.sync_engine, "handle_error")
+def _discard_query_timer(exception_context) -> None:
+    timers = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if timers:
+        timers.pop()
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commits(session: Session) -> None:
+    """累計每個 session 的 commit 次數（session.info["commit_count"]），可用於驗證每個請求的 commit 數"""
+    # savepoint 的 release 不算實際 commit
+    if session.in_nested_transaction():
+        return
+    session.info["commit_count"] = session.info.get("commit_count", 0) + 1
+
+
 # 建立 Base 類別
 Base = declarative_base()
 
@@ -33,3 +97,37 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    取得非同步資料庫 session（依賴注入用）
+    使用 async with 確保 session 會被正確關閉
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """
+    結束目前交易並將連線歸還連線池
+
+    用於長時間等待外部服務（如 AI Service）之前；session 仍可繼續使用，
+    下一次查詢時會重新從連線池取得連線。已載入的物件會 detach，但屬性仍可讀取。
+    """
+    await db.close()
+
+
+def pool_status() -> dict:
+    """非同步引擎連線池使用狀況（saturation = 使用中連線 / 連線上限）"""
+    pool = async_engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
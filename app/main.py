@@ -1,14 +1,70 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.routers import color_analysis, sessions, cart
+from app.core.ai_client import AIServiceClient
+from app.core import image_catalog, lookups
+from app.core.idempotency import idempotency_store
+from app.core.metrics import MetricsMiddleware, metrics_registry
+from app.core.write_behind import ResultWriteBehind
+from app.database import AsyncSessionLocal, pool_status
+from app.routers import admin, color_analysis, colors, sessions, cart
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App 生命週期：啟動時建立共用資源，關閉時釋放"""
+    app.state.ai_client = AIServiceClient(settings)
+    
+    # 推薦結果 write-behind 佇列（RESULT_PERSIST_MODE=sync 時不啟動 worker）
+    app.state.result_writer = ResultWriteBehind(
+        AsyncSessionLocal,
+        mode=settings.RESULT_PERSIST_MODE,
+        max_queue_size=settings.RESULT_WRITE_QUEUE_SIZE,
+        max_batch_rows=settings.RESULT_WRITE_BATCH_ROWS,
+        flush_interval=settings.RESULT_WRITE_FLUSH_INTERVAL,
+        max_retries=settings.RESULT_WRITE_MAX_RETRIES,
+        retry_backoff=settings.RESULT_WRITE_RETRY_BACKOFF,
+        enqueue_timeout=settings.RESULT_WRITE_ENQUEUE_TIMEOUT,
+    )
+    app.state.result_writer.start()
+    
+    # 載入查找表快取，並定期檢查是否需要重新載入
+    async with AsyncSessionLocal() as db:
+        await lookups.load_registry(db)
+    refresh_tasks = []
+    if settings.LOOKUP_REFRESH_INTERVAL > 0:
+        refresh_tasks.append(asyncio.create_task(
+            lookups.refresh_periodically(AsyncSessionLocal, settings.LOOKUP_REFRESH_INTERVAL)
+        ))
+    
+    # 載入圖片 metadata 索引（推薦結果過濾用），同樣定期檢查 catalog_version
+    async with AsyncSessionLocal() as db:
+        await image_catalog.load_index(db)
+    if settings.IMAGE_CATALOG_REFRESH_INTERVAL > 0:
+        refresh_tasks.append(asyncio.create_task(
+            image_catalog.refresh_periodically(AsyncSessionLocal, settings.IMAGE_CATALOG_REFRESH_INTERVAL)
+        ))
+    
+    try:
+        yield
+    finally:
+        for task in refresh_tasks:
+            task.cancel()
+        # 寫完佇列中尚未寫入的推薦結果
+        await app.state.result_writer.close()
+        await app.state.ai_client.aclose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="AuraWear 個人色彩診斷系統 API",
+    lifespan=lifespan,
 )
 
 # CORS 設定
@@ -20,10 +76,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 請求耗時統計（Server-Timing 標頭、/metrics）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
 # 註冊路由
 app.include_router(color_analysis.router, prefix="/api", tags=["Color Analysis"])
+app.include_router(colors.router, prefix="/api", tags=["Colors"])
 app.include_router(sessions.router, prefix="/api", tags=["Sessions"])
 app.include_router(cart.router, prefix="/api", tags=["Cart"])
+app.include_router(admin.router, prefix="/api", tags=["Admin"])
 
 
 @app.get("/")
@@ -38,6 +100,49 @@ def root():
 
 
 @app.get("/health")
-def health_check():
-    """健康檢查"""
-    return {"status": "healthy"}
+def health_check(request: Request):
+    """
+    健康檢查
+    
+    AI Service 斷路器未關閉、/recommend 併發已達上限，或資料庫連線池使用率
+    超過 HEALTH_DB_SATURATION_THRESHOLD 時回傳 503（status = degraded），
+    讓負載平衡器在連線池耗盡前先將流量導向其他 instance。
+    """
+    ai_client = request.app.state.ai_client
+    database = pool_status()
+    catalog = image_catalog.get_image_catalog()
+    degraded = ai_client.degraded or database["saturation"] >= settings.HEALTH_DB_SATURATION_THRESHOLD
+    
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE if degraded else status.HTTP_200_OK,
+        content={
+            "status": "degraded" if degraded else "healthy",
+            "database": database,
+            "ai_service": {
+                **ai_client.pool_stats(),
+                **ai_client.resilience_stats(),
+            },
+            "recommend": {
+                **sessions.recommend_flights.stats(),
+                "idempotency": idempotency_store.stats(),
+            },
+            "result_writer": request.app.state.result_writer.stats(),
+            "image_catalog": {
+                "version": catalog.version,
+                "images": len(catalog),
+            },
+        },
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus 指標
+    
+    依 route template 分組的請求耗時、SQL 數量與耗時、AI Service 呼叫耗時與序列化耗時 histogram。
+    各 worker 各自統計，由 Prometheus 分別抓取後彙總。
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return PlainTextResponse(metrics_registry.expose(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,7 @@
 from app.database import Base
 from app.models.user import User
-from app.models.session import Session, Round, RoundRecommendedResult, Cart
+from app.models.session import Session, Round, RoundRecommendedResult, RoundImageAction, Cart
+from app.models.catalog import ImageCatalog
 from app.models.lookups import (
     Sex,
     StyleOption,
@@ -8,6 +9,7 @@ from app.models.lookups import (
     Category,
     ImageAction,
     Color,
+    LookupVersion,
 )
 
 __all__ = [
@@ -16,11 +18,14 @@ __all__ = [
     "Session",
     "Round",
     "RoundRecommendedResult",
+    "RoundImageAction",
     "Cart",
+    "ImageCatalog",
     "Sex",
     "StyleOption",
     "SeasonPalette",
     "Category",
     "ImageAction",
     "Color",
+    "LookupVersion",
 ]
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ImageCatalog(Base):
+    """
+    推薦圖片 metadata（AstraDB Image Collection 的本地鏡像）
+
+    由 scripts/bulk_import.py images 匯入，API 啟動時載入記憶體索引，
+    用於推薦結果的分類過濾與補上圖片連結，不需呼叫 AI Service。
+    """
+    __tablename__ = "image_catalog"
+    
+    image_id = Column(String(100), primary_key=True)
+    category_id = Column(Integer, ForeignKey("category.id"), nullable=True)
+    gender_id = Column(Integer, ForeignKey("sex.id"), nullable=True)
+    style_id = Column(Integer, ForeignKey("style_option.id"), nullable=True)
+    image_url = Column(String(500), nullable=True)
+    link = Column(String(500), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
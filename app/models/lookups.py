@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -45,6 +45,12 @@ class Category(Base):
     name = Column(String(50), unique=True, nullable=False)
 
 
+# ImageAction 名稱（與 image_action 初始資料一致，ID 由查找表快取解析）
+IMAGE_ACTION_LIKE = "LIKE"
+IMAGE_ACTION_DISLIKE = "DISLIKE"
+IMAGE_ACTION_ADD_TO_CART = "ADD_TO_CART"
+
+
 class ImageAction(Base):
     """圖片操作類型"""
     __tablename__ = "image_action"
@@ -68,3 +74,12 @@ class Color(Base):
     
     # 關聯
     season_palette = relationship("SeasonPalette", back_populates="colors")
+
+
+class LookupVersion(Base):
+    """查找表資料版本（單列），變更查找表資料時遞增以通知 API 重新載入快取"""
+    __tablename__ = "lookup_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="1")
+    catalog_version = Column(BigInteger, nullable=False, server_default="1")  # image_catalog 資料版本
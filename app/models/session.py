@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Index, UniqueConstraint, REAL
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -29,48 +29,114 @@ class Session(Base):
 
 
 class Round(Base):
-    """推薦輪次"""
+    """
+    推薦輪次
+
+    推薦結果有兩種儲存方式（由 RESULT_STORAGE_MODE 決定新 Round 使用哪一種，讀取時兩者皆支援）：
+    - rows：每張圖片一列 RoundRecommendedResult
+    - packed：依排序順位存於 image_ids / scores / explanation_texts / rank_orders 陣列
+      （rank_orders 為 NULL 的舊資料，第 i 個元素的 rank_order 為 i + 1），
+      使用者操作只為有操作的圖片寫入 RoundImageAction
+    image_ids 為 NULL 表示此 Round 使用 rows。
+    """
     __tablename__ = "round"
+    __table_args__ = (
+        # 以季節色盤查詢 Round（包含 @> / 交集 &&）
+        Index("idx_round_selected_palettes", "selected_palette_ids", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("session.id", ondelete="CASCADE"), nullable=False, index=True)
-    selected_palette_ids = Column(JSONB, nullable=True)
+    # 季節色盤 ID（trigger 於寫入時檢查每個 ID 都存在於 season_palette）
+    selected_palette_ids = Column(ARRAY(Integer), nullable=True)
     user_comment = Column(Text, nullable=True)
+    image_ids = Column(ARRAY(String(100)), nullable=True)
+    scores = Column(ARRAY(REAL), nullable=True)
+    explanation_texts = Column(ARRAY(Text), nullable=True)
+    rank_orders = Column(ARRAY(Integer), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 關聯
     session = relationship("Session", back_populates="rounds")
-    results = relationship("RoundRecommendedResult", back_populates="round", cascade="all, delete-orphan")
+    results = relationship(
+        "RoundRecommendedResult",
+        back_populates="round",
+        cascade="all, delete-orphan",
+        order_by="RoundRecommendedResult.rank_order"
+    )
+    image_actions = relationship(
+        "RoundImageAction",
+        back_populates="round",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+    @property
+    def is_packed(self) -> bool:
+        return self.image_ids is not None
 
 
 class RoundRecommendedResult(Base):
-    """推薦結果"""
+    """
+    推薦結果
+
+    依 created_at 按月 range partition（每月一個 partition，由 migration 與
+    scripts/manage_result_partitions.py 建立 / 移除），主鍵需包含分割欄位。
+    查詢時以所屬 Round 的 created_at 為下限，讓 Postgres 略過較舊的 partition。
+    """
     __tablename__ = "round_recommended_result"
+    __table_args__ = (
+        # 以 (round_id, image_id) 查找單張圖片（like / dislike 批次更新）
+        Index("idx_result_round_image", "round_id", "image_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    round_id = Column(Integer, ForeignKey("round.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)  # 複合主鍵需明確指定由 sequence 產生
+    round_id = Column(Integer, ForeignKey("round.id", ondelete="CASCADE"), nullable=False)
     image_id = Column(String(100), nullable=False)
     rank_order = Column(Integer, nullable=False)
     action_type_id = Column(Integer, ForeignKey("image_action.id"), nullable=True)
     dislike_desc = Column(Text, nullable=True)
     explanation_text = Column(Text, nullable=True)
     is_in_cart = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     
     # 關聯
     round = relationship("Round", back_populates="results")
     action_type = relationship("ImageAction", back_populates="results")
 
 
+class RoundImageAction(Base):
+    """packed Round 的使用者操作（只記錄有 like / dislike / 加入購物車的圖片）"""
+    __tablename__ = "round_image_action"
+    
+    round_id = Column(Integer, ForeignKey("round.id", ondelete="CASCADE"), primary_key=True)
+    image_id = Column(String(100), primary_key=True)
+    action_type_id = Column(Integer, ForeignKey("image_action.id"), nullable=True)
+    dislike_desc = Column(Text, nullable=True)
+    is_in_cart = Column(Boolean, nullable=False, server_default="false")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    
+    # 關聯
+    round = relationship("Round", back_populates="image_actions")
+
+
 class Cart(Base):
     """購物車"""
     __tablename__ = "cart"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(50), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String(50), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     image_id = Column(String(100), nullable=False)
     link = Column(String(500), nullable=True)
-    update_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    update_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # 購物車列表依 (update_at, id) 由新到舊分頁
+        Index("idx_cart_user_updated", "user_id", update_at.desc(), id.desc()),
+        # 同一使用者的同一張圖片只有一筆，加入購物車以 ON CONFLICT 更新
+        UniqueConstraint("user_id", "image_id", name="uq_cart_user_image"),
+    )
     
     # 關聯
     user = relationship("User", back_populates="carts")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -11,6 +11,7 @@ class User(Base):
     id = Column(String(50), primary_key=True)
     user_name = Column(String(100), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    cart_count = Column(Integer, nullable=False, server_default="0")  # 由 cart 的 trigger 維護
     
     # 關聯
     sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan")
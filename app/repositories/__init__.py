@@ -1,9 +1,11 @@
 from app.repositories.session import SessionRepository, RoundRepository, RoundRecommendedResultRepository
 from app.repositories.cart import CartRepository
+from app.repositories.unit_of_work import unit_of_work
 
 __all__ = [
     "SessionRepository",
     "RoundRepository",
     "RoundRecommendedResultRepository",
     "CartRepository",
+    "unit_of_work",
 ]
@@ -1,60 +1,107 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session as DBSession
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.unit_of_work import save_changes
 from app.models.session import Cart
+from app.models.user import User
 
 
 class CartRepository:
     """購物車資料存取層"""
 
     @staticmethod
-    def add_to_cart(
-        db: DBSession,
+    async def add_to_cart(
+        db: AsyncSession,
         user_id: str,
         image_id: str,
         link: str
     ) -> Cart:
-        """加入購物車"""
-        # 檢查是否已存在
-        existing = db.query(Cart).filter(
-            Cart.user_id == user_id,
-            Cart.image_id == image_id
-        ).first()
+        """加入購物車（已存在則更新連結和時間）"""
+        items = await CartRepository.add_many_to_cart(db, user_id, [(image_id, link)])
+        return items[0]
+
+    @staticmethod
+    async def get_cart_image_ids(db: AsyncSession, user_id: str) -> List[str]:
+        """使用者購物車中所有圖片 ID（只讀 uq_cart_user_image 索引）"""
+        return list((await db.scalars(select(Cart.image_id).where(Cart.user_id == user_id))).all())
+
+    @staticmethod
+    async def add_many_to_cart(
+        db: AsyncSession,
+        user_id: str,
+        items: List[Tuple[str, str]]
+    ) -> List[Cart]:
+        """
+        批次加入購物車
+
+        items 為 (image_id, link)；以單一 INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+        新增或更新（依 uq_cart_user_image），同時加入同一張圖片也不會產生重複項目。
+        回傳順序與 items 中各 image_id 第一次出現的順序相同。
+        """
+        # 同一個 INSERT 不能更新同一列兩次，重複的 image_id 以最後一筆連結為準
+        links = {}
+        for image_id, link in items:
+            links[image_id] = link
         
-        if existing:
-            # 更新連結和時間
-            existing.link = link
-            db.commit()
-            db.refresh(existing)
-            return existing
+        stmt = pg_insert(Cart).values([
+            {"user_id": user_id, "image_id": image_id, "link": link}
+            for image_id, link in links.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_cart_user_image",
+            set_={"link": stmt.excluded.link, "update_at": func.now()}
+        ).returning(Cart)
         
-        # 新增
-        cart_item = Cart(
-            user_id=user_id,
-            image_id=image_id,
-            link=link
-        )
-        db.add(cart_item)
-        db.commit()
-        db.refresh(cart_item)
-        return cart_item
+        # populate_existing：已在 session 中的項目改用 RETURNING 的新值
+        result = await db.scalars(stmt, execution_options={"populate_existing": True})
+        cart_items = {item.image_id: item for item in result.all()}
+        await save_changes(db)
+        return [cart_items[image_id] for image_id in links]
 
     @staticmethod
-    def get_user_cart(db: DBSession, user_id: str) -> List[Cart]:
-        """取得使用者購物車"""
-        return db.query(Cart).filter(Cart.user_id == user_id).order_by(Cart.update_at.desc()).all()
+    async def get_user_cart(
+        db: AsyncSession,
+        user_id: str,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Cart]:
+        """
+        取得使用者購物車（依 update_at、id 由新到舊）
+
+        before 為上一頁最後一筆的 (update_at, id)，以 keyset 條件取得下一頁，
+        由 (user_id, update_at DESC, id DESC) 索引直接定位，不需 OFFSET 掃過前面的資料。
+        """
+        query = select(Cart).where(Cart.user_id == user_id)
+        if before is not None:
+            query = query.where(tuple_(Cart.update_at, Cart.id) < tuple_(*before))
+        query = query.order_by(Cart.update_at.desc(), Cart.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        
+        result = await db.scalars(query)
+        return list(result.all())
 
     @staticmethod
-    def remove_from_cart(db: DBSession, cart_id: int) -> bool:
-        """從購物車移除"""
-        cart_item = db.query(Cart).filter(Cart.id == cart_id).first()
-        if not cart_item:
-            return False
+    async def count_user_cart(db: AsyncSession, user_id: str) -> int:
+        """使用者購物車數量（users.cart_count，由 trigger 維護）"""
+        count = await db.scalar(select(User.cart_count).where(User.id == user_id))
+        return count or 0
+
+    @staticmethod
+    async def remove_from_cart(db: AsyncSession, cart_id: int) -> Optional[str]:
+        """從購物車移除，回傳該項目的 user_id（不存在時回傳 None）"""
+        user_id = await db.scalar(
+            delete(Cart).where(Cart.id == cart_id).returning(Cart.user_id)
+        )
+        if user_id is None:
+            return None
         
-        db.delete(cart_item)
-        db.commit()
-        return True
+        await save_changes(db)
+        return user_id
 
     @staticmethod
-    def get_by_id(db: DBSession, cart_id: int) -> Optional[Cart]:
+    async def get_by_id(db: AsyncSession, cart_id: int) -> Optional[Cart]:
         """根據 ID 取得購物車項目"""
-        return db.query(Cart).filter(Cart.id == cart_id).first()
+        return await db.get(Cart, cart_id)
@@ -1,14 +1,22 @@
-from typing import Optional, List
-from sqlalchemy.orm import Session as DBSession
-from app.models.session import Session, Round, RoundRecommendedResult
+from datetime import datetime
+from typing import Dict, Optional, List, Union
+from sqlalchemy import Integer, Row, String, Text, any_, cast, column, func, insert, literal, select, true, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, REAL, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.repositories.unit_of_work import save_changes
+from app.models.session import Session, Round, RoundRecommendedResult, RoundImageAction
+
+RESULT_STORAGE_ROWS = "rows"
+RESULT_STORAGE_PACKED = "packed"
 
 
 class SessionRepository:
     """Session 資料存取層"""
 
     @staticmethod
-    def create_session(
-        db: DBSession,
+    async def create_session(
+        db: AsyncSession,
         user_id: str,
         user_image: str,
         gender_id: int,
@@ -30,45 +38,196 @@ class SessionRepository:
             detected_season_palette_id=detected_season_palette_id
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await save_changes(db, session)
         return session
 
     @staticmethod
-    def get_by_id(db: DBSession, session_id: int) -> Optional[Session]:
+    async def get_by_id(db: AsyncSession, session_id: int) -> Optional[Session]:
         """根據 ID 取得 Session"""
-        return db.query(Session).filter(Session.id == session_id).first()
+        return await db.get(Session, session_id)
+
+    @staticmethod
+    async def delete_session(db: AsyncSession, session: Session) -> None:
+        """刪除 Session（用於 Rollback）"""
+        await db.delete(session)
+        await save_changes(db)
 
 
 class RoundRepository:
     """Round 資料存取層"""
 
     @staticmethod
-    def create_round(
-        db: DBSession,
+    async def reserve_round_id(db: AsyncSession) -> int:
+        """預先從 sequence 取得 Round ID（尚未寫入 Round，未使用的 ID 只會留下空號）"""
+        return await db.scalar(
+            select(func.nextval(func.pg_get_serial_sequence(Round.__tablename__, "id")))
+        )
+
+    @staticmethod
+    async def create_round(
+        db: AsyncSession,
         session_id: int,
         selected_palette_ids: List[int],
-        user_comment: Optional[str] = None
+        user_comment: Optional[str] = None,
+        round_id: Optional[int] = None,
+        recommended_images: Optional[List[dict]] = None
     ) -> Round:
-        """建立 Round"""
+        """
+        建立 Round（可指定以 reserve_round_id 預先取得的 ID）
+
+        提供 recommended_images 時以 packed 格式將推薦結果存入 Round 的陣列欄位
+        （與 Round 同一個 INSERT；串流模式先傳入空列表，再以 append_packed_results 附加）。
+        """
+        packed = RoundRepository._packed_columns(recommended_images) if recommended_images is not None else {}
         round_obj = Round(
+            id=round_id,
             session_id=session_id,
             selected_palette_ids=selected_palette_ids,
-            user_comment=user_comment
+            user_comment=user_comment,
+            **packed
         )
         db.add(round_obj)
-        db.commit()
-        db.refresh(round_obj)
+        await save_changes(db, round_obj)
         return round_obj
 
     @staticmethod
-    def delete_round(db: DBSession, round_id: int) -> bool:
+    async def append_packed_results(
+        db: AsyncSession,
+        round_id: int,
+        recommended_images: List[dict]
+    ) -> int:
+        """在 packed Round 的陣列欄位後附加推薦結果（串流模式分批寫入），回傳附加筆數"""
+        if not recommended_images:
+            return 0
+
+        packed = RoundRepository._packed_columns(recommended_images)
+        await db.execute(
+            update(Round)
+            .where(Round.id == round_id)
+            .values(
+                image_ids=func.array_cat(Round.image_ids, cast(packed["image_ids"], ARRAY(String(100)))),
+                scores=func.array_cat(Round.scores, cast(packed["scores"], ARRAY(REAL))),
+                explanation_texts=func.array_cat(Round.explanation_texts, cast(packed["explanation_texts"], ARRAY(Text))),
+                rank_orders=func.array_cat(Round.rank_orders, cast(packed["rank_orders"], ARRAY(Integer)))
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await save_changes(db)
+        return len(recommended_images)
+
+    @staticmethod
+    def _packed_columns(recommended_images: List[dict]) -> dict:
+        # 依 rank_order 排列，並保存原始排序順位（過濾後可能不連續）
+        ordered = sorted(recommended_images, key=lambda img: img["rank_order"])
+        return {
+            "image_ids": [img["image_id"] for img in ordered],
+            "scores": [img.get("score") for img in ordered],
+            "explanation_texts": [img.get("explanation_text") for img in ordered],
+            "rank_orders": [img["rank_order"] for img in ordered],
+        }
+
+    @staticmethod
+    async def get_rounds_with_results(
+        db: AsyncSession,
+        session: Session,
+        limit: int,
+        after_round_id: Optional[int] = None
+    ) -> List[Round]:
+        """
+        取得 Session 的 Round 與推薦結果（依 Round ID 由舊到新，after_round_id 之後的 limit 筆）
+
+        推薦結果以 selectinload 一次載入本頁所有 Round（Round、rows 推薦結果、packed 使用者操作各一個 SQL，
+        不隨 Round 數增加）；同一 Session 的推薦結果都在 Session 建立之後寫入，
+        以此作為 created_at 下限略過較舊月份的 partition。
+        """
+        results = Round.results
+        if session.created_at is not None:
+            results = results.and_(RoundRecommendedResult.created_at >= session.created_at)
+
+        query = select(Round).where(Round.session_id == session.id)
+        if after_round_id is not None:
+            query = query.where(Round.id > after_round_id)
+        query = query.order_by(Round.id).limit(limit).options(
+            selectinload(results),
+            selectinload(Round.image_actions)
+        )
+
+        rounds = await db.scalars(query)
+        return list(rounds.all())
+
+    @staticmethod
+    async def find_rounds_by_palettes(
+        db: AsyncSession,
+        palette_ids: List[int],
+        match_all: bool = False,
+        limit: int = 100,
+        before_round_id: Optional[int] = None
+    ) -> List[Row]:
+        """
+        查詢使用指定季節色盤的 Round（依 Round ID 由新到舊，before_round_id 之前的 limit 筆）
+
+        match_all 時需包含所有色盤（@>），否則包含任一色盤即可（&&），兩者都由 GIN 索引處理。
+        只回傳 id / session_id / selected_palette_ids / created_at，不載入推薦結果陣列。
+        """
+        if not palette_ids:
+            return []
+
+        if match_all:
+            condition = Round.selected_palette_ids.contains(palette_ids)
+        else:
+            condition = Round.selected_palette_ids.overlap(palette_ids)
+        query = select(Round.id, Round.session_id, Round.selected_palette_ids, Round.created_at).where(condition)
+        if before_round_id is not None:
+            query = query.where(Round.id < before_round_id)
+
+        rows = await db.execute(query.order_by(Round.id.desc()).limit(limit))
+        return list(rows.all())
+
+    @staticmethod
+    async def palette_usage_by_day(
+        db: AsyncSession,
+        palette_ids: List[int],
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Row]:
+        """
+        各季節色盤每天被選用的 Round 數（day, palette_id, rounds），依日期與色盤排序
+
+        先以 && 由 GIN 索引找出用到任一指定色盤的 Round，再展開陣列分組計數；
+        since / until 為 Round created_at 的範圍（含 since、不含 until）。
+        """
+        if not palette_ids:
+            return []
+
+        palette = func.unnest(Round.selected_palette_ids).table_valued("palette_id").render_derived()
+        day = func.date_trunc("day", Round.created_at).label("day")
+        query = (
+            select(day, palette.c.palette_id, func.count().label("rounds"))
+            .select_from(Round)
+            .join(palette, true())
+            .where(
+                Round.selected_palette_ids.overlap(palette_ids),
+                palette.c.palette_id.in_(palette_ids)
+            )
+        )
+        if since is not None:
+            query = query.where(Round.created_at >= since)
+        if until is not None:
+            query = query.where(Round.created_at < until)
+
+        rows = await db.execute(
+            query.group_by(day, palette.c.palette_id).order_by(day, palette.c.palette_id)
+        )
+        return list(rows.all())
+
+    @staticmethod
+    async def delete_round(db: AsyncSession, round_id: int) -> bool:
         """刪除 Round（用於 Rollback）"""
-        round_obj = db.query(Round).filter(Round.id == round_id).first()
+        round_obj = await db.get(Round, round_id)
         if not round_obj:
             return False
-        db.delete(round_obj)
-        db.commit()
+        await db.delete(round_obj)
+        await save_changes(db)
         return True
 
 
@@ -76,8 +235,8 @@ class RoundRecommendedResultRepository:
     """Round 推薦結果資料存取層"""
 
     @staticmethod
-    def create_result(
-        db: DBSession,
+    async def create_result(
+        db: AsyncSession,
         round_id: int,
         image_id: str,
         rank_order: int,
@@ -97,50 +256,218 @@ class RoundRecommendedResultRepository:
             is_in_cart=is_in_cart
         )
         db.add(result)
-        db.commit()
-        db.refresh(result)
+        await save_changes(db, result)
         return result
 
     @staticmethod
-    def bulk_create_results(
-        db: DBSession,
+    async def bulk_create_results(
+        db: AsyncSession,
         round_id: int,
         recommended_images: List[dict]
-    ) -> List[RoundRecommendedResult]:
-        """批次建立推薦結果"""
-        results = []
-        for img in recommended_images:
-            result = RoundRecommendedResult(
-                round_id=round_id,
-                image_id=img["image_id"],
-                rank_order=img["rank_order"],
-                explanation_text=img.get("explanation_text")
-            )
-            results.append(result)
-        
-        db.bulk_save_objects(results)
-        db.commit()
-        return results
+    ) -> List[Row]:
+        """
+        批次建立推薦結果
+
+        使用 Core INSERT ... RETURNING（executemany 會合併為多列 VALUES），
+        不建立 ORM 物件、不經過 identity map，回傳每列的 id 與 created_at（依輸入順序）。
+        """
+        if not recommended_images:
+            return []
+
+        table = RoundRecommendedResult.__table__
+        rows = RoundRecommendedResultRepository._result_rows(round_id, recommended_images)
+        result = await db.execute(
+            insert(table).returning(
+                table.c.id,
+                table.c.image_id,
+                table.c.rank_order,
+                table.c.created_at,
+                sort_by_parameter_order=True
+            ),
+            rows
+        )
+        inserted = result.all()
+        await save_changes(db)
+        return inserted
 
     @staticmethod
-    def update_action(
-        db: DBSession,
+    async def bulk_create_results_for_rounds(
+        db: AsyncSession,
+        results_by_round: Dict[int, List[dict]]
+    ) -> int:
+        """
+        多個 Round 的推薦結果合併為一次 INSERT（write-behind 佇列使用）
+
+        不需要 RETURNING，executemany 會合併為多列 VALUES。回傳寫入筆數。
+        """
+        rows = [
+            row
+            for round_id, recommended_images in results_by_round.items()
+            for row in RoundRecommendedResultRepository._result_rows(round_id, recommended_images)
+        ]
+        if not rows:
+            return 0
+
+        await db.execute(insert(RoundRecommendedResult.__table__), rows)
+        await save_changes(db)
+        return len(rows)
+
+    @staticmethod
+    def round_created_at(round_condition):
+        """
+        Round 建立時間的純量子查詢，作為推薦結果 created_at 的下限
+
+        推薦結果一定在 Round 建立之後（或同一交易中）寫入，加上此條件後 Postgres 會在執行時
+        略過較舊月份的 partition，只查詢 Round 建立當月之後的 partition。
+        """
+        return select(Round.created_at).where(round_condition).scalar_subquery()
+
+    @staticmethod
+    def _result_rows(round_id: int, recommended_images: List[dict]) -> List[dict]:
+        return [
+            {
+                "round_id": round_id,
+                "image_id": img["image_id"],
+                "rank_order": img["rank_order"],
+                "explanation_text": img.get("explanation_text"),
+                "is_in_cart": False,
+            }
+            for img in recommended_images
+        ]
+
+    @staticmethod
+    async def update_action(
+        db: AsyncSession,
         round_id: int,
         image_id: str,
         action_type_id: int,
         dislike_desc: Optional[str] = None
-    ) -> Optional[RoundRecommendedResult]:
-        """更新推薦結果的使用者操作"""
-        result = db.query(RoundRecommendedResult).filter(
-            RoundRecommendedResult.round_id == round_id,
-            RoundRecommendedResult.image_id == image_id
-        ).first()
+    ) -> Optional[Union[RoundRecommendedResult, RoundImageAction]]:
+        """更新推薦結果的使用者操作（packed Round 改寫入 RoundImageAction）"""
+        result = await db.scalar(
+            select(RoundRecommendedResult).where(
+                RoundRecommendedResult.round_id == round_id,
+                RoundRecommendedResult.image_id == image_id,
+                RoundRecommendedResult.created_at >= RoundRecommendedResultRepository.round_created_at(
+                    Round.id == round_id
+                )
+            ).limit(1)
+        )
         
         if result:
             result.action_type_id = action_type_id
             if dislike_desc:
                 result.dislike_desc = dislike_desc
-            db.commit()
-            db.refresh(result)
+            await save_changes(db, result)
+            return result
         
-        return result
+        packed_image = select(
+            Round.id,
+            literal(image_id, String),
+            literal(action_type_id, Integer),
+            literal(dislike_desc, Text)
+        ).where(Round.id == round_id, literal(image_id, String) == any_(Round.image_ids))
+        action = await db.scalar(
+            RoundRecommendedResultRepository._upsert_actions(
+                packed_image,
+                ["round_id", "image_id", "action_type_id", "dislike_desc"]
+            ).returning(RoundImageAction),
+            execution_options={"populate_existing": True}
+        )
+        await save_changes(db)
+        return action
+
+    @staticmethod
+    def _upsert_actions(source, column_names: List[str]):
+        """INSERT INTO round_image_action ... SELECT，已有操作時更新（dislike_desc 未提供時保留原值）"""
+        table = RoundImageAction.__table__
+        stmt = pg_insert(RoundImageAction).from_select(column_names, source)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.round_id, table.c.image_id],
+            set_={
+                "action_type_id": stmt.excluded.action_type_id,
+                "dislike_desc": func.coalesce(stmt.excluded.dislike_desc, table.c.dislike_desc),
+                "updated_at": func.now()
+            }
+        )
+
+    @staticmethod
+    async def apply_feedback(
+        db: AsyncSession,
+        session_id: int,
+        like: List[str],
+        dislike: List[dict],
+        like_action_id: int,
+        dislike_action_id: int,
+        previous_round_id: Optional[int] = None,
+        exclude_round_id: Optional[int] = None
+    ) -> int:
+        """
+        批次更新 Session 前一輪推薦結果的 like / dislike
+
+        以單一 UPDATE ... FROM (VALUES ...) 完成：前一輪為 previous_round_id（須屬於此 Session），
+        未指定時由子查詢取得此 Session 最新建立的 Round（created_at、id 由新到舊，排除 exclude_round_id）。
+        Round ID 在呼叫 AI Service 前就已預留，同一 Session 併發建立 Round 時最大的 ID 不一定是
+        最後寫入的 Round，因此不以 max(id) 判斷；建立新 Round 時應以 exclude_round_id 排除預留的 ID。
+        每張圖片透過 (round_id, image_id) 索引定位。dislike 項目格式為
+        {"image_id": ..., "comment": ...}，comment 寫入 dislike_desc。
+        同一張圖片同時出現在 like 與 dislike 時以 dislike 為準。回傳更新筆數。
+
+        前一輪為 packed 時改以 INSERT ... ON CONFLICT 寫入 RoundImageAction（只接受該輪的圖片）；
+        兩個語句都會執行，切換 RESULT_STORAGE_MODE 後的第一輪也能正確更新，另一種格式的語句不會命中任何列。
+        """
+        feedback = {image_id: (like_action_id, None) for image_id in like}
+        for item in dislike:
+            if item.get("image_id"):
+                feedback[item["image_id"]] = (dislike_action_id, item.get("comment"))
+        if not feedback:
+            return 0
+
+        table = RoundRecommendedResult.__table__
+        feedback_values = values(
+            column("image_id", String),
+            column("action_type_id", Integer),
+            column("dislike_desc", Text),
+            name="feedback"
+        ).data([
+            (image_id, action_type_id, dislike_desc)
+            for image_id, (action_type_id, dislike_desc) in feedback.items()
+        ])
+        previous_round = select(Round.id).where(Round.session_id == session_id)
+        if previous_round_id is not None:
+            previous_round = previous_round.where(Round.id == previous_round_id)
+        else:
+            if exclude_round_id is not None:
+                previous_round = previous_round.where(Round.id != exclude_round_id)
+            previous_round = previous_round.order_by(Round.created_at.desc().nulls_last(), Round.id.desc()).limit(1)
+        previous_round_id = previous_round.scalar_subquery()
+
+        result = await db.execute(
+            update(table)
+            .where(
+                table.c.round_id == previous_round_id,
+                table.c.created_at >= RoundRecommendedResultRepository.round_created_at(
+                    Round.id == previous_round_id
+                ),
+                table.c.image_id == feedback_values.c.image_id
+            )
+            .values(
+                action_type_id=feedback_values.c.action_type_id,
+                dislike_desc=func.coalesce(feedback_values.c.dislike_desc, table.c.dislike_desc)
+            )
+        )
+        packed_feedback = select(
+            Round.id,
+            feedback_values.c.image_id,
+            feedback_values.c.action_type_id,
+            feedback_values.c.dislike_desc
+        ).where(
+            Round.id == previous_round_id,
+            feedback_values.c.image_id == any_(Round.image_ids)
+        )
+        packed_result = await db.execute(RoundRecommendedResultRepository._upsert_actions(
+            packed_feedback,
+            ["round_id", "image_id", "action_type_id", "dislike_desc"]
+        ))
+        await save_changes(db)
+        return result.rowcount + packed_result.rowcount
@@ -0,0 +1,45 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+def in_unit_of_work(db: AsyncSession) -> bool:
+    """目前的 session 是否處於 unit of work 模式"""
+    return db.info.get(_UNIT_OF_WORK_KEY, False)
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Unit of Work：在單一交易中執行多個 repository 寫入
+
+    區塊內的 repository 方法只會 flush（取得自動產生的 ID），
+    離開區塊時 commit 一次；發生例外則整筆 rollback。
+    """
+    db.info[_UNIT_OF_WORK_KEY] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(_UNIT_OF_WORK_KEY, None)
+
+
+async def save_changes(db: AsyncSession, *refresh_objs) -> None:
+    """
+    寫入變更
+
+    unit of work 內只 flush，交由外層統一 commit；
+    否則立即 commit 並 refresh 指定物件。
+    """
+    if in_unit_of_work(db):
+        await db.flush()
+        return
+
+    await db.commit()
+    for obj in refresh_objs:
+        await db.refresh(obj)
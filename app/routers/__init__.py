@@ -1,4 +1,4 @@
 # API routers
-from app.routers import color_analysis, sessions, cart
+from app.routers import color_analysis, colors, sessions, cart, admin
 
-__all__ = ["color_analysis", "sessions", "cart"]
+__all__ = ["color_analysis", "colors", "sessions", "cart", "admin"]
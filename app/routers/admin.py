@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.core import image_catalog, lookups
+from app.core.metrics import InstrumentedRoute
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+
+@router.post("/admin/lookups/reload")
+async def reload_lookups(db: AsyncSession = Depends(get_async_db)):
+    """
+    重新載入查找表快取
+    
+    遞增 lookup_version 並重新載入本機快取；
+    其他 worker 會在下次版本檢查時自動重新載入。
+    """
+    registry = await lookups.invalidate(db)
+    
+    return {
+        "version": registry.version,
+        "season_palettes": len(registry.season_palettes.names),
+        "colors": len(registry.colors),
+    }
+
+
+@router.post("/admin/image-catalog/reload")
+async def reload_image_catalog(db: AsyncSession = Depends(get_async_db)):
+    """
+    重新載入圖片 metadata 索引
+    
+    遞增 catalog_version 並重新載入本機索引；
+    其他 worker 會在下次版本檢查時自動重新載入。
+    """
+    catalog = await image_catalog.invalidate(db)
+    
+    return {
+        "version": catalog.version,
+        "images": len(catalog),
+    }
@@ -1,56 +1,138 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session as DBSession
-from app.database import get_db
-from app.schemas.cart import CartAddRequest, CartItemResponse, CartListResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.core.cart_cache import cart_cache
+from app.core.metrics import InstrumentedRoute
+from app.core.responses import model_response
+from app.database import get_async_db
+from app.models.session import Cart
+from app.schemas.cart import (
+    CartAddRequest,
+    CartBatchAddRequest,
+    CartBatchAddResponse,
+    CartItemResponse,
+    CartListResponse,
+)
 from app.repositories.cart import CartRepository
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
+settings = get_settings()
+
+# 一次呼叫 pydantic-core 轉換整個列表，不必逐筆 model_validate
+_cart_items_adapter = TypeAdapter(List[CartItemResponse])
+
+
+def _encode_cursor(item: Cart) -> str:
+    """以本頁最後一筆的 (update_at, id) 產生不透明的分頁游標"""
+    raw = json.dumps({"u": item.update_at.isoformat(), "i": item.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["u"]), int(data["i"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Invalid cursor"
+        )
 
 
 @router.get("/cart", response_model=CartListResponse)
-def get_user_cart(user_id: str = Query(..., description="使用者 ID"), db: DBSession = Depends(get_db)):
+async def get_user_cart(
+    user_id: str = Query(..., description="使用者 ID"),
+    limit: int = Query(settings.CART_PAGE_SIZE, ge=1, le=200, description="每頁筆數"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     查看購物車
     
-    以使用者為單位，回傳該使用者所有購物車項目（跨所有 Session）。
+    以使用者為單位，依更新時間由新到舊分頁回傳該使用者的購物車項目（跨所有 Session）。
+    total_count 為全部項目數；next_cursor 不為 null 時以它取得下一頁。
     """
-    cart_items = CartRepository.get_user_cart(db, user_id)
+    cached = cart_cache.get(user_id, cursor, limit)
+    if cached is not None:
+        return model_response(cached)
+    
+    before = _decode_cursor(cursor) if cursor else None
+    generation = cart_cache.generation
     
-    return CartListResponse(
-        items=[CartItemResponse.model_validate(item) for item in cart_items],
-        total_count=len(cart_items)
+    # 多取一筆判斷是否還有下一頁
+    cart_items = await CartRepository.get_user_cart(db, user_id, limit=limit + 1, before=before)
+    has_more = len(cart_items) > limit
+    cart_items = cart_items[:limit]
+    total_count = await CartRepository.count_user_cart(db, user_id)
+    
+    response = CartListResponse(
+        items=_cart_items_adapter.validate_python(cart_items, from_attributes=True),
+        total_count=total_count,
+        next_cursor=_encode_cursor(cart_items[-1]) if has_more else None
     )
+    cart_cache.set(user_id, cursor, limit, response, generation)
+    return model_response(response)
 
 
 @router.post("/cart", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED)
-def add_to_cart(request: CartAddRequest, db: DBSession = Depends(get_db)):
+async def add_to_cart(request: CartAddRequest, db: AsyncSession = Depends(get_async_db)):
     """
     加入購物車
     
     將指定的圖片加入使用者的購物車。
     若已存在則更新連結和時間。
     """
-    cart_item = CartRepository.add_to_cart(
+    cart_item = await CartRepository.add_to_cart(
         db=db,
         user_id=request.user_id,
         image_id=request.image_id,
         link=request.link
     )
+    cart_cache.invalidate(request.user_id)
     
     return CartItemResponse.model_validate(cart_item)
 
 
+@router.post("/cart/batch", response_model=CartBatchAddResponse, status_code=status.HTTP_201_CREATED)
+async def add_many_to_cart(request: CartBatchAddRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    批次加入購物車
+    
+    一次加入多個項目（例如整套穿搭），以單一 SQL 新增或更新。
+    已存在的圖片更新連結和時間；同一請求中重複的圖片以最後一筆連結為準。
+    """
+    cart_items = await CartRepository.add_many_to_cart(
+        db=db,
+        user_id=request.user_id,
+        items=[(item.image_id, item.link) for item in request.items]
+    )
+    cart_cache.invalidate(request.user_id)
+    
+    return model_response(
+        CartBatchAddResponse(items=_cart_items_adapter.validate_python(cart_items, from_attributes=True)),
+        status.HTTP_201_CREATED
+    )
+
+
 @router.delete("/cart/{cart_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_from_cart(cart_id: int, db: DBSession = Depends(get_db)):
+async def remove_from_cart(cart_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     從購物車移除
     
     從購物車中刪除指定的項目。
     """
-    success = CartRepository.remove_from_cart(db, cart_id)
+    user_id = await CartRepository.remove_from_cart(db, cart_id)
     
-    if not success:
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart item not found"
         )
+    cart_cache.invalidate(user_id)
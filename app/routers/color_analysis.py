@@ -1,33 +1,112 @@
-from fastapi import APIRouter, HTTPException, status
-from app.schemas.color_analysis import ColorAnalysisRequest, ColorAnalysisResponse
+import math
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.config import get_settings
+from app.core.ai_client import AIServiceClient, get_ai_client
+from app.core.analysis_cache import analysis_cache, image_digest
+from app.core.color_engine import get_color_engine
+from app.core.lookups import LookupRegistry, get_lookups
+from app.core.metrics import InstrumentedRoute
+from app.core.resilience import AIServiceUnavailable
+from app.core.season_classifier import classify_season, undertone_of, fast_path_stats
+from app.schemas.color_analysis import ColorAnalysisRequest, ColorAnalysisResponse, PaletteColor
 import httpx
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
+settings = get_settings()
 
-# AI Service URL - 應該從環境變數讀取
-AI_SERVICE_URL = "http://ai-service:8001"  # 需要配置
+
+def _classify_locally(request: ColorAnalysisRequest, lookups: LookupRegistry) -> Optional[ColorAnalysisResponse]:
+    """
+    本地判斷季節色
+    
+    呼叫端已提供膚色、髮色、眼睛色碼時，以 Lab 空間距離判斷季節色，
+    調色盤直接取自查找表快取；信心度不足時回傳 None（改由 AI Service 分析）。
+    
+    本地判斷不分析照片：season_confidence 為季節色判斷的信心度，
+    眼睛顏色沿用請求帶入的值，eye_color_confidence 為 null。
+    """
+    if not (request.skin_color_hex and request.hair_color_hex and request.eye_color_hex):
+        return None
+    
+    start = time.perf_counter()
+    result = classify_season(
+        get_color_engine(lookups),
+        request.skin_color_hex,
+        request.hair_color_hex,
+        request.eye_color_hex
+    )
+    if result.confidence < settings.COLOR_ANALYSIS_LOCAL_CONFIDENCE:
+        fast_path_stats.record_low_confidence()
+        return None
+    
+    response = ColorAnalysisResponse(
+        season_12=result.season,
+        season_hex=result.representative.color_hex,
+        season_confidence=result.confidence,
+        undertone=undertone_of(result.season),
+        skin_color_hex=request.skin_color_hex,
+        hair_color_hex=request.hair_color_hex,
+        eye_color=request.eye_color,
+        eye_color_hex=request.eye_color_hex,
+        eye_color_confidence=None,
+        palette=[
+            PaletteColor(id=color.color_code, hex=color.color_hex, name=color.name, season=result.season)
+            for color in lookups.palette_colors.get(result.season_palette_id, ())
+        ]
+    )
+    fast_path_stats.record_local((time.perf_counter() - start) * 1000)
+    return response
 
 
 @router.post("/color-analysis", response_model=ColorAnalysisResponse)
-async def analyze_color(request: ColorAnalysisRequest):
+async def analyze_color(
+    request: ColorAnalysisRequest,
+    ai_client: AIServiceClient = Depends(get_ai_client),
+    lookups: LookupRegistry = Depends(get_lookups)
+):
     """
     色彩分析 API
     
     上傳個人照片，轉發至 AI Service 進行色彩分析，
     回傳季節色、膚色/髮色/眼色、以及 18 色調色盤。
+    
+    若已提供膚色、髮色、眼睛色碼且本地判斷信心度足夠，直接回傳本地結果，
+    不呼叫 AI Service。
+    
+    同一張照片（以解碼後的圖片內容雜湊判斷）的 AI 分析結果會被快取，
+    重試或重複上傳時直接回傳快取結果。
     """
+    if settings.COLOR_ANALYSIS_FAST_PATH:
+        local_response = _classify_locally(request, lookups)
+        if local_response:
+            return local_response
+    
+    digest = None
+    if settings.COLOR_ANALYSIS_CACHE_ENABLED:
+        digest = image_digest(request.image)
+        cached_response = await analysis_cache.get(digest)
+        if cached_response:
+            return cached_response
+    
     try:
         # 轉發請求至 AI Service
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AI_SERVICE_URL}/analyze-color",
-                json={"image": request.image},
-                timeout=30.0
-            )
-            response.raise_for_status()
-            
-        return ColorAnalysisResponse(**response.json())
+        start = time.perf_counter()
+        ai_data = await ai_client.analyze_color({"image": request.image})
+        fast_path_stats.record_ai((time.perf_counter() - start) * 1000)
+        
+        response = ColorAnalysisResponse(**ai_data)
+        if digest:
+            await analysis_cache.set(digest, response)
+        return response
     
+    except AIServiceUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI Service unavailable: {str(e)}",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=e.response.status_code,
@@ -43,3 +122,26 @@ async def analyze_color(request: ColorAnalysisRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
+
+
+@router.get("/color-analysis/stats")
+def get_color_analysis_stats():
+    """
+    色彩分析本地判斷統計
+    
+    回傳本地判斷命中率、改呼叫 AI Service 的次數、估算節省的延遲，以及結果快取命中率。
+    """
+    return {**fast_path_stats.snapshot(), "cache": analysis_cache.stats()}
+
+
+@router.delete("/color-analysis/cache")
+async def purge_color_analysis_cache(
+    digest: Optional[str] = Query(None, pattern=r"^[0-9a-f]{64}$", description="圖片內容雜湊（BLAKE2b hex）")
+):
+    """
+    清除色彩分析結果快取
+    
+    指定 digest（圖片內容雜湊）時只清除該筆，否則清除全部（記憶體層與磁碟層）。
+    """
+    purged = await analysis_cache.purge(digest)
+    return {"purged": purged}
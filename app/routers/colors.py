@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends
+from app.core.color_engine import get_color_engine
+from app.core.lookups import LookupRegistry, get_lookups
+from app.core.metrics import InstrumentedRoute
+from app.schemas.color import (
+    NearestColorRequest,
+    NearestColorResponse,
+    NearestColorResult,
+    ColorMatch,
+    SeasonMatchRequest,
+    SeasonMatchResponse,
+    SeasonScore,
+)
+from app.schemas.color_analysis import PaletteColor
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+
+@router.post("/colors/nearest", response_model=NearestColorResponse)
+def nearest_colors(request: NearestColorRequest, lookups: LookupRegistry = Depends(get_lookups)):
+    """
+    最近調色盤顏色
+    
+    對每個輸入色碼，回傳 216 色調色盤中色差最小的 k 個顏色（CIELAB 空間，
+    CIEDE2000 或 ΔE76），可限定季節色盤。整批輸入一次向量化計算。
+    """
+    engine = get_color_engine(lookups)
+    matches = engine.nearest(request.hex_colors, k=request.k, metric=request.metric, palette_ids=request.palette_ids)
+    
+    return NearestColorResponse(
+        results=[
+            NearestColorResult(
+                hex=hex_color,
+                matches=[
+                    ColorMatch(
+                        color=PaletteColor(
+                            id=color.color_code,
+                            hex=color.color_hex,
+                            name=color.name,
+                            season=engine.palette_name(color.season_palette_id)
+                        ),
+                        distance=round(distance, 4)
+                    )
+                    for color, distance in row
+                ]
+            )
+            for hex_color, row in zip(request.hex_colors, matches)
+        ]
+    )
+
+
+@router.post("/colors/season-match", response_model=SeasonMatchResponse)
+def match_season(request: SeasonMatchRequest, lookups: LookupRegistry = Depends(get_lookups)):
+    """
+    季節色比對
+    
+    依膚色、髮色（與眼睛顏色）到各季節色盤最接近顏色的平均色差，
+    由近到遠排序 12 個季節色盤。
+    """
+    engine = get_color_engine(lookups)
+    hex_colors = [request.skin_color_hex, request.hair_color_hex]
+    if request.eye_color_hex:
+        hex_colors.append(request.eye_color_hex)
+    
+    return SeasonMatchResponse(
+        seasons=[
+            SeasonScore(
+                season_palette_id=palette_id,
+                season=engine.palette_name(palette_id),
+                distance=round(distance, 4)
+            )
+            for palette_id, distance in engine.palette_distances(hex_colors, metric=request.metric)
+        ]
+    )
@@ -1,220 +1,810 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session as DBSession
-from app.database import get_db
+import asyncio
+import math
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_async_db, release_connection
+from app.core.ai_client import AIServiceClient, get_ai_client
+from app.core.idempotency import idempotency_store
+from app.core.image_catalog import ImageCatalogIndex, RecommendationSelector, get_image_catalog
+from app.core.lookups import LookupRegistry, get_lookups
+from app.core.metrics import InstrumentedRoute
+from app.core.resilience import AIServiceUnavailable
+from app.core.responses import model_response
+from app.core.result_stream import MEDIA_TYPES, ResultBatchWriter, encode_event
+from app.core.write_behind import PendingResultsTimeout, ResultWriteBehind, get_result_writer
+from app.core.single_flight import SingleFlight, fingerprint
 from app.schemas.session import (
     SessionCreateRequest,
     SessionCreateResponse,
     RoundCreateRequest,
     RoundCreateResponse,
-    RecommendedImage
+    RecommendedImage,
+    RoundHistory,
+    RoundResultHistory,
+    SessionHistoryResponse
 )
 from app.repositories.session import (
+    RESULT_STORAGE_PACKED,
     SessionRepository,
     RoundRepository,
     RoundRecommendedResultRepository
 )
+from app.repositories.cart import CartRepository
+from app.repositories.unit_of_work import unit_of_work
 from app.models.user import User
+from app.models.session import Round
+from app.models.lookups import IMAGE_ACTION_LIKE, IMAGE_ACTION_DISLIKE
 import httpx
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
+settings = get_settings()
 
-# AI Service URL - 應該從環境變數讀取
-AI_SERVICE_URL = "http://ai-service:8001"  # 需要配置
+StreamFormat = Literal["ndjson", "sse"]
+
+# packed 模式的推薦結果隨 Round 寫入陣列欄位，不另外寫入 round_recommended_result（也不經過 write-behind 佇列）
+PACKED_RESULTS = settings.RESULT_STORAGE_MODE == RESULT_STORAGE_PACKED
+
+# 相同內容的進行中請求共用同一次 AI Service 呼叫與資料庫寫入
+recommend_flights = SingleFlight()
+
+
+def _validate_lookup_ids(
+    lookups: LookupRegistry,
+    selected_palette_ids: list,
+    gender_id: Optional[int] = None,
+    style_id: Optional[int] = None,
+    category_ids: Optional[list] = None
+) -> None:
+    """以查找表快取驗證 ID（不需查詢資料庫），不存在時回傳 422"""
+    errors = []
+    if gender_id is not None and gender_id not in lookups.sexes:
+        errors.append(f"Invalid gender_id: {gender_id}")
+    if style_id is not None and style_id not in lookups.styles:
+        errors.append(f"Invalid style_id: {style_id}")
+    invalid_palette_ids = lookups.invalid_palette_ids(selected_palette_ids)
+    if invalid_palette_ids:
+        errors.append(f"Invalid selected_palette_ids: {invalid_palette_ids}")
+    invalid_category_ids = [category_id for category_id in category_ids or [] if category_id not in lookups.categories]
+    if invalid_category_ids:
+        errors.append(f"Invalid category_ids: {invalid_category_ids}")
+    
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="; ".join(errors)
+        )
+
+
+def _replay(scope: str, request_fingerprint: str, idempotency_key: Optional[str], response: Response):
+    """
+    回傳此 Idempotency-Key 已保存的回應（回應標頭 Idempotent-Replayed: true），沒有時回傳 None
+    
+    在檢查斷路器之前呼叫：AI Service 不可用時，已成功的請求重送仍能取得原本的回應。
+    相同 key 但請求內容不同時回傳 409。
+    """
+    if not idempotency_key:
+        return None
+    stored = idempotency_store.get(scope, idempotency_key, request_fingerprint)
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+    return stored
+
+
+def _reject_stream_idempotency_key(stream: Optional[StreamFormat], idempotency_key: Optional[str]) -> None:
+    """串流回應無法保存與重送，帶 Idempotency-Key 時回傳 400（不靜默忽略）"""
+    if stream and idempotency_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key is not supported for streaming responses; retry without ?stream"
+        )
+
+
+async def _run_once(
+    scope: str,
+    request_fingerprint: str,
+    idempotency_key: Optional[str],
+    response: Response,
+    fn: Callable[[], Awaitable]
+):
+    """
+    以 single-flight 執行建立流程
+    
+    相同 scope + 請求指紋的進行中請求只執行一次，其餘等待同一結果；
+    帶 Idempotency-Key 時保存成功的回應，重送時直接回傳（回應標頭 Idempotent-Replayed: true）。
+    """
+    stored = _replay(scope, request_fingerprint, idempotency_key, response)
+    if stored is not None:
+        return stored
+    
+    result = await recommend_flights.do((scope, request_fingerprint), fn)
+    
+    if idempotency_key:
+        idempotency_store.set(scope, idempotency_key, request_fingerprint, result)
+    return result
+
+
+def _unavailable(e: AIServiceUnavailable) -> HTTPException:
+    """斷路器開啟或併發已達上限：直接回傳 503，不等待逾時"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"AI Service unavailable: {str(e)}",
+        headers={"Retry-After": str(math.ceil(e.retry_after))}
+    )
+
+
+def _ensure_ai_available(ai_client: AIServiceClient) -> None:
+    """斷路器開啟時在查詢資料庫、預留 Round ID 之前就回傳 503"""
+    try:
+        ai_client.circuit_breaker.check()
+    except AIServiceUnavailable as e:
+        raise _unavailable(e)
+
+
+async def _wait_for_previous_results(result_writer: ResultWriteBehind, session_id: int) -> None:
+    """前一輪結果仍在 write-behind 佇列中時等待寫入完成，逾時回傳 503（client 可稍後以相同內容重試）"""
+    try:
+        await result_writer.wait_for_session(session_id)
+    except PendingResultsTimeout as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
+
+def _ai_error(e: Exception, error_detail: str) -> HTTPException:
+    """將 AI Service 呼叫的例外轉換為 HTTPException"""
+    if isinstance(e, AIServiceUnavailable):
+        return _unavailable(e)
+    
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(
+            status_code=e.response.status_code,
+            detail=f"AI Service error: {e.response.text}"
+        )
+    
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"{error_detail}: {str(e)}"
+    )
+
+
+async def _request_recommendation(ai_client: AIServiceClient, payload: dict, error_detail: str) -> dict:
+    """呼叫 AI Service /recommend，將錯誤轉換為 HTTPException"""
+    try:
+        return await ai_client.recommend(payload)
+    except Exception as e:
+        raise _ai_error(e, error_detail)
+
+
+async def _open_recommendation_stream(
+    ai_client: AIServiceClient,
+    payload: dict,
+    error_detail: str
+) -> Tuple[AsyncIterator[dict], Optional[dict], dict]:
+    """
+    開始串流讀取 /recommend，讀到第一張圖片（或串流結束）為止
+    
+    此階段尚未開始回應，錯誤仍轉換為 HTTPException（一般的 HTTP 狀態碼）。
+    回傳 (串流, 第一張圖片, 目前為止的 metadata)。
+    """
+    results = ai_client.stream_recommend(payload)
+    metadata = {}
+    try:
+        async for item in results:
+            if "image_id" in item:
+                return results, item, metadata
+            metadata.update(item)
+    except Exception as e:
+        await results.aclose()
+        raise _ai_error(e, error_detail)
+    return results, None, metadata
+
+
+async def _stream_results(
+    stream_format: str,
+    header_event: str,
+    header: dict,
+    results: AsyncIterator[dict],
+    first_image: Optional[dict],
+    metadata: dict,
+    round_id: int,
+    selector: RecommendationSelector,
+    require_vector_saved: bool = False
+) -> AsyncIterator[str]:
+    """
+    將推薦圖片依到達順序轉送給 client，並以 micro-batch 在背景寫入資料庫
+    
+    圖片經 selector 過濾並補上分類 / 連結；選滿 k 張後仍讀完串流（最後一行為 vector_saved）。
+    事件依序為 header_event（Session / Round ID）、每張圖片一個 image、最後 done（寫入筆數）；
+    開始回應後發生的錯誤以 error 事件回傳。require_vector_saved 時，
+    AI Service 最後回報 vector_saved = false 會刪除此 Round 並回傳 error。
+    client 中途斷線時，已收到的圖片仍會寫入。
+    """
+    writer = ResultBatchWriter(AsyncSessionLocal, round_id, settings.RECOMMEND_STREAM_BATCH_SIZE, PACKED_RESULTS)
+    try:
+        yield encode_event(stream_format, header_event, header)
+        
+        error = None
+        try:
+            item = first_image
+            while item is not None:
+                if "image_id" in item:
+                    selected = selector.select(item)
+                    if selected is not None:
+                        image = RecommendedImage(**selected)
+                        writer.add(image.model_dump())
+                        yield encode_event(stream_format, "image", image.model_dump())
+                else:
+                    metadata.update(item)
+                item = await anext(results, None)
+        except Exception as e:
+            error = f"AI Service error: {str(e)}"
+        
+        if not error and require_vector_saved and not metadata.get("vector_saved", True):
+            error = "Failed to save round vector to AstraDB. Please retry."
+        
+        try:
+            written = await writer.close()
+        except Exception as e:
+            error = error or f"Failed to save recommended results: {str(e)}"
+        
+        if error and require_vector_saved:
+            async with AsyncSessionLocal() as db:
+                await RoundRepository.delete_round(db, round_id)
+        
+        if error:
+            yield encode_event(stream_format, "error", {"detail": error})
+        else:
+            yield encode_event(stream_format, "done", {"count": written})
+    finally:
+        await results.aclose()
+        if not writer.closed:
+            await asyncio.shield(writer.close())
+
+
+def _streaming_response(stream_format: str, events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        status_code=status.HTTP_201_CREATED,
+        media_type=MEDIA_TYPES[stream_format],
+        # 關閉 proxy 緩衝，讓每張圖片立即送達 client
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _requested_k(request: Union[SessionCreateRequest, RoundCreateRequest]) -> int:
+    """有過濾條件時向 AI Service 多要求一些推薦，過濾後仍能補滿 k 張"""
+    if request.exclude_in_cart or request.category_ids:
+        return math.ceil(request.k * settings.RECOMMEND_FILTER_OVERFETCH)
+    return request.k
+
+
+async def _recommendation_selector(
+    db: AsyncSession,
+    user_id: str,
+    request: Union[SessionCreateRequest, RoundCreateRequest],
+    catalog: ImageCatalogIndex,
+    lookups: LookupRegistry
+) -> RecommendationSelector:
+    """建立推薦圖片的過濾器（exclude_in_cart 時讀取使用者購物車中的圖片 ID）"""
+    exclude_image_ids = await CartRepository.get_cart_image_ids(db, user_id) if request.exclude_in_cart else ()
+    return RecommendationSelector(
+        catalog,
+        lookups,
+        limit=request.k,
+        exclude_image_ids=exclude_image_ids,
+        category_ids=request.category_ids
+    )
+
+
+def _session_payload(request: SessionCreateRequest) -> dict:
+    """初次推薦的 AI Service 請求內容"""
+    return {
+        "selected_palette_ids": request.selected_palette_ids,
+        "filters": {
+            "gender": request.gender_id,
+            "styles": [request.style_id]
+        },
+        "k": _requested_k(request)
+    }
+
+
+def _round_payload(request: RoundCreateRequest, session_id: int, round_id: int) -> dict:
+    """重新推薦的 AI Service 請求內容"""
+    return {
+        "selected_palette_ids": request.selected_palette_ids,
+        "like": request.like,
+        "dislike": request.dislike,
+        "previous_round": request.previous_round,
+        "user_text": request.user_text,
+        "k": _requested_k(request),
+        "session_id": session_id,
+        "round_id": round_id
+    }
 
 
 @router.post("/sessions", response_model=SessionCreateResponse, status_code=status.HTTP_201_CREATED)
-async def create_session(request: SessionCreateRequest, db: DBSession = Depends(get_db)):
+async def create_session(
+    request: SessionCreateRequest,
+    response: Response,
+    stream: Optional[StreamFormat] = Query(None, description="串流模式：ndjson 或 sse"),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    ai_client: AIServiceClient = Depends(get_ai_client),
+    lookups: LookupRegistry = Depends(get_lookups),
+    catalog: ImageCatalogIndex = Depends(get_image_catalog),
+    result_writer: ResultWriteBehind = Depends(get_result_writer)
+):
     """
     建立 Session + 初次推薦
     
-    使用者選定季節色、性別與風格後，建立 Session 和第一個 Round，
-    向 AI Service 請求初次推薦，回傳 Top K 推薦圖片。
+    使用者選定季節色、性別與風格後，向 AI Service 請求初次推薦，
+    建立 Session 和第一個 Round，回傳 Top K 推薦圖片。
+    
+    等待 AI Service 期間不佔用資料庫連線；取得推薦後，Session、Round
+    與推薦結果在同一個交易中寫入，只 commit 一次。AI Service 失敗時不會寫入任何資料。
+    RESULT_PERSIST_MODE=write_behind 時推薦結果改由背景佇列寫入，不在回應路徑上。
+    
+    相同內容的重複請求（連點、重試）共用同一次推薦與寫入；
+    帶 Idempotency-Key 標頭時，重送會回傳第一次建立的 Session（AI Service 不可用時也會重送）。
+    
+    帶 ?stream=ndjson 或 ?stream=sse 時改為串流回應：收到第一張圖片後即建立 Session 與 Round，
+    之後每張圖片到達就轉送給 client，推薦結果在背景分批寫入（串流模式不合併重複請求，
+    也不支援 Idempotency-Key，帶此標頭時回傳 400）。
+    
+    exclude_in_cart / category_ids 以本機圖片索引過濾推薦結果（向 AI Service 多要求
+    RECOMMEND_FILTER_OVERFETCH 倍的圖片），回傳的圖片會補上分類名稱、圖片與商品連結。
     """
-    # 1. 檢查使用者是否存在
-    user = db.query(User).filter(User.id == request.user_id).first()
+    # 1. 驗證查找表 ID
+    _validate_lookup_ids(
+        lookups,
+        request.selected_palette_ids,
+        gender_id=request.gender_id,
+        style_id=request.style_id,
+        category_ids=request.category_ids
+    )
+    _reject_stream_idempotency_key(stream, idempotency_key)
+    
+    # 2. 已保存的回應直接重送（不受斷路器影響）
+    scope = f"user:{request.user_id}"
+    request_fingerprint = fingerprint(request.model_dump())
+    stored = _replay(scope, request_fingerprint, idempotency_key, response)
+    if stored is not None:
+        return model_response(stored, status.HTTP_201_CREATED, response)
+    _ensure_ai_available(ai_client)
+    
+    if stream:
+        return await _create_session_stream(request, ai_client, lookups, catalog, stream)
+    
+    async def _create() -> SessionCreateResponse:
+        async with AsyncSessionLocal() as db:
+            return await _create_session(db, request, ai_client, lookups, catalog, result_writer)
+    
+    result = await _run_once(scope, request_fingerprint, idempotency_key, response, _create)
+    return model_response(result, status.HTTP_201_CREATED, response)
+
+
+async def _create_session(
+    db: AsyncSession,
+    request: SessionCreateRequest,
+    ai_client: AIServiceClient,
+    lookups: LookupRegistry,
+    catalog: ImageCatalogIndex,
+    result_writer: ResultWriteBehind
+) -> SessionCreateResponse:
+    """建立 Session、第一個 Round 與推薦結果"""
+    # 驗證使用者是否存在
+    user = await db.get(User, request.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    selector = await _recommendation_selector(db, request.user_id, request, catalog, lookups)
     
-    # 2. 建立 Session
-    session = SessionRepository.create_session(
-        db=db,
-        user_id=request.user_id,
-        user_image=request.user_image,
-        gender_id=request.gender_id,
-        style_id=request.style_id,
-        skin_color_hex=request.skin_color_hex,
-        hair_color_hex=request.hair_color_hex,
-        eye_color=request.eye_color
-    )
+    # 等待 AI Service 前先歸還連線
+    await release_connection(db)
     
-    # 3. 建立第一個 Round
-    round_obj = RoundRepository.create_round(
-        db=db,
-        session_id=session.id,
-        selected_palette_ids=request.selected_palette_ids
+    # 2. 向 AI Service 請求推薦（依使用者條件過濾）
+    ai_data = await _request_recommendation(
+        ai_client,
+        _session_payload(request),
+        error_detail="Failed to create session"
     )
+    recommended_images = selector.select_all(ai_data.get("recommended_images", []))
     
-    # 4. 向 AI Service 請求推薦
-    try:
-        async with httpx.AsyncClient() as client:
-            ai_response = await client.post(
-                f"{AI_SERVICE_URL}/recommend",
-                json={
-                    "selected_palette_ids": request.selected_palette_ids,
-                    "filters": {
-                        "gender": request.gender_id,
-                        "styles": [request.style_id]
-                    },
-                    "k": request.k
-                },
-                timeout=60.0
-            )
-            ai_response.raise_for_status()
-            ai_data = ai_response.json()
-        
-        # 5. 儲存推薦結果到資料庫
-        recommended_images = ai_data.get("recommended_images", [])
-        RoundRecommendedResultRepository.bulk_create_results(
+    async with unit_of_work(db):
+        # 3. 建立 Session
+        session = await SessionRepository.create_session(
             db=db,
-            round_id=round_obj.id,
-            recommended_images=recommended_images
+            user_id=request.user_id,
+            user_image=request.user_image,
+            gender_id=request.gender_id,
+            style_id=request.style_id,
+            skin_color_hex=request.skin_color_hex,
+            hair_color_hex=request.hair_color_hex,
+            eye_color=request.eye_color
         )
         
-        # 6. 回傳結果
-        return SessionCreateResponse(
+        # 4. 建立第一個 Round（packed 模式推薦結果一併寫入）
+        round_obj = await RoundRepository.create_round(
+            db=db,
             session_id=session.id,
-            round_id=round_obj.id,
-            recommended_images=[
-                RecommendedImage(**img) for img in recommended_images
-            ]
+            selected_palette_ids=request.selected_palette_ids,
+            recommended_images=recommended_images if PACKED_RESULTS else None
         )
-    
-    except httpx.HTTPStatusError as e:
-        # AI Service 錯誤，刪除已建立的 Session 和 Round
-        RoundRepository.delete_round(db, round_obj.id)
-        db.delete(session)
-        db.commit()
         
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"AI Service error: {e.response.text}"
-        )
+        # 5. 儲存推薦結果到資料庫（write-behind 模式改於 commit 後放入佇列）
+        if not PACKED_RESULTS and not result_writer.enabled:
+            await RoundRecommendedResultRepository.bulk_create_results(
+                db=db,
+                round_id=round_obj.id,
+                recommended_images=recommended_images
+            )
     
-    except Exception as e:
-        # 其他錯誤，刪除已建立的 Session 和 Round
-        RoundRepository.delete_round(db, round_obj.id)
-        db.delete(session)
-        db.commit()
-        
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create session: {str(e)}"
-        )
+    if not PACKED_RESULTS and result_writer.enabled:
+        await result_writer.submit(session.id, round_obj.id, recommended_images)
+    
+    # 6. 回傳結果
+    return SessionCreateResponse(
+        session_id=session.id,
+        round_id=round_obj.id,
+        recommended_images=[
+            RecommendedImage(**img) for img in recommended_images
+        ]
+    )
 
 
 @router.post("/sessions/{session_id}/rounds", response_model=RoundCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_round(
     session_id: int,
     request: RoundCreateRequest,
-    db: DBSession = Depends(get_db)
+    response: Response,
+    stream: Optional[StreamFormat] = Query(None, description="串流模式：ndjson 或 sse"),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    ai_client: AIServiceClient = Depends(get_ai_client),
+    lookups: LookupRegistry = Depends(get_lookups),
+    catalog: ImageCatalogIndex = Depends(get_image_catalog),
+    result_writer: ResultWriteBehind = Depends(get_result_writer)
 ):
     """
     Regenerate — 建立新 Round
     
-    使用者按下「重新生成」後，建立新 Round，更新前一輪圖片的操作記錄，
-    向 AI Service 請求重新推薦，回傳新的 Top K 推薦圖片。
+    使用者按下「重新生成」後，向 AI Service 請求重新推薦，建立新 Round，
+    更新前一輪圖片的操作記錄，回傳新的 Top K 推薦圖片。
+    
+    Round ID 先從 sequence 取號（AI Service 需要 round_id 寫入 AstraDB），
+    等待 AI Service 期間不佔用資料庫連線。AI Service 或 AstraDB 寫入失敗時
+    不會寫入任何資料，只留下未使用的 Round ID。
+    
+    相同 Session 的相同請求內容（季節色盤、like / dislike、previous_round 等）
+    在執行中重複送出時，只呼叫一次 AI Service、只建立一個 Round；
+    帶 Idempotency-Key 標頭時，重送會回傳第一次建立的 Round（AI Service 不可用時也會重送）。
     
-    若 AstraDB 寫入失敗，執行 Rollback 刪除該次 Round 記錄。
+    帶 ?stream=ndjson 或 ?stream=sse 時改為串流回應（同 create_session，不合併重複請求、
+    帶 Idempotency-Key 時回傳 400）；
+    AI Service 最後回報 AstraDB 寫入失敗時，會刪除此 Round 並以 error 事件回傳。
     """
-    # 1. 檢查 Session 是否存在
-    session = SessionRepository.get_by_id(db, session_id)
+    # 1. 驗證季節色盤 ID
+    _validate_lookup_ids(lookups, request.selected_palette_ids, category_ids=request.category_ids)
+    _reject_stream_idempotency_key(stream, idempotency_key)
+    
+    # 2. 已保存的回應直接重送（不受斷路器影響）
+    scope = f"session:{session_id}"
+    request_fingerprint = fingerprint(session_id, request.model_dump())
+    stored = _replay(scope, request_fingerprint, idempotency_key, response)
+    if stored is not None:
+        return model_response(stored, status.HTTP_201_CREATED, response)
+    _ensure_ai_available(ai_client)
+    
+    if stream:
+        return await _create_round_stream(session_id, request, ai_client, lookups, catalog, result_writer, stream)
+    
+    async def _create() -> RoundCreateResponse:
+        async with AsyncSessionLocal() as db:
+            return await _create_round(db, session_id, request, ai_client, lookups, catalog, result_writer)
+    
+    result = await _run_once(scope, request_fingerprint, idempotency_key, response, _create)
+    return model_response(result, status.HTTP_201_CREATED, response)
+
+
+async def _create_round(
+    db: AsyncSession,
+    session_id: int,
+    request: RoundCreateRequest,
+    ai_client: AIServiceClient,
+    lookups: LookupRegistry,
+    catalog: ImageCatalogIndex,
+    result_writer: ResultWriteBehind
+) -> RoundCreateResponse:
+    """預留 Round ID、呼叫 AI Service，並寫入 feedback、新 Round 與推薦結果"""
+    # 驗證 Session 是否存在
+    session = await SessionRepository.get_by_id(db, session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
+    selector = await _recommendation_selector(db, session.user_id, request, catalog, lookups)
     
-    # 2. 建立新 Round
-    round_obj = RoundRepository.create_round(
-        db=db,
-        session_id=session_id,
-        selected_palette_ids=request.selected_palette_ids,
-        user_comment=request.user_text
+    # 2. 預先取得新 Round ID，並在等待 AI Service 前歸還連線
+    round_id = await RoundRepository.reserve_round_id(db)
+    await release_connection(db)
+    
+    # 3. 向 AI Service 請求重新推薦
+    ai_data = await _request_recommendation(
+        ai_client,
+        _round_payload(request, session_id, round_id),
+        error_detail="Failed to create round"
     )
     
-    # 3. 更新前一輪圖片的 action_type（like / dislike）
-    # 假設 action_type_id: 1=like, 2=dislike
-    for image_id in request.like:
-        # 需要找到前一輪的 round_id，這裡簡化處理
-        # 實際應該從 request 或 session 中取得前一輪的 round_id
-        pass  # TODO: 實作更新前一輪的 action
+    # 4. 檢查 AstraDB 是否寫入成功
+    if not ai_data.get("vector_saved", True):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save round vector to AstraDB. Please retry."
+        )
+    recommended_images = selector.select_all(ai_data.get("recommended_images", []))
     
-    for dislike_item in request.dislike:
-        # 更新 dislike 的圖片
-        pass  # TODO: 實作更新前一輪的 action
+    # 前一輪結果仍在 write-behind 佇列中時，先等待寫入完成再更新 like / dislike（逾時回傳 503）
+    await _wait_for_previous_results(result_writer, session_id)
     
-    # 4. 向 AI Service 請求重新推薦
-    try:
-        async with httpx.AsyncClient() as client:
-            ai_response = await client.post(
-                f"{AI_SERVICE_URL}/recommend",
-                json={
-                    "selected_palette_ids": request.selected_palette_ids,
-                    "like": request.like,
-                    "dislike": request.dislike,
-                    "previous_round": request.previous_round,
-                    "user_text": request.user_text,
-                    "k": request.k,
-                    "session_id": session_id,
-                    "round_id": round_obj.id
-                },
-                timeout=60.0
-            )
-            ai_response.raise_for_status()
-            ai_data = ai_response.json()
-        
-        # 5. 檢查 AstraDB 是否寫入成功
-        if not ai_data.get("vector_saved", True):
-            # AstraDB 寫入失敗，執行 Rollback
-            RoundRepository.delete_round(db, round_obj.id)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to save round vector to AstraDB. Please retry."
-            )
+    async with unit_of_work(db):
+        # 5. 更新前一輪圖片的 action_type（like / dislike），單一 UPDATE 完成
+        # 前一輪為 request.previous_round_id，未指定時為此 Session 最新建立的 Round（排除預留的 round_id）
+        await RoundRecommendedResultRepository.apply_feedback(
+            db=db,
+            session_id=session_id,
+            like=request.like,
+            dislike=request.dislike,
+            like_action_id=lookups.image_actions.ids[IMAGE_ACTION_LIKE],
+            dislike_action_id=lookups.image_actions.ids[IMAGE_ACTION_DISLIKE],
+            previous_round_id=request.previous_round_id,
+            exclude_round_id=round_id
+        )
         
-        # 6. 儲存推薦結果到資料庫
-        recommended_images = ai_data.get("recommended_images", [])
-        RoundRecommendedResultRepository.bulk_create_results(
+        # 6. 建立新 Round（packed 模式推薦結果一併寫入）
+        await RoundRepository.create_round(
             db=db,
-            round_id=round_obj.id,
-            recommended_images=recommended_images
+            session_id=session_id,
+            selected_palette_ids=request.selected_palette_ids,
+            user_comment=request.user_text,
+            round_id=round_id,
+            recommended_images=recommended_images if PACKED_RESULTS else None
         )
         
-        # 7. 回傳結果
-        return RoundCreateResponse(
-            round_id=round_obj.id,
-            recommended_images=[
-                RecommendedImage(**img) for img in recommended_images
-            ]
+        # 7. 儲存推薦結果到資料庫（write-behind 模式改於 commit 後放入佇列）
+        if not PACKED_RESULTS and not result_writer.enabled:
+            await RoundRecommendedResultRepository.bulk_create_results(
+                db=db,
+                round_id=round_id,
+                recommended_images=recommended_images
+            )
+    
+    if not PACKED_RESULTS and result_writer.enabled:
+        await result_writer.submit(session_id, round_id, recommended_images)
+    
+    # 8. 回傳結果
+    return RoundCreateResponse(
+        round_id=round_id,
+        recommended_images=[
+            RecommendedImage(**img) for img in recommended_images
+        ]
+    )
+
+
+def _round_results(round_obj: Round, action_names: Dict[int, str]) -> List[RoundResultHistory]:
+    """Round 的推薦結果：packed 由陣列欄位與操作紀錄組合，rows 直接轉換每一列"""
+    if not round_obj.is_packed:
+        return [
+            RoundResultHistory(
+                image_id=result.image_id,
+                rank_order=result.rank_order,
+                action=action_names.get(result.action_type_id),
+                dislike_desc=result.dislike_desc,
+                explanation_text=result.explanation_text,
+                is_in_cart=bool(result.is_in_cart)
+            )
+            for result in round_obj.results
+        ]
+    
+    actions = {action.image_id: action for action in round_obj.image_actions}
+    # 建立時的 rank_order（rank_orders 為 NULL 的舊資料以陣列位置 + 1 代替）
+    rank_orders = round_obj.rank_orders or range(1, len(round_obj.image_ids) + 1)
+    results = []
+    for image_id, explanation_text, rank_order in zip(
+        round_obj.image_ids, round_obj.explanation_texts or [], rank_orders
+    ):
+        action = actions.get(image_id)
+        results.append(RoundResultHistory(
+            image_id=image_id,
+            rank_order=rank_order,
+            action=action_names.get(action.action_type_id) if action else None,
+            dislike_desc=action.dislike_desc if action else None,
+            explanation_text=explanation_text,
+            is_in_cart=bool(action and action.is_in_cart)
+        ))
+    return results
+
+
+@router.get("/sessions/{session_id}", response_model=SessionHistoryResponse)
+async def get_session_history(
+    session_id: int,
+    after_round_id: Optional[int] = Query(None, description="上一頁回傳的 next_after_round_id"),
+    limit: int = Query(10, ge=1, le=50, description="每頁 Round 數"),
+    db: AsyncSession = Depends(get_async_db),
+    lookups: LookupRegistry = Depends(get_lookups)
+):
+    """
+    Session 歷史
+    
+    回傳 Session 資訊與各 Round 的推薦結果（含 like / dislike 等操作），Round 依 ID 由舊到新分頁。
+    rows 與 packed 格式的 Round 可混合出現（切換 RESULT_STORAGE_MODE 前後建立的 Round）。
+    不論 Round 數多少都只執行 4 個 SQL（Session、Round、rows 推薦結果、packed 使用者操作）；
+    性別、風格、季節色與操作名稱由查找表快取轉換，不 JOIN 查找表。
+    """
+    session = await SessionRepository.get_by_id(db, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
         )
     
-    except httpx.HTTPStatusError as e:
-        # AI Service 錯誤，Rollback
-        RoundRepository.delete_round(db, round_obj.id)
+    # 多取一個 Round 判斷是否還有下一頁
+    rounds = await RoundRepository.get_rounds_with_results(db, session, limit + 1, after_round_id)
+    has_more = len(rounds) > limit
+    rounds = rounds[:limit]
+    
+    action_names = lookups.image_actions.names
+    return model_response(SessionHistoryResponse(
+        session_id=session.id,
+        user_id=session.user_id,
+        user_image=session.user_image,
+        gender=lookups.sexes.names.get(session.gender_id),
+        style=lookups.styles.names.get(session.style_id),
+        detected_season=lookups.season_palettes.names.get(session.detected_season_palette_id),
+        skin_color_hex=session.skin_color_hex,
+        hair_color_hex=session.hair_color_hex,
+        eye_color=session.eye_color,
+        created_at=session.created_at,
+        rounds=[
+            RoundHistory(
+                round_id=round_obj.id,
+                selected_palette_ids=round_obj.selected_palette_ids or [],
+                user_comment=round_obj.user_comment,
+                created_at=round_obj.created_at,
+                results=_round_results(round_obj, action_names)
+            )
+            for round_obj in rounds
+        ],
+        next_after_round_id=rounds[-1].id if has_more else None
+    ))
+
+
+async def _create_session_stream(
+    request: SessionCreateRequest,
+    ai_client: AIServiceClient,
+    lookups: LookupRegistry,
+    catalog: ImageCatalogIndex,
+    stream_format: str
+) -> StreamingResponse:
+    """串流模式建立 Session：收到第一張圖片後寫入 Session 與 Round，再開始串流"""
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, request.user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        selector = await _recommendation_selector(db, request.user_id, request, catalog, lookups)
+        await release_connection(db)
         
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"AI Service error: {e.response.text}"
+        results, first_image, metadata = await _open_recommendation_stream(
+            ai_client,
+            _session_payload(request),
+            error_detail="Failed to create session"
         )
+        try:
+            async with unit_of_work(db):
+                session = await SessionRepository.create_session(
+                    db=db,
+                    user_id=request.user_id,
+                    user_image=request.user_image,
+                    gender_id=request.gender_id,
+                    style_id=request.style_id,
+                    skin_color_hex=request.skin_color_hex,
+                    hair_color_hex=request.hair_color_hex,
+                    eye_color=request.eye_color
+                )
+                round_obj = await RoundRepository.create_round(
+                    db=db,
+                    session_id=session.id,
+                    selected_palette_ids=request.selected_palette_ids,
+                    recommended_images=[] if PACKED_RESULTS else None
+                )
+        except BaseException:
+            await results.aclose()
+            raise
     
-    except Exception as e:
-        # 其他錯誤，Rollback
-        RoundRepository.delete_round(db, round_obj.id)
+    return _streaming_response(stream_format, _stream_results(
+        stream_format,
+        "session",
+        {"session_id": session.id, "round_id": round_obj.id},
+        results,
+        first_image,
+        metadata,
+        round_obj.id,
+        selector
+    ))
+
+
+async def _create_round_stream(
+    session_id: int,
+    request: RoundCreateRequest,
+    ai_client: AIServiceClient,
+    lookups: LookupRegistry,
+    catalog: ImageCatalogIndex,
+    result_writer: ResultWriteBehind,
+    stream_format: str
+) -> StreamingResponse:
+    """串流模式建立 Round：收到第一張圖片後寫入 feedback 與新 Round，再開始串流"""
+    async with AsyncSessionLocal() as db:
+        session = await SessionRepository.get_by_id(db, session_id)
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        selector = await _recommendation_selector(db, session.user_id, request, catalog, lookups)
+        round_id = await RoundRepository.reserve_round_id(db)
+        await release_connection(db)
         
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create round: {str(e)}"
+        results, first_image, metadata = await _open_recommendation_stream(
+            ai_client,
+            _round_payload(request, session_id, round_id),
+            error_detail="Failed to create round"
         )
+        try:
+            if not metadata.get("vector_saved", True):
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to save round vector to AstraDB. Please retry."
+                )
+            await _wait_for_previous_results(result_writer, session_id)
+            async with unit_of_work(db):
+                await RoundRecommendedResultRepository.apply_feedback(
+                    db=db,
+                    session_id=session_id,
+                    like=request.like,
+                    dislike=request.dislike,
+                    like_action_id=lookups.image_actions.ids[IMAGE_ACTION_LIKE],
+                    dislike_action_id=lookups.image_actions.ids[IMAGE_ACTION_DISLIKE],
+                    previous_round_id=request.previous_round_id,
+                    exclude_round_id=round_id
+                )
+                await RoundRepository.create_round(
+                    db=db,
+                    session_id=session_id,
+                    selected_palette_ids=request.selected_palette_ids,
+                    user_comment=request.user_text,
+                    round_id=round_id,
+                    recommended_images=[] if PACKED_RESULTS else None
+                )
+        except BaseException:
+            await results.aclose()
+            raise
+    
+    return _streaming_response(stream_format, _stream_results(
+        stream_format,
+        "round",
+        {"round_id": round_id},
+        results,
+        first_image,
+        metadata,
+        round_id,
+        selector,
+        require_vector_saved=True
+    ))
@@ -6,12 +6,22 @@ from app.schemas.session import (
     RoundCreateResponse,
     RecommendedImage
 )
+from app.schemas.color import (
+    NearestColorRequest,
+    NearestColorResponse,
+    SeasonMatchRequest,
+    SeasonMatchResponse
+)
 from app.schemas.cart import CartAddRequest, CartItemResponse, CartListResponse
 
 __all__ = [
     "ColorAnalysisRequest",
     "ColorAnalysisResponse",
     "PaletteColor",
+    "NearestColorRequest",
+    "NearestColorResponse",
+    "SeasonMatchRequest",
+    "SeasonMatchResponse",
     "SessionCreateRequest",
     "SessionCreateResponse",
     "RoundCreateRequest",
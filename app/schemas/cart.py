@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -10,6 +10,18 @@ class CartAddRequest(BaseModel):
     link: str = Field(..., description="商品外部連結")
 
 
+class CartBatchItem(BaseModel):
+    """批次加入的單一項目"""
+    image_id: str = Field(..., description="圖片 ID")
+    link: str = Field(..., description="商品外部連結")
+
+
+class CartBatchAddRequest(BaseModel):
+    """批次加入購物車請求（例如整套穿搭）"""
+    user_id: str = Field(..., max_length=50, description="使用者 ID")
+    items: List[CartBatchItem] = Field(..., min_length=1, max_length=100, description="要加入的項目")
+
+
 class CartItemResponse(BaseModel):
     """購物車項目回應"""
     id: int = Field(..., description="購物車項目 ID")
@@ -24,5 +36,11 @@ class CartItemResponse(BaseModel):
 
 class CartListResponse(BaseModel):
     """購物車列表回應"""
-    items: List[CartItemResponse] = Field(..., description="購物車項目列表")
+    items: List[CartItemResponse] = Field(..., description="購物車項目列表（本頁）")
     total_count: int = Field(..., description="總數量")
+    next_cursor: Optional[str] = Field(None, description="下一頁游標，沒有下一頁時為 null")
+
+
+class CartBatchAddResponse(BaseModel):
+    """批次加入購物車回應"""
+    items: List[CartItemResponse] = Field(..., description="新增或更新後的購物車項目")
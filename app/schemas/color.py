@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional
+from app.schemas.color_analysis import PaletteColor
+
+HexColor = Annotated[str, Field(pattern=r"^#[0-9A-Fa-f]{6}$")]
+ColorMetric = Literal["ciede2000", "cie76"]
+
+
+class NearestColorRequest(BaseModel):
+    """最近調色盤顏色查詢請求"""
+    hex_colors: List[HexColor] = Field(..., min_length=1, max_length=256, description="查詢色碼列表")
+    k: int = Field(5, ge=1, le=216, description="每個查詢色回傳的顏色數量")
+    metric: ColorMetric = Field("ciede2000", description="色差公式（ciede2000 / cie76）")
+    palette_ids: Optional[List[int]] = Field(None, description="限定的季節色盤 ID 列表")
+
+
+class ColorMatch(BaseModel):
+    """調色盤顏色與距離"""
+    color: PaletteColor = Field(..., description="調色盤顏色")
+    distance: float = Field(..., description="色差 ΔE")
+
+
+class NearestColorResult(BaseModel):
+    """單一查詢色的最近顏色"""
+    hex: str = Field(..., description="查詢色碼")
+    matches: List[ColorMatch] = Field(..., description="最接近的顏色（由近到遠）")
+
+
+class NearestColorResponse(BaseModel):
+    """最近調色盤顏色查詢回應"""
+    results: List[NearestColorResult] = Field(..., description="查詢結果（與輸入順序相同）")
+
+
+class SeasonMatchRequest(BaseModel):
+    """季節色比對請求"""
+    skin_color_hex: HexColor = Field(..., description="膚色色碼")
+    hair_color_hex: HexColor = Field(..., description="髮色色碼")
+    eye_color_hex: Optional[HexColor] = Field(None, description="眼睛顏色色碼")
+    metric: ColorMetric = Field("ciede2000", description="色差公式（ciede2000 / cie76）")
+
+
+class SeasonScore(BaseModel):
+    """季節色盤距離"""
+    season_palette_id: int = Field(..., description="季節色盤 ID")
+    season: str = Field(..., description="季節色名稱")
+    distance: float = Field(..., description="輸入色到該色盤最接近顏色的平均色差")
+
+
+class SeasonMatchResponse(BaseModel):
+    """季節色比對回應"""
+    seasons: List[SeasonScore] = Field(..., description="季節色盤（由近到遠）")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 
 class PaletteColor(BaseModel):
@@ -13,6 +13,10 @@ class PaletteColor(BaseModel):
 class ColorAnalysisRequest(BaseModel):
     """色彩分析請求"""
     image: str = Field(..., description="圖片 Base64 編碼或 URL")
+    skin_color_hex: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$", description="膚色色碼（與髮色、眼睛色碼一併提供時可於本地判斷季節色）")
+    hair_color_hex: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$", description="髮色色碼")
+    eye_color_hex: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$", description="眼睛顏色色碼")
+    eye_color: Optional[str] = Field(None, description="眼睛顏色")
 
 
 class ColorAnalysisResponse(BaseModel):
@@ -23,7 +27,7 @@ class ColorAnalysisResponse(BaseModel):
     undertone: str = Field(..., description="冷暖調性")
     skin_color_hex: str = Field(..., pattern=r"^#[0-9A-Fa-f]{6}$", description="膚色色碼")
     hair_color_hex: str = Field(..., pattern=r"^#[0-9A-Fa-f]{6}$", description="髮色色碼")
-    eye_color: str = Field(..., description="眼睛顏色")
+    eye_color: Optional[str] = Field(None, description="眼睛顏色（本地判斷時為請求帶入的值）")
     eye_color_hex: str = Field(..., pattern=r"^#[0-9A-Fa-f]{6}$", description="眼睛顏色色碼")
-    eye_color_confidence: float = Field(..., ge=0, le=1, description="眼色信心度")
+    eye_color_confidence: Optional[float] = Field(None, ge=0, le=1, description="眼色信心度（本地判斷未分析眼睛顏色，為 null）")
     palette: List[PaletteColor] = Field(..., description="推薦的 18 色調色盤")
@@ -14,6 +14,8 @@ class SessionCreateRequest(BaseModel):
     hair_color_hex: str = Field(..., pattern=r"^#[0-9A-Fa-f]{6}$", description="髮色色碼")
     eye_color: Optional[str] = Field(None, description="眼睛顏色")
     k: int = Field(50, ge=1, le=100, description="推薦圖片數量")
+    exclude_in_cart: bool = Field(False, description="排除已在購物車中的圖片")
+    category_ids: Optional[List[int]] = Field(None, description="只推薦這些分類的圖片")
 
 
 class RecommendedImage(BaseModel):
@@ -22,6 +24,9 @@ class RecommendedImage(BaseModel):
     rank_order: int = Field(..., description="排序順位")
     score: float = Field(..., description="推薦分數")
     explanation_text: Optional[str] = Field(None, description="推薦說明")
+    category: Optional[str] = Field(None, description="衣物分類（圖片索引中沒有此圖片時為 null）")
+    image_url: Optional[str] = Field(None, description="圖片網址")
+    link: Optional[str] = Field(None, description="商品外部連結")
 
 
 class SessionCreateResponse(BaseModel):
@@ -37,11 +42,49 @@ class RoundCreateRequest(BaseModel):
     like: List[str] = Field(default_factory=list, description="喜歡的圖片 ID 列表")
     dislike: List[dict] = Field(default_factory=list, description="不喜歡的圖片（含評論）")
     previous_round: List[str] = Field(..., description="上一輪的圖片 ID 列表")
+    previous_round_id: Optional[int] = Field(None, description="like / dislike 所屬的 Round ID（未指定時為此 Session 最新的 Round）")
     user_text: Optional[str] = Field(None, description="使用者留言")
     k: int = Field(50, ge=1, le=100, description="推薦圖片數量")
+    exclude_in_cart: bool = Field(False, description="排除已在購物車中的圖片")
+    category_ids: Optional[List[int]] = Field(None, description="只推薦這些分類的圖片")
 
 
 class RoundCreateResponse(BaseModel):
     """建立新 Round 回應"""
     round_id: int = Field(..., description="新 Round ID")
     recommended_images: List[RecommendedImage] = Field(..., description="推薦圖片列表")
+
+
+class RoundResultHistory(BaseModel):
+    """歷史推薦結果"""
+    image_id: str = Field(..., description="圖片 ID")
+    rank_order: int = Field(..., description="排序順位")
+    action: Optional[str] = Field(None, description="使用者操作（LIKE / DISLIKE / ADD_TO_CART）")
+    dislike_desc: Optional[str] = Field(None, description="不喜歡的原因")
+    explanation_text: Optional[str] = Field(None, description="推薦說明")
+    is_in_cart: bool = Field(False, description="是否已加入購物車")
+
+
+class RoundHistory(BaseModel):
+    """歷史 Round"""
+    round_id: int = Field(..., description="Round ID")
+    selected_palette_ids: List[int] = Field(default_factory=list, description="選擇的季節色盤 ID 列表")
+    user_comment: Optional[str] = Field(None, description="使用者留言")
+    created_at: Optional[datetime] = Field(None, description="建立時間")
+    results: List[RoundResultHistory] = Field(..., description="推薦結果（依排序順位）")
+
+
+class SessionHistoryResponse(BaseModel):
+    """Session 歷史回應"""
+    session_id: int = Field(..., description="Session ID")
+    user_id: str = Field(..., description="使用者 ID")
+    user_image: Optional[str] = Field(None, description="使用者上傳的照片路徑")
+    gender: Optional[str] = Field(None, description="性別")
+    style: Optional[str] = Field(None, description="風格")
+    detected_season: Optional[str] = Field(None, description="偵測到的季節色")
+    skin_color_hex: Optional[str] = Field(None, description="膚色色碼")
+    hair_color_hex: Optional[str] = Field(None, description="髮色色碼")
+    eye_color: Optional[str] = Field(None, description="眼睛顏色")
+    created_at: Optional[datetime] = Field(None, description="建立時間")
+    rounds: List[RoundHistory] = Field(..., description="本頁的 Round（依 Round ID 由舊到新）")
+    next_after_round_id: Optional[int] = Field(None, description="下一頁的 after_round_id，沒有下一頁時為 null")
@@ -0,0 +1,81 @@
+"""add_cart_keyset_index_and_count
+
+Revision ID: 0801c0a39c91
+Revises: 6af1187fafa2
+Create Date: 2026-10-18 08:44:23.584303
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0801c0a39c91'
+down_revision: Union[str, Sequence[str], None] = '6af1187fafa2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Keyset pagination index and trigger-maintained cart count for cart listing."""
+    
+    # 1. 分頁游標為 (update_at, id)，update_at 不可為 NULL
+    op.execute("UPDATE cart SET update_at = now() WHERE update_at IS NULL")
+    op.alter_column('cart', 'update_at', nullable=False)
+    
+    # 2. users.cart_count：由 trigger 維護購物車數量，查詢總數不需 count(*)
+    op.add_column('users', sa.Column('cart_count', sa.Integer(), nullable=False, server_default='0'))
+    # 回填與建立 trigger 期間暫停 cart 寫入，避免數量不一致
+    op.execute("LOCK TABLE cart IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        UPDATE users AS u SET cart_count = c.n
+        FROM (SELECT user_id, count(*) AS n FROM cart GROUP BY user_id) AS c
+        WHERE u.id = c.user_id
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION cart_count_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET cart_count = cart_count + 1 WHERE id = NEW.user_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE users SET cart_count = cart_count - 1 WHERE id = OLD.user_id;
+            ELSIF NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+                UPDATE users SET cart_count = cart_count - 1 WHERE id = OLD.user_id;
+                UPDATE users SET cart_count = cart_count + 1 WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_cart_count
+        AFTER INSERT OR DELETE OR UPDATE OF user_id ON cart
+        FOR EACH ROW EXECUTE FUNCTION cart_count_sync()
+    """)
+    
+    # 3. (user_id, update_at DESC, id DESC) 對應購物車列表的排序與游標條件
+    # CONCURRENTLY 不能在交易中執行，避免建立索引期間鎖住寫入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_cart_user_updated',
+            'cart',
+            ['user_id', sa.text('update_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # 新索引已涵蓋以 user_id 為條件的查詢，移除重複的單欄索引
+        op.drop_index('idx_cart_user', table_name='cart', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema: Restore single-column user_id index and drop cart count."""
+    
+    with op.get_context().autocommit_block():
+        op.create_index('idx_cart_user', 'cart', ['user_id'], postgresql_concurrently=True)
+        op.drop_index('idx_cart_user_updated', table_name='cart', postgresql_concurrently=True)
+    
+    op.execute("DROP TRIGGER IF EXISTS trg_cart_count ON cart")
+    op.execute("DROP FUNCTION IF EXISTS cart_count_sync()")
+    op.drop_column('users', 'cart_count')
+    op.alter_column('cart', 'update_at', nullable=True)
@@ -0,0 +1,120 @@
+"""partition_round_recommended_result
+
+Revision ID: 1796072503c5
+Revises: a721c11a87fa
+Create Date: 2026-10-18 08:53:10.559107
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1796072503c5'
+down_revision: Union[str, Sequence[str], None] = 'a721c11a87fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 各月份 partition 的儲存參數：保留頁面空間讓 like / dislike 更新走 HOT update，
+# 並讓 autovacuum 在較少的變動量時就處理當月的 partition
+PARTITION_STORAGE = "fillfactor = 90, autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02"
+PREMAKE_MONTHS = 3
+
+
+def _result_columns(id_default: sa.TextClause) -> list:
+    return [
+        sa.Column('id', sa.Integer(), server_default=id_default, nullable=False),
+        sa.Column('round_id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.String(length=100), nullable=False),
+        sa.Column('rank_order', sa.Integer(), nullable=False),
+        sa.Column('action_type_id', sa.Integer(), nullable=True),
+        sa.Column('dislike_desc', sa.Text(), nullable=True),
+        sa.Column('explanation_text', sa.Text(), nullable=True),
+        sa.Column('is_in_cart', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['round_id'], ['round.id'], ondelete='CASCADE', name='round_recommended_result_round_id_fkey'),
+        sa.ForeignKeyConstraint(['action_type_id'], ['image_action.id'], name='round_recommended_result_action_type_id_fkey'),
+    ]
+
+
+COPY_COLUMNS = "id, round_id, image_id, rank_order, action_type_id, dislike_desc, explanation_text, is_in_cart, created_at"
+ID_DEFAULT = sa.text("nextval('round_recommended_result_id_seq'::regclass)")
+
+
+def upgrade() -> None:
+    """Upgrade schema: Range-partition round_recommended_result by month on created_at."""
+    
+    # 1. 舊表改名（建立新表期間持有 ACCESS EXCLUSIVE lock，複製完成前推薦結果寫入會等待）
+    op.rename_table('round_recommended_result', 'round_recommended_result_legacy')
+    op.execute("ALTER TABLE round_recommended_result_legacy RENAME CONSTRAINT round_recommended_result_pkey TO round_recommended_result_legacy_pkey")
+    op.drop_index('idx_result_round_image', table_name='round_recommended_result_legacy')
+    
+    # 2. 依 created_at 按月分割的新表，主鍵需包含分割欄位
+    op.create_table(
+        'round_recommended_result',
+        *_result_columns(ID_DEFAULT),
+        sa.PrimaryKeyConstraint('id', 'created_at', name='round_recommended_result_pkey'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    
+    # 3. 建立舊資料所涵蓋的月份與未來 PREMAKE_MONTHS 個月的 partition（以 UTC 月份為界）
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start timestamptz := date_trunc(
+                'month',
+                coalesce((SELECT min(created_at) FROM round_recommended_result_legacy), now()) AT TIME ZONE 'UTC'
+            ) AT TIME ZONE 'UTC';
+            last_month timestamptz := date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                + interval '{PREMAKE_MONTHS} months';
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF round_recommended_result FOR VALUES FROM (%L) TO (%L) WITH ({PARTITION_STORAGE})',
+                    'round_recommended_result_p' || to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END
+        $$
+    """)
+    
+    # 4. 複製資料（舊資料 created_at 為 NULL 時以目前時間補上）
+    op.execute(f"""
+        INSERT INTO round_recommended_result ({COPY_COLUMNS})
+        SELECT id, round_id, image_id, rank_order, action_type_id, dislike_desc, explanation_text, is_in_cart,
+               coalesce(created_at, now())
+        FROM round_recommended_result_legacy
+    """)
+    
+    # 5. 在分割表上建立索引（自動建立於每個 partition），sequence 改由新表擁有後刪除舊表
+    op.create_index('idx_result_round_image', 'round_recommended_result', ['round_id', 'image_id'])
+    op.execute("ALTER SEQUENCE round_recommended_result_id_seq OWNED BY round_recommended_result.id")
+    op.drop_table('round_recommended_result_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema: Restore unpartitioned round_recommended_result."""
+    
+    op.rename_table('round_recommended_result', 'round_recommended_result_partitioned')
+    op.execute("ALTER TABLE round_recommended_result_partitioned RENAME CONSTRAINT round_recommended_result_pkey TO round_recommended_result_partitioned_pkey")
+    op.drop_index('idx_result_round_image', table_name='round_recommended_result_partitioned')
+    
+    op.create_table(
+        'round_recommended_result',
+        *_result_columns(ID_DEFAULT),
+        sa.PrimaryKeyConstraint('id', name='round_recommended_result_pkey'),
+    )
+    op.alter_column('round_recommended_result', 'created_at', nullable=True)
+    op.execute(f"""
+        INSERT INTO round_recommended_result ({COPY_COLUMNS})
+        SELECT {COPY_COLUMNS} FROM round_recommended_result_partitioned
+    """)
+    op.create_index('idx_result_round_image', 'round_recommended_result', ['round_id', 'image_id'])
+    op.execute("ALTER SEQUENCE round_recommended_result_id_seq OWNED BY round_recommended_result.id")
+    op.drop_table('round_recommended_result_partitioned')
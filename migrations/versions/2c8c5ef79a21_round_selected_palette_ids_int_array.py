@@ -0,0 +1,140 @@
+"""round_selected_palette_ids_int_array
+
+Revision ID: 2c8c5ef79a21
+Revises: e2172cebfa7d
+Create Date: 2026-10-18 09:01:26.185361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8c5ef79a21'
+down_revision: Union[str, Sequence[str], None] = 'e2172cebfa7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Typed integer[] selected_palette_ids on round with GIN index and lookup check."""
+    
+    # 1. JSONB → integer[]（保留順序，重複的色盤只保留第一次出現）
+    # 舊資料的元素可能是色盤 ID、顏色代碼（ls_01，轉為該顏色所屬的色盤）或色盤名稱（Light Spring）
+    op.execute("""
+        CREATE FUNCTION pg_temp.palette_id(element jsonb) RETURNS integer AS $$
+            SELECT CASE
+                WHEN element #>> '{}' ~ '^[0-9]+$' THEN
+                    (SELECT p.id FROM season_palette AS p WHERE p.id = (element #>> '{}')::integer)
+                WHEN jsonb_typeof(element) = 'string' THEN coalesce(
+                    (SELECT c.season_palette_id FROM color AS c WHERE c.color_code = element #>> '{}'),
+                    (SELECT p.id FROM season_palette AS p WHERE p.name = element #>> '{}')
+                )
+            END
+        $$ LANGUAGE sql STABLE
+    """)
+    
+    # 有無法轉換的值時中止 migration（列出 Round ID 與值），不會捨棄資料；修正或清除這些資料後再執行
+    op.execute("""
+        DO $$
+        DECLARE
+            invalid_count bigint;
+            invalid text;
+        BEGIN
+            WITH invalid_rounds AS (
+                SELECT r.id, CASE
+                    WHEN jsonb_typeof(r.selected_palette_ids) <> 'array' THEN r.selected_palette_ids::text
+                    ELSE (
+                        SELECT string_agg(t.element::text, ', ')
+                        FROM jsonb_array_elements(r.selected_palette_ids) AS t(element)
+                        WHERE pg_temp.palette_id(t.element) IS NULL
+                    )
+                END AS bad_values
+                FROM round AS r
+                WHERE r.selected_palette_ids IS NOT NULL AND jsonb_typeof(r.selected_palette_ids) <> 'null'
+            )
+            SELECT
+                count(*),
+                string_agg(format('round %s: %s', id, bad_values), '; ' ORDER BY id) FILTER (WHERE rn <= 50)
+            INTO invalid_count, invalid
+            FROM (
+                SELECT id, bad_values, row_number() OVER (ORDER BY id) AS rn
+                FROM invalid_rounds WHERE bad_values IS NOT NULL
+            ) AS t;
+            IF invalid_count > 0 THEN
+                RAISE EXCEPTION 'Cannot convert selected_palette_ids of % rounds (first 50): %', invalid_count, invalid;
+            END IF;
+        END
+        $$
+    """)
+    
+    # ALTER ... USING 不能含子查詢，先以暫時函式轉換；會重寫 round 並鎖住讀寫，資料量大時請安排在離峰時段
+    op.execute("""
+        CREATE FUNCTION pg_temp.jsonb_to_palette_ids(value jsonb) RETURNS integer[] AS $$
+            SELECT CASE WHEN jsonb_typeof(value) = 'array' THEN coalesce((
+                SELECT array_agg(id ORDER BY position)
+                FROM (
+                    SELECT pg_temp.palette_id(t.element) AS id, min(t.position) AS position
+                    FROM jsonb_array_elements(value) WITH ORDINALITY AS t(element, position)
+                    GROUP BY 1
+                ) AS ids
+            ), '{}') END
+        $$ LANGUAGE sql STABLE
+    """)
+    op.execute("""
+        ALTER TABLE round ALTER COLUMN selected_palette_ids TYPE integer[]
+        USING pg_temp.jsonb_to_palette_ids(selected_palette_ids)
+    """)
+    op.execute("DROP FUNCTION pg_temp.jsonb_to_palette_ids(jsonb)")
+    op.execute("DROP FUNCTION pg_temp.palette_id(jsonb)")
+    
+    # 2. 寫入時檢查每個 ID 都存在於 season_palette（陣列元素無法使用 foreign key）
+    # API 已以查找表快取驗證並回傳 422，此 trigger 防止其他寫入來源或快取過期時寫入不存在的 ID
+    op.execute("""
+        CREATE OR REPLACE FUNCTION round_palette_ids_check() RETURNS trigger AS $$
+        DECLARE
+            missing integer[];
+        BEGIN
+            SELECT array_agg(p.id) INTO missing
+            FROM unnest(NEW.selected_palette_ids) AS p(id)
+            WHERE p.id IS NULL OR NOT EXISTS (SELECT 1 FROM season_palette AS s WHERE s.id = p.id);
+            IF missing IS NOT NULL THEN
+                RAISE EXCEPTION 'Invalid selected_palette_ids: %', missing
+                    USING ERRCODE = 'foreign_key_violation';
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_round_palette_ids
+        BEFORE INSERT OR UPDATE OF selected_palette_ids ON round
+        FOR EACH ROW WHEN (NEW.selected_palette_ids IS NOT NULL)
+        EXECUTE FUNCTION round_palette_ids_check()
+    """)
+    
+    # 3. GIN 索引支援包含（@>）與交集（&&）查詢
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_round_selected_palettes',
+            'round',
+            ['selected_palette_ids'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema: Restore JSONB selected_palette_ids on round."""
+    
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_round_selected_palettes', table_name='round', postgresql_concurrently=True)
+    
+    op.execute("DROP TRIGGER IF EXISTS trg_round_palette_ids ON round")
+    op.execute("DROP FUNCTION IF EXISTS round_palette_ids_check()")
+    op.execute("""
+        ALTER TABLE round ALTER COLUMN selected_palette_ids TYPE jsonb
+        USING to_jsonb(selected_palette_ids)
+    """)
@@ -0,0 +1,48 @@
+"""add_image_catalog
+
+Revision ID: 45151ec497e9
+Revises: 2c8c5ef79a21
+Create Date: 2026-10-18 09:07:12.768344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '45151ec497e9'
+down_revision: Union[str, Sequence[str], None] = '2c8c5ef79a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Local image_catalog mirror and catalog_version on lookup_version."""
+    
+    # 1. AstraDB 圖片的本地 metadata（由 scripts/bulk_import.py images 匯入）
+    op.create_table(
+        'image_catalog',
+        sa.Column('image_id', sa.String(length=100), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('gender_id', sa.Integer(), nullable=True),
+        sa.Column('style_id', sa.Integer(), nullable=True),
+        sa.Column('image_url', sa.String(length=500), nullable=True),
+        sa.Column('link', sa.String(length=500), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['category.id']),
+        sa.ForeignKeyConstraint(['gender_id'], ['sex.id']),
+        sa.ForeignKeyConstraint(['style_id'], ['style_option.id']),
+        sa.PrimaryKeyConstraint('image_id'),
+    )
+    
+    # 2. 圖片資料版本：匯入有變更時遞增，API 據此重新載入記憶體中的圖片索引
+    op.add_column('lookup_version', sa.Column('catalog_version', sa.BigInteger(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop image_catalog and catalog_version."""
+    
+    op.drop_column('lookup_version', 'catalog_version')
+    op.drop_table('image_catalog')
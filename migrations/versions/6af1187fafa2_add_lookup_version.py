@@ -0,0 +1,40 @@
+"""add_lookup_version
+
+Revision ID: 6af1187fafa2
+Revises: 73dd144f797d
+Create Date: 2026-10-18 08:30:34.998392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6af1187fafa2'
+down_revision: Union[str, Sequence[str], None] = '73dd144f797d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Add lookup_version table for in-memory lookup cache invalidation.
+
+    之後修改查找表（sex / style_option / season_palette / category / image_action / color）
+    資料的 migration，請執行：
+        op.execute("UPDATE lookup_version SET version = version + 1")
+    讓執行中的 API 重新載入快取。
+    """
+    op.create_table(
+        'lookup_version',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.CheckConstraint('id = 1', name='ck_lookup_version_single_row'),
+    )
+    op.execute("INSERT INTO lookup_version (id, version) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop lookup_version table."""
+    op.drop_table('lookup_version')
@@ -0,0 +1,46 @@
+"""add_result_round_image_index
+
+Revision ID: 73dd144f797d
+Revises: 00de5ba60382
+Create Date: 2026-10-18 08:29:57.825256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73dd144f797d'
+down_revision: Union[str, Sequence[str], None] = '00de5ba60382'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Add composite index (round_id, image_id) for batch like/dislike updates."""
+    
+    # CONCURRENTLY 不能在交易中執行，避免建立索引期間鎖住寫入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_result_round_image',
+            'round_recommended_result',
+            ['round_id', 'image_id'],
+            postgresql_concurrently=True,
+        )
+        # (round_id, image_id) 已涵蓋以 round_id 為條件的查詢，移除重複的單欄索引
+        op.drop_index('idx_result_round', table_name='round_recommended_result', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema: Restore single-column round_id index."""
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_result_round',
+            'round_recommended_result',
+            ['round_id'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_result_round_image', table_name='round_recommended_result', postgresql_concurrently=True)
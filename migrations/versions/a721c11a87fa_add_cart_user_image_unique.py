@@ -0,0 +1,51 @@
+"""add_cart_user_image_unique
+
+Revision ID: a721c11a87fa
+Revises: 0801c0a39c91
+Create Date: 2026-10-18 08:46:47.703366
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a721c11a87fa'
+down_revision: Union[str, Sequence[str], None] = '0801c0a39c91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Unique (user_id, image_id) on cart for atomic upsert."""
+    
+    # 1. 移除重複的購物車項目，保留最新一筆（trigger 會同步扣除 users.cart_count）
+    op.execute("""
+        DELETE FROM cart AS c
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, image_id ORDER BY update_at DESC, id DESC
+            ) AS rn
+            FROM cart
+        ) AS d
+        WHERE c.id = d.id AND d.rn > 1
+    """)
+    
+    # 2. 以 CONCURRENTLY 建立唯一索引（不鎖住寫入），再掛成 unique constraint
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_cart_user_image',
+            'cart',
+            ['user_id', 'image_id'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+    op.execute("ALTER TABLE cart ADD CONSTRAINT uq_cart_user_image UNIQUE USING INDEX uq_cart_user_image")
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop unique (user_id, image_id) on cart."""
+    
+    op.drop_constraint('uq_cart_user_image', 'cart', type_='unique')
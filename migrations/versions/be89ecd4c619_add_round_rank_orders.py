@@ -0,0 +1,33 @@
+"""add_round_rank_orders
+
+Revision ID: be89ecd4c619
+Revises: bfb6c4430edc
+Create Date: 2026-10-18 09:19:16.971825
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'be89ecd4c619'
+down_revision: Union[str, Sequence[str], None] = 'bfb6c4430edc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Packed rank_orders array on round."""
+    
+    # packed Round 保存 AI Service 的原始排序順位（過濾後可能不連續，例如 1, 3, 4）
+    # 可為 NULL：既有的 packed Round 讀取時以陣列位置 + 1 作為排序順位
+    op.add_column('round', sa.Column('rank_orders', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop packed rank_orders."""
+    
+    op.drop_column('round', 'rank_orders')
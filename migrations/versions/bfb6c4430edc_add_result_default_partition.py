@@ -0,0 +1,48 @@
+"""add_result_default_partition
+
+Revision ID: bfb6c4430edc
+Revises: 45151ec497e9
+Create Date: 2026-10-18 10:12:41.205817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfb6c4430edc'
+down_revision: Union[str, Sequence[str], None] = '45151ec497e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITION_STORAGE = "fillfactor = 90, autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02"
+
+
+def upgrade() -> None:
+    """Upgrade schema: DEFAULT partition for round_recommended_result."""
+    
+    # 維護腳本未執行、寫入月份沒有 partition 時改寫入 DEFAULT partition，避免 INSERT 失敗；
+    # 之後由 scripts/manage_result_partitions.py 建立該月份 partition 時搬回
+    op.execute(f"""
+        CREATE TABLE round_recommended_result_default PARTITION OF round_recommended_result
+        DEFAULT WITH ({PARTITION_STORAGE})
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop the DEFAULT partition."""
+    
+    # DEFAULT partition 仍有資料時中止（先執行 manage_result_partitions.py 搬到月份 partition）
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM round_recommended_result_default) THEN
+                RAISE EXCEPTION 'round_recommended_result_default is not empty; run scripts/manage_result_partitions.py first';
+            END IF;
+        END
+        $$
+    """)
+    op.drop_table('round_recommended_result_default')
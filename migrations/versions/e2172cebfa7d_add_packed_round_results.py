@@ -0,0 +1,52 @@
+"""add_packed_round_results
+
+Revision ID: e2172cebfa7d
+Revises: 1796072503c5
+Create Date: 2026-10-18 08:57:34.519012
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2172cebfa7d'
+down_revision: Union[str, Sequence[str], None] = '1796072503c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Packed result arrays on round and sparse round_image_action table."""
+    
+    # 1. packed 模式將整輪推薦結果存於 Round 的陣列欄位（依排序順位，NULL 表示結果存於 round_recommended_result）
+    #    只新增可為 NULL 的欄位，不重寫資料表
+    op.add_column('round', sa.Column('image_ids', postgresql.ARRAY(sa.String(length=100)), nullable=True))
+    op.add_column('round', sa.Column('scores', postgresql.ARRAY(sa.REAL()), nullable=True))
+    op.add_column('round', sa.Column('explanation_texts', postgresql.ARRAY(sa.Text()), nullable=True))
+    
+    # 2. 使用者操作（like / dislike / 加入購物車）只記錄有操作的圖片
+    op.create_table(
+        'round_image_action',
+        sa.Column('round_id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.String(length=100), nullable=False),
+        sa.Column('action_type_id', sa.Integer(), nullable=True),
+        sa.Column('dislike_desc', sa.Text(), nullable=True),
+        sa.Column('is_in_cart', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['round_id'], ['round.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['action_type_id'], ['image_action.id']),
+        sa.PrimaryKeyConstraint('round_id', 'image_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop packed result arrays and round_image_action."""
+    
+    op.drop_table('round_image_action')
+    op.drop_column('round', 'explanation_texts')
+    op.drop_column('round', 'scores')
+    op.drop_column('round', 'image_ids')
@@ -0,0 +1,75 @@
+"""
+ColorEngine 微基準測試
+
+以 constants/color.json 的 216 色建立 ColorEngine（不需連線資料庫），
+量測不同批次大小下，最近 k 色查詢與季節色盤比對的每筆查詢延遲（µs）。
+
+用法：
+    python scripts/benchmark_color_engine.py [--repeat 200] [--k 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.color_engine import METRIC_CIE76, METRIC_CIEDE2000, ColorEngine  # noqa: E402
+from app.core.lookups import ColorEntry  # noqa: E402
+
+BATCH_SIZES = (1, 16, 256)
+
+
+def load_engine() -> ColorEngine:
+    color_file = os.path.join(os.path.dirname(__file__), "..", "constants", "color.json")
+    with open(color_file, "r", encoding="utf-8") as f:
+        colors = json.load(f)
+
+    palette_ids = {}
+    entries = []
+    for index, color in enumerate(colors, start=1):
+        palette_id = palette_ids.setdefault(color["season"], len(palette_ids) + 1)
+        entries.append(ColorEntry(index, palette_id, color["id"], color["name"], color["hex"]))
+    return ColorEngine(entries, {palette_id: name for name, palette_id in palette_ids.items()})
+
+
+def random_hex_colors(rng: np.random.Generator, n: int) -> list:
+    return [f"#{value:06X}" for value in rng.integers(0, 0xFFFFFF, size=n)]
+
+
+def bench(fn, repeat: int) -> float:
+    fn()  # 暖身
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="每個情境重複次數")
+    parser.add_argument("--k", type=int, default=5, help="最近顏色數量")
+    args = parser.parse_args()
+
+    engine = load_engine()
+    rng = np.random.default_rng(0)
+    print(f"🎨 ColorEngine: {len(engine.colors)} colors, k={args.k}, repeat={args.repeat}")
+    print(f"{'operation':<18} | {'metric':<10} | {'batch':>5} | {'µs/query':>10} | {'µs/batch':>10}")
+    print("-" * 66)
+
+    for metric in (METRIC_CIE76, METRIC_CIEDE2000):
+        for batch in BATCH_SIZES:
+            hex_colors = random_hex_colors(rng, batch)
+            for name, fn in (
+                ("nearest", lambda: engine.nearest(hex_colors, k=args.k, metric=metric)),
+                ("palette_distances", lambda: engine.palette_distances(hex_colors, metric=metric)),
+            ):
+                per_batch = bench(fn, args.repeat)
+                print(f"{name:<18} | {metric:<10} | {batch:>5} | {per_batch / batch * 1e6:>10.1f} | {per_batch * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
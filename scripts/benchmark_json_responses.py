@@ -0,0 +1,131 @@
+"""
+回應序列化微基準測試
+
+比較 Session / Round / 購物車列表回應的序列化方式（不需連線資料庫）：
+- fastapi：FastAPI 預設流程（依 response_model 重新驗證 → 轉為 dict → JSONResponse）
+- fast：FAST_JSON_RESPONSES 使用的 PydanticJSONResponse（pydantic-core 直接輸出 JSON bytes）
+- orjson：model_dump 後以 orjson 輸出（未安裝 orjson 時略過）
+
+購物車另外比較由 ORM 物件建立回應的方式（逐筆 model_validate / TypeAdapter 一次轉換）。
+
+用法：
+    python scripts/benchmark_json_responses.py [--repeat 500] [--k 100] [--cart-items 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unused")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core.responses import PydanticJSONResponse  # noqa: E402
+from app.schemas.cart import CartItemResponse, CartListResponse  # noqa: E402
+from app.schemas.session import RecommendedImage, RoundCreateResponse, SessionCreateResponse  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def bench(fn, repeat: int) -> float:
+    fn()  # 暖身
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def recommended_images(k: int) -> List[RecommendedImage]:
+    return [
+        RecommendedImage(
+            image_id=f"img_{i:06d}",
+            rank_order=i + 1,
+            score=1.0 - i / k,
+            explanation_text="色調與你的季節色盤相符，低彩度的大地色可以柔和膚色。"
+        )
+        for i in range(k)
+    ]
+
+
+def cart_rows(n: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i, user_id="user_001", image_id=f"img_{i:06d}",
+            link=f"https://shop.example.com/items/{i}", update_at=now
+        )
+        for i in range(n)
+    ]
+
+
+def serializers(model_cls):
+    field = create_model_field("Response", model_cls, mode="serialization")
+
+    def fastapi_default(content):
+        data = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(data).body
+
+    def fast(content):
+        return PydanticJSONResponse(content).body
+
+    result = [("fastapi", fastapi_default), ("fast", fast)]
+    if orjson is not None:
+        result.append(("orjson", lambda content: orjson.dumps(content.model_dump(mode="json"))))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500, help="每個情境重複次數")
+    parser.add_argument("--k", type=int, default=100, help="推薦圖片數量")
+    parser.add_argument("--cart-items", type=int, default=200, help="購物車項目數")
+    args = parser.parse_args()
+
+    images = recommended_images(args.k)
+    rows = cart_rows(args.cart_items)
+    adapter = TypeAdapter(List[CartItemResponse])
+    responses = {
+        "SessionCreateResponse": SessionCreateResponse(session_id=1, round_id=1, recommended_images=images),
+        "RoundCreateResponse": RoundCreateResponse(round_id=2, recommended_images=images),
+        "CartListResponse": CartListResponse(
+            items=adapter.validate_python(rows, from_attributes=True),
+            total_count=len(rows)
+        ),
+    }
+
+    print(f"📦 k={args.k}, cart_items={args.cart_items}, repeat={args.repeat}")
+    print(f"{'schema':<22} | {'serializer':<10} | {'bytes':>7} | {'µs/response':>12} | {'speedup':>7}")
+    print("-" * 70)
+    for name, content in responses.items():
+        baseline = None
+        for serializer, fn in serializers(type(content)):
+            # asyncio.run 的固定開銷不計入 fastapi 流程
+            elapsed = bench(lambda: fn(content), args.repeat)
+            if serializer == "fastapi":
+                elapsed -= bench(lambda: asyncio.run(asyncio.sleep(0)), args.repeat)
+                baseline = elapsed
+            print(f"{name:<22} | {serializer:<10} | {len(fn(content)):>7} | {elapsed * 1e6:>12.1f} | {baseline / elapsed:>6.1f}x")
+
+    print()
+    print(f"{'cart build (ORM → model)':<36} | {'µs/response':>12}")
+    print("-" * 53)
+    for name, fn in (
+        ("model_validate per item", lambda: [CartItemResponse.model_validate(row) for row in rows]),
+        ("TypeAdapter.validate_python", lambda: adapter.validate_python(rows, from_attributes=True)),
+    ):
+        print(f"{name:<36} | {bench(fn, args.repeat) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+比較 RoundRecommendedResult 批次寫入效能
+
+- orm_bulk_save : 舊做法，建立 ORM 物件後 bulk_save_objects（不回傳 ID）
+- core_returning: 目前做法，Core INSERT ... RETURNING（回傳 id / created_at）
+
+所有寫入都在交易中執行並於結束時 rollback，不會留下資料。
+
+用法：
+    python scripts/benchmark_result_insert.py [--iterations 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models import Round, RoundRecommendedResult, Session, User  # noqa: E402
+from app.repositories.session import RoundRecommendedResultRepository  # noqa: E402
+from app.repositories.unit_of_work import unit_of_work  # noqa: E402
+
+K_VALUES = (10, 50, 100)
+
+
+def make_images(k: int) -> list:
+    return [
+        {
+            "image_id": f"df_{i:05d}",
+            "rank_order": i + 1,
+            "score": 1 - i / k,
+            "explanation_text": "完美的調色板匹配，柔和的暖色調與膚色相襯。",
+        }
+        for i in range(k)
+    ]
+
+
+async def orm_bulk_save(db, round_id: int, images: list) -> None:
+    results = [
+        RoundRecommendedResult(
+            round_id=round_id,
+            image_id=img["image_id"],
+            rank_order=img["rank_order"],
+            explanation_text=img.get("explanation_text"),
+        )
+        for img in images
+    ]
+    await db.run_sync(lambda sync_db: sync_db.bulk_save_objects(results))
+
+
+async def core_returning(db, round_id: int, images: list) -> None:
+    await RoundRecommendedResultRepository.bulk_create_results(db, round_id, images)
+
+
+class _Rollback(Exception):
+    """結束 benchmark 時丟出，讓 unit of work rollback 所有寫入"""
+
+
+async def run_benchmark(iterations: int) -> None:
+    async with AsyncSessionLocal() as db:
+        try:
+            # unit of work 內只 flush，兩種做法都不含 commit 成本，最後整筆 rollback
+            async with unit_of_work(db):
+                # 建立暫時的 User / Session / Round
+                db.add(User(id="__bench_user__"))
+                session = Session(user_id="__bench_user__")
+                db.add(session)
+                await db.flush()
+                round_obj = Round(session_id=session.id, selected_palette_ids=[1])
+                db.add(round_obj)
+                await db.flush()
+
+                print(f"{'k':>5} | {'path':<15} | {'rows/sec':>12} | {'ms/batch':>9}")
+                print("-" * 52)
+                for k in K_VALUES:
+                    images = make_images(k)
+                    for name, fn in (("orm_bulk_save", orm_bulk_save), ("core_returning", core_returning)):
+                        await fn(db, round_obj.id, images)  # 暖身
+                        start = time.perf_counter()
+                        for _ in range(iterations):
+                            await fn(db, round_obj.id, images)
+                        elapsed = time.perf_counter() - start
+
+                        rows_per_sec = k * iterations / elapsed
+                        print(f"{k:>5} | {name:<15} | {rows_per_sec:>12,.0f} | {elapsed / iterations * 1000:>9.2f}")
+
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="每個 k 值重複寫入的批次數")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+比較推薦結果兩種儲存格式的空間與延遲
+
+- rows  : 每張圖片一列 round_recommended_result（含 (round_id, image_id) 索引）
+- packed: 整輪結果存於 round 的 image_ids / scores / explanation_texts 陣列，使用者操作另存 round_image_action
+
+每種格式建立一個 Session，寫入 --rounds 個 Round（每輪 --k 張圖片），每輪對前一輪套用 --likes 個 like
+與 --dislikes 個 dislike，並計時：
+- write   : 建立 Round 與推薦結果
+- feedback: apply_feedback（like / dislike）
+- history : 以 get_rounds_with_results 讀取 Session 的前 --history-limit 個 Round
+
+空間以寫入前後相關資料表（含索引與 TOAST）的大小差計算；並列出資料列本身的位元組數。
+所有寫入都在交易中執行並於結束時 rollback，不會留下資料。
+
+用法：
+    python scripts/benchmark_result_storage.py [--rounds 200] [--k 50] [--likes 3] [--dislikes 2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models import Session, User  # noqa: E402
+from app.repositories.session import (  # noqa: E402
+    RESULT_STORAGE_PACKED,
+    RESULT_STORAGE_ROWS,
+    RoundRecommendedResultRepository,
+    RoundRepository,
+)
+from app.repositories.unit_of_work import unit_of_work  # noqa: E402
+
+# 說明文字由片段隨機組合，避免完全相同的文字讓陣列壓縮率失真
+EXPLANATION_PHRASES = (
+    "柔和的暖色調與膚色相襯", "低彩度的大地色系讓整體更協調", "適合日常與通勤穿搭",
+    "冷色調襯托出明亮的膚色", "高對比的配色更有精神", "深色系顯得沉穩俐落",
+    "莫蘭迪色系溫和不搶眼", "與髮色形成自然的呼應", "亮色點綴增加層次感",
+    "中性色容易搭配其他單品", "飽和度適中不顯氣色差", "同色系穿搭拉長比例",
+)
+LIKE_ACTION_ID = 1
+DISLIKE_ACTION_ID = 2
+
+TOTAL_SIZE_SQL = text("""
+    SELECT coalesce(sum(pg_total_relation_size(relid)), 0)
+    FROM (
+        SELECT relid FROM pg_partition_tree('round_recommended_result') WHERE isleaf
+        UNION ALL SELECT 'round'::regclass
+        UNION ALL SELECT 'round_image_action'::regclass
+    ) AS tables
+""")
+
+ROW_BYTES_SQL = {
+    RESULT_STORAGE_ROWS: text("""
+        SELECT
+            (SELECT coalesce(sum(pg_column_size(r.*)), 0) FROM round AS r WHERE r.session_id = :session_id)
+          + (SELECT coalesce(sum(pg_column_size(t.*)), 0)
+             FROM round_recommended_result AS t JOIN round AS r ON r.id = t.round_id
+             WHERE r.session_id = :session_id)
+    """),
+    # 陣列超過約 2KB 時會壓縮或移至 TOAST，pg_column_size 取得的是實際儲存（壓縮後）的大小
+    RESULT_STORAGE_PACKED: text("""
+        SELECT
+            (SELECT coalesce(sum(pg_column_size(r.*)), 0) FROM round AS r WHERE r.session_id = :session_id)
+          + (SELECT coalesce(sum(pg_column_size(a.*)), 0)
+             FROM round_image_action AS a JOIN round AS r ON r.id = a.round_id
+             WHERE r.session_id = :session_id)
+    """),
+}
+
+
+def make_images(round_index: int, k: int) -> list:
+    return [
+        {
+            "image_id": f"df_{round_index:04d}_{i:05d}",
+            "rank_order": i + 1,
+            "score": 1 - i / k,
+            "explanation_text": "，".join(random.sample(EXPLANATION_PHRASES, 4)) + "。",
+        }
+        for i in range(k)
+    ]
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class _Rollback(Exception):
+    """結束 benchmark 時丟出，讓 unit of work rollback 所有寫入"""
+
+
+async def run_layout(db, layout: str, args) -> dict:
+    session = Session(user_id="__bench_user__")
+    db.add(session)
+    await db.flush()
+
+    size_before = await db.scalar(TOTAL_SIZE_SQL)
+    write_ms, feedback_ms = [], []
+    for round_index in range(args.rounds):
+        if round_index:
+            previous = make_images(round_index - 1, args.k)
+            start = time.perf_counter()
+            await RoundRecommendedResultRepository.apply_feedback(
+                db=db,
+                session_id=session.id,
+                like=[img["image_id"] for img in previous[:args.likes]],
+                dislike=[
+                    {"image_id": img["image_id"], "comment": "顏色太亮"}
+                    for img in previous[args.likes:args.likes + args.dislikes]
+                ],
+                like_action_id=LIKE_ACTION_ID,
+                dislike_action_id=DISLIKE_ACTION_ID
+            )
+            feedback_ms.append((time.perf_counter() - start) * 1000)
+
+        images = make_images(round_index, args.k)
+        start = time.perf_counter()
+        if layout == RESULT_STORAGE_PACKED:
+            await RoundRepository.create_round(db, session.id, [1], recommended_images=images)
+        else:
+            round_obj = await RoundRepository.create_round(db, session.id, [1])
+            await RoundRecommendedResultRepository.bulk_create_results(db, round_obj.id, images)
+        write_ms.append((time.perf_counter() - start) * 1000)
+
+    size_after = await db.scalar(TOTAL_SIZE_SQL)
+    row_bytes = await db.scalar(ROW_BYTES_SQL[layout], {"session_id": session.id})
+
+    history_ms = []
+    for _ in range(args.history_iterations):
+        db.expunge_all()
+        start = time.perf_counter()
+        rounds = await RoundRepository.get_rounds_with_results(db, session, args.history_limit)
+        history_ms.append((time.perf_counter() - start) * 1000)
+    assert len(rounds) == min(args.rounds, args.history_limit)
+
+    return {
+        "disk_bytes": size_after - size_before,
+        "row_bytes": row_bytes,
+        "write": write_ms,
+        "feedback": feedback_ms,
+        "history": history_ms,
+    }
+
+
+async def run_benchmark(args) -> None:
+    async with AsyncSessionLocal() as db:
+        try:
+            # unit of work 內只 flush，兩種格式都不含 commit 成本，最後整筆 rollback
+            async with unit_of_work(db):
+                db.add(User(id="__bench_user__"))
+                await db.flush()
+                reports = {
+                    layout: await run_layout(db, layout, args)
+                    for layout in (RESULT_STORAGE_ROWS, RESULT_STORAGE_PACKED)
+                }
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    await async_engine.dispose()
+
+    images = args.rounds * args.k
+    print(f"{args.rounds} rounds x {args.k} images, {args.likes} likes + {args.dislikes} dislikes per round")
+    print()
+    print(f"{'layout':<8} | {'disk (KB)':>10} | {'B/image':>8} | {'row data (KB)':>13} | {'B/image':>8}")
+    print("-" * 60)
+    for layout, report in reports.items():
+        print(
+            f"{layout:<8} | {report['disk_bytes'] / 1024:>10,.0f} | {report['disk_bytes'] / images:>8.1f} | "
+            f"{report['row_bytes'] / 1024:>13,.0f} | {report['row_bytes'] / images:>8.1f}"
+        )
+
+    print()
+    print(f"{'layout':<8} | {'operation':<9} | {'p50 ms':>8} | {'p95 ms':>8} | {'mean ms':>8}")
+    print("-" * 54)
+    for layout, report in reports.items():
+        for operation in ("write", "feedback", "history"):
+            samples = report[operation]
+            if not samples:
+                continue
+            print(
+                f"{layout:<8} | {operation:<9} | {percentile(samples, 0.5):>8.2f} | "
+                f"{percentile(samples, 0.95):>8.2f} | {statistics.fmean(samples):>8.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200, help="每種格式寫入的 Round 數")
+    parser.add_argument("--k", type=int, default=50, help="每輪推薦圖片數")
+    parser.add_argument("--likes", type=int, default=3, help="每輪對前一輪的 like 數")
+    parser.add_argument("--dislikes", type=int, default=2, help="每輪對前一輪的 dislike 數")
+    parser.add_argument("--history-limit", type=int, default=10, help="讀取歷史時每次載入的 Round 數")
+    parser.add_argument("--history-iterations", type=int, default=50, help="讀取歷史的次數")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
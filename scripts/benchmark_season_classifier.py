@@ -0,0 +1,108 @@
+"""
+季節色本地判斷準確度評估
+
+比較色彩分析本地判斷（app/core/season_classifier.py）與 AI Service 的分析結果，
+列出各信心度門檻下本地判斷涵蓋的請求比例，以及其中季節色 / 冷暖調性與 AI Service 相同的比例，
+作為設定 COLOR_ANALYSIS_LOCAL_CONFIDENCE 與啟用 COLOR_ANALYSIS_FAST_PATH 的依據。
+
+輸入為 AI Service /color-analysis 回應的 JSONL（每行一筆，至少包含 skin_color_hex、
+hair_color_hex、eye_color_hex、season_12），可由 --images 指定照片目錄，直接呼叫 AI Service 收集。
+以 constants/color.json 的 216 色建立 ColorEngine（不需連線資料庫）。
+
+用法：
+    python scripts/benchmark_season_classifier.py --file ai_results.jsonl [--target 0.95]
+    python scripts/benchmark_season_classifier.py --images photos/ --ai-url http://localhost:8001 \\
+                                                  --save ai_results.jsonl
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmark_color_engine import load_engine  # noqa: E402
+
+from app.core.ai_client import AIServiceClient  # noqa: E402
+from app.core.season_classifier import agreement_by_threshold, classify_season, undertone_of  # noqa: E402
+
+THRESHOLDS = (0.0, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5)
+REQUIRED_FIELDS = ("skin_color_hex", "hair_color_hex", "eye_color_hex", "season_12")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_results(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def collect_results(image_dir: str, ai_url: str) -> list:
+    """逐張照片呼叫 AI Service 色彩分析"""
+    results = []
+    with httpx.Client(base_url=ai_url, timeout=60.0) as client:
+        for name in sorted(os.listdir(image_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with open(os.path.join(image_dir, name), "rb") as f:
+                image = base64.b64encode(f.read()).decode("ascii")
+            response = client.post(AIServiceClient.ANALYZE_COLOR_PATH, json={"image": image})
+            if response.status_code != 200:
+                print(f"⚠️  {name}: AI Service returned {response.status_code}")
+                continue
+            results.append({"image": name, **response.json()})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="AI Service 色彩分析結果 JSONL")
+    source.add_argument("--images", help="照片目錄（呼叫 AI Service 收集分析結果）")
+    parser.add_argument("--ai-url", default="http://localhost:8001", help="AI Service URL（搭配 --images）")
+    parser.add_argument("--save", help="將收集到的 AI Service 結果寫入 JSONL")
+    parser.add_argument("--target", type=float, default=0.95, help="本地判斷需達到的季節色一致率")
+    args = parser.parse_args()
+
+    results = load_results(args.file) if args.file else collect_results(args.images, args.ai_url)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    samples = [tuple(result[field] for field in REQUIRED_FIELDS) for result in results
+               if all(result.get(field) for field in REQUIRED_FIELDS)]
+    if not samples:
+        print("❌ No usable samples (need skin_color_hex, hair_color_hex, eye_color_hex and season_12)")
+        sys.exit(1)
+
+    engine = load_engine()
+    undertone_matched = {threshold: 0 for threshold in THRESHOLDS}
+    for skin_hex, hair_hex, eye_hex, expected_season in samples:
+        result = classify_season(engine, skin_hex, hair_hex, eye_hex)
+        for threshold in THRESHOLDS:
+            if result.confidence >= threshold and undertone_of(result.season) == undertone_of(expected_season):
+                undertone_matched[threshold] += 1
+
+    print(f"🎨 {len(samples)} samples (skipped {len(results) - len(samples)} incomplete)")
+    print(f"{'threshold':>9} | {'local':>6} | {'coverage':>8} | {'season agree':>12} | {'undertone agree':>15}")
+    print("-" * 63)
+    recommended = None
+    for row in agreement_by_threshold(engine, samples, THRESHOLDS):
+        undertone_agreement = undertone_matched[row.threshold] / row.local if row.local else 0.0
+        print(f"{row.threshold:>9.2f} | {row.local:>6} | {row.coverage:>8.1%} | "
+              f"{row.agreement:>12.1%} | {undertone_agreement:>15.1%}")
+        if recommended is None and row.local and row.agreement >= args.target:
+            recommended = row
+
+    if recommended:
+        print(f"\n✅ COLOR_ANALYSIS_LOCAL_CONFIDENCE={recommended.threshold} reaches {recommended.agreement:.1%} "
+              f"agreement on {recommended.coverage:.1%} of requests")
+    else:
+        print(f"\n❌ No threshold reaches {args.target:.0%} agreement; keep COLOR_ANALYSIS_FAST_PATH=false")
+
+
+if __name__ == "__main__":
+    main()
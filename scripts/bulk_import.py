@@ -0,0 +1,280 @@
+"""
+參考資料批次匯入（COPY + ON CONFLICT upsert）
+
+將 JSON / NDJSON / CSV 檔案以 COPY 串流寫入暫存表，再以單一 INSERT ... SELECT ... ON CONFLICT
+合併到目標資料表：
+- 外鍵由資料庫依名稱 JOIN 解析（例如 season → season_palette.id），不需在程式中維護 ID 對照表；
+  有無法解析的值時整批中止
+- 以唯一鍵 upsert，內容未變更的列不會被改寫，重複執行不會有副作用
+- 同一檔案中重複的鍵以最後一筆為準
+- 整批在單一交易中完成（--dry-run 時最後 rollback，只回報筆數）
+
+檔案格式依副檔名判斷：.json（陣列）、.jsonl / .ndjson（每行一筆，逐行串流）、.csv（第一行為欄位名稱）。
+
+用法：
+    python scripts/bulk_import.py colors [--file constants/color.json] [--dry-run]
+    python scripts/bulk_import.py images --file images.jsonl [--dry-run]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), "..")
+STAGE_TABLE = "_bulk_import_stage"
+ANALYZE_THRESHOLD = 10000  # 變更筆數超過此值時匯入後 ANALYZE，讓查詢計畫反映新資料
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    一種可匯入的參考資料
+
+    fields：(來源欄位, 暫存表欄位, 暫存表型別)；key 同時是暫存表與目標資料表的唯一鍵欄位。
+    columns：(目標欄位, 由暫存表 s 與 joins 計算的 SQL 運算式)。
+    unresolved：找出無法解析外鍵的來源值的 SQL（回傳第一欄為該值），沒有外鍵時為 None。
+    version_column：資料有變更時遞增的 lookup_version 欄位，通知各 worker 重新載入記憶體快取。
+    touch_column：資料有變更時設為 now() 的欄位（不參與是否變更的比較）。
+    """
+    table: str
+    key: str
+    fields: Tuple[Tuple[str, str, str], ...]
+    columns: Tuple[Tuple[str, str], ...]
+    joins: str = ""
+    unresolved: Optional[str] = None
+    default_file: Optional[str] = None
+    version_column: Optional[str] = None
+    touch_column: Optional[str] = None
+
+
+DATASETS = {
+    "colors": Dataset(
+        table="color",
+        key="color_code",
+        fields=(
+            ("id", "color_code", "text"),
+            ("name", "name", "text"),
+            ("hex", "color_hex", "text"),
+            ("season", "season", "text"),
+        ),
+        columns=(
+            ("color_code", "s.color_code"),
+            ("name", "s.name"),
+            ("color_hex", "s.color_hex"),
+            ("season_palette_id", "p.id"),
+        ),
+        joins="JOIN season_palette AS p ON p.name = s.season",
+        unresolved=f"""
+            SELECT DISTINCT s.season FROM {STAGE_TABLE} AS s
+            WHERE NOT EXISTS (SELECT 1 FROM season_palette AS p WHERE p.name = s.season)
+        """,
+        default_file="constants/color.json",
+        version_column="version",
+    ),
+    # AstraDB Image Collection 的 metadata 匯出；分類 / 性別 / 風格可為空，有值時必須存在
+    "images": Dataset(
+        table="image_catalog",
+        key="image_id",
+        fields=(
+            ("image_id", "image_id", "text"),
+            ("category", "category", "text"),
+            ("gender", "gender", "text"),
+            ("style", "style", "text"),
+            ("image_url", "image_url", "text"),
+            ("link", "link", "text"),
+        ),
+        columns=(
+            ("image_id", "s.image_id"),
+            ("category_id", "c.id"),
+            ("gender_id", "g.id"),
+            ("style_id", "o.id"),
+            ("image_url", "s.image_url"),
+            ("link", "s.link"),
+        ),
+        joins="""
+            LEFT JOIN category AS c ON c.name = s.category
+            LEFT JOIN sex AS g ON g.name = s.gender
+            LEFT JOIN style_option AS o ON o.name = s.style
+        """,
+        unresolved=f"""
+            SELECT DISTINCT value FROM {STAGE_TABLE} AS s,
+                LATERAL (VALUES
+                    (s.category, EXISTS (SELECT 1 FROM category AS c WHERE c.name = s.category)),
+                    (s.gender, EXISTS (SELECT 1 FROM sex AS g WHERE g.name = s.gender)),
+                    (s.style, EXISTS (SELECT 1 FROM style_option AS o WHERE o.name = s.style))
+                ) AS refs (value, found)
+            WHERE value IS NOT NULL AND NOT found
+        """,
+        version_column="catalog_version",
+        touch_column="updated_at",
+    ),
+}
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """依副檔名逐筆讀取來源檔案"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            yield from json.load(f)
+
+
+def _copy_value(value) -> str:
+    """轉換為 COPY text 格式的欄位值"""
+    if value is None or value == "":
+        return r"\N"
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class CopyStream:
+    """將逐筆產生的資料列包裝成 COPY FROM STDIN 讀取的檔案物件（不需先把整個檔案轉換在記憶體中）"""
+
+    def __init__(self, records: Iterable[dict], source_fields: List[str]):
+        self._lines = (
+            "\t".join(_copy_value(record.get(field)) for field in source_fields) + "\n"
+            for record in records
+        )
+        self._buffer = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+            self.rows += 1
+        data = "".join(chunks)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def upsert_sql(dataset: Dataset) -> str:
+    """暫存表 → 目標資料表的 upsert（重複鍵取最後一筆，內容相同時不更新），回傳新增與更新筆數"""
+    columns = [column for column, _ in dataset.columns]
+    expressions = ", ".join(expression for _, expression in dataset.columns)
+    updates = [f"{column} = EXCLUDED.{column}" for column in columns if column != dataset.key]
+    if dataset.touch_column:
+        updates.append(f"{dataset.touch_column} = now()")
+    current = ", ".join(f"t.{column}" for column in columns)
+    incoming = ", ".join(f"EXCLUDED.{column}" for column in columns)
+    return f"""
+        WITH upserted AS (
+            INSERT INTO {dataset.table} AS t ({", ".join(columns)})
+            SELECT DISTINCT ON (s.{dataset.key}) {expressions}
+            FROM {STAGE_TABLE} AS s {dataset.joins}
+            ORDER BY s.{dataset.key}, s.line DESC
+            ON CONFLICT ({dataset.key}) DO UPDATE SET {", ".join(updates)}
+            WHERE ({current}) IS DISTINCT FROM ({incoming})
+            RETURNING (t.xmax = 0) AS inserted
+        )
+        SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+    """
+
+
+def import_dataset(conn, dataset: Dataset, path: str) -> dict:
+    """在目前的交易中匯入一個檔案，回傳讀取 / 新增 / 更新 / 未變更筆數"""
+    stage_columns = ", ".join(f"{column} {column_type}" for _, column, column_type in dataset.fields)
+    conn.execute(text(
+        f"CREATE TEMP TABLE {STAGE_TABLE} (line bigint GENERATED ALWAYS AS IDENTITY, {stage_columns}) "
+        "ON COMMIT DROP"
+    ))
+
+    # 1. COPY 串流寫入暫存表
+    stream = CopyStream(read_records(path), [source for source, _, _ in dataset.fields])
+    copy_columns = ", ".join(column for _, column, _ in dataset.fields)
+    with conn.connection.dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {STAGE_TABLE} ({copy_columns}) FROM STDIN", stream)
+    # 暫存表沒有統計資訊，先 ANALYZE 讓 JOIN 與去除重複鍵選擇適合大量資料的計畫
+    conn.execute(text(f"ANALYZE {STAGE_TABLE}"))
+
+    # 2. 檢查唯一鍵與外鍵
+    missing_keys = conn.execute(text(
+        f"SELECT line FROM {STAGE_TABLE} WHERE {dataset.key} IS NULL ORDER BY line LIMIT 10"
+    )).scalars().all()
+    if missing_keys:
+        raise ValueError(f"Missing {dataset.key} on rows {missing_keys}")
+    if dataset.unresolved:
+        unresolved = conn.execute(text(dataset.unresolved + " LIMIT 10")).scalars().all()
+        if unresolved:
+            raise ValueError(f"Unresolved references for {dataset.table}: {unresolved}")
+
+    # 3. 合併到目標資料表
+    inserted, updated = conn.execute(text(upsert_sql(dataset))).one()
+    if dataset.version_column and inserted + updated:
+        conn.execute(text(
+            f"UPDATE lookup_version SET {dataset.version_column} = {dataset.version_column} + 1"
+        ))
+
+    distinct = conn.execute(text(f"SELECT count(DISTINCT {dataset.key}) FROM {STAGE_TABLE}")).scalar_one()
+    return {
+        "read": stream.rows,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": distinct - inserted - updated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=sorted(DATASETS), help="匯入的資料種類")
+    parser.add_argument("--file", help="來源檔案（預設為該資料種類的內建檔案）")
+    parser.add_argument("--dry-run", action="store_true", help="執行匯入後 rollback，只回報筆數")
+    args = parser.parse_args()
+
+    dataset = DATASETS[args.dataset]
+    path = args.file or (dataset.default_file and os.path.join(PROJECT_ROOT, dataset.default_file))
+    if not path:
+        parser.error(f"--file is required for {args.dataset}")
+
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            stats = import_dataset(conn, dataset, path)
+        except ValueError as e:
+            transaction.rollback()
+            print(f"❌ {e}")
+            sys.exit(1)
+        if args.dry_run:
+            transaction.rollback()
+        else:
+            transaction.commit()
+            if stats["inserted"] + stats["updated"] >= ANALYZE_THRESHOLD:
+                conn.execute(text(f"ANALYZE {dataset.table}"))
+                conn.commit()
+    elapsed = time.perf_counter() - start
+
+    print(f"{'🔎 dry run' if args.dry_run else '✅ imported'} {args.dataset} from {path}")
+    print(
+        f"   read {stats['read']:,} | inserted {stats['inserted']:,} | updated {stats['updated']:,} | "
+        f"unchanged {stats['unchanged']:,}"
+    )
+    print(f"   {elapsed:.2f}s ({stats['read'] / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
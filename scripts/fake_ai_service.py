@@ -0,0 +1,168 @@
+"""
+本地 AI Service 替身（負載測試用）
+
+提供 /analyze-color 與 /recommend，回應格式與正式 AI Service 相同，
+延遲依指定的分佈抽樣，不需 GPU、AstraDB 或外部網路。
+
+延遲分佈格式（秒）：
+    const:0.5             固定延遲
+    uniform:0.2:1.0       均勻分佈
+    lognormal:0.5:0.4     對數常態分佈（中位數 0.5 秒，sigma 0.4），模擬長尾
+
+/recommend 的 Accept 含 application/x-ndjson 時逐行串流（每行一張圖片，最後一行 vector_saved），
+總延遲平均分攤在各張圖片之間。
+
+用法：
+    python scripts/fake_ai_service.py [--port 8001] [--recommend-latency lognormal:1.0:0.4] [--error-rate 0.01]
+    # 之後以 AI_SERVICE_URL=http://127.0.0.1:8001 啟動 API
+"""
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PALETTE_SEASONS = (
+    "Light Spring", "Warm Spring", "Bright Spring",
+    "Light Summer", "Cool Summer", "Soft Summer",
+    "Soft Autumn", "Warm Autumn", "Deep Autumn",
+    "Deep Winter", "Cool Winter", "Bright Winter",
+)
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """解析延遲分佈字串，回傳抽樣函式（秒）"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "const" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: median * random.lognormvariate(0.0, sigma)
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+@dataclass
+class FakeAIConfig:
+    analyze_latency: str = "lognormal:0.2:0.3"
+    recommend_latency: str = "lognormal:0.5:0.4"
+    explanation_chars: int = 60     # 每張推薦圖片說明文字的長度
+    palette_size: int = 18
+    error_rate: float = 0.0         # 回傳 503 的比例
+
+
+def create_app(config: FakeAIConfig) -> FastAPI:
+    analyze_latency = parse_latency(config.analyze_latency)
+    recommend_latency = parse_latency(config.recommend_latency)
+    explanation = ("色調與季節色盤相符" * (config.explanation_chars // 9 + 1))[:config.explanation_chars]
+
+    app = FastAPI(title="Fake AI Service")
+    app.state.requests = {"analyze-color": 0, "recommend": 0, "errors": 0}
+
+    def _failed() -> bool:
+        if random.random() < config.error_rate:
+            app.state.requests["errors"] += 1
+            return True
+        return False
+
+    def _image(i: int, k: int) -> dict:
+        return {
+            "image_id": f"df_{random.randrange(100000):05d}_{i}",
+            "rank_order": i + 1,
+            "score": round(1 - i / (k + 1), 4),
+            "explanation_text": explanation,
+        }
+
+    @app.post("/analyze-color")
+    async def analyze_color(request: Request):
+        await request.body()
+        app.state.requests["analyze-color"] += 1
+        await asyncio.sleep(analyze_latency())
+        if _failed():
+            return JSONResponse({"detail": "fake failure"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        season = random.choice(PALETTE_SEASONS)
+        return {
+            "season_12": season,
+            "season_hex": "#DADADA",
+            "season_confidence": round(random.uniform(0.5, 0.95), 3),
+            "undertone": random.choice(("warm", "cool")),
+            "skin_color_hex": "#D4A574",
+            "hair_color_hex": "#4A3728",
+            "eye_color": "brown",
+            "eye_color_hex": "#6B4226",
+            "eye_color_confidence": 0.7,
+            "palette": [
+                {"id": f"fk_{i:02d}", "hex": f"#{random.randrange(0xFFFFFF):06X}", "name": f"Color {i}", "season": season}
+                for i in range(1, config.palette_size + 1)
+            ],
+        }
+
+    @app.post("/recommend")
+    async def recommend(request: Request):
+        body = await request.json()
+        app.state.requests["recommend"] += 1
+        k = int(body.get("k", 50))
+        latency = recommend_latency()
+
+        if "application/x-ndjson" in request.headers.get("accept", ""):
+            async def lines():
+                for i in range(k):
+                    await asyncio.sleep(latency / k)
+                    yield json.dumps(_image(i, k), ensure_ascii=False) + "\n"
+                yield json.dumps({"vector_saved": True}) + "\n"
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        await asyncio.sleep(latency)
+        if _failed():
+            return JSONResponse({"detail": "fake failure"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return {"recommended_images": [_image(i, k) for i in range(k)], "vector_saved": True}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.requests
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeAIConfig()
+    parser.add_argument("--analyze-latency", default=defaults.analyze_latency, help="/analyze-color 延遲分佈")
+    parser.add_argument("--recommend-latency", default=defaults.recommend_latency, help="/recommend 延遲分佈")
+    parser.add_argument("--explanation-chars", type=int, default=defaults.explanation_chars, help="推薦說明文字長度")
+    parser.add_argument("--palette-size", type=int, default=defaults.palette_size, help="色彩分析回傳的調色盤顏色數")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="回傳 503 的比例（0 ~ 1）")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeAIConfig:
+    parse_latency(args.analyze_latency)
+    parse_latency(args.recommend_latency)
+    return FakeAIConfig(
+        analyze_latency=args.analyze_latency,
+        recommend_latency=args.recommend_latency,
+        explanation_chars=args.explanation_chars,
+        palette_size=args.palette_size,
+        error_rate=args.error_rate,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+端到端負載測試
+
+啟動本地 AI Service 替身（scripts/fake_ai_service.py），以 httpx ASGITransport 在同一個 process 中
+驅動實際的 FastAPI App 與資料庫，依序在各併發數下執行：
+
+- color    : POST /api/color-analysis（每次不同圖片，不命中結果快取）
+- session  : POST /api/sessions
+- round    : POST /api/sessions/{id}/rounds（每個 worker 使用自己的 Session）
+- cart_add : POST /api/cart
+- cart_list: GET /api/cart
+
+回報每個情境的 p50 / p95 / p99 延遲、RPS、錯誤數、資料庫連線池使用量（取樣的最大 / 平均使用中連線數）
+與平均每個請求的 SQL 查詢數，並可輸出 JSON 供回歸比較。測試資料建立在專用使用者下，結束時刪除。
+
+需要可連線的 PostgreSQL（DATABASE_URL）且已執行 alembic upgrade head。
+
+用法：
+    python scripts/load_test.py [--scenarios session,round,cart_list] [--concurrency 1,10,50]
+                                [--requests 200] [--k 50] [--recommend-latency lognormal:0.5:0.4]
+                                [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import fake_ai_service  # noqa: E402
+
+SCENARIOS = ("color", "session", "round", "cart_add", "cart_list")
+LOAD_TEST_USER = "load_test_user"
+CART_ITEMS = 200
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_ai(config: "fake_ai_service.FakeAIConfig", port: int):
+    """在背景 thread 啟動 AI Service 替身，回傳 uvicorn Server（設定 should_exit 停止）"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        fake_ai_service.create_app(config), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Fake AI Service failed to start on port {port}")
+        time.sleep(0.05)
+    return server, thread
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class QueryCounter:
+    """以 SQLAlchemy cursor 事件計算執行的 SQL 數量"""
+
+    def __init__(self, engine):
+        self.count = 0
+        from sqlalchemy import event
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+class PoolSampler:
+    """定期取樣連線池使用中的連線數"""
+
+    def __init__(self, pool_status, interval: float = 0.01):
+        self._pool_status = pool_status
+        self._interval = interval
+        self.samples: list = []
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            self.samples.append(self._pool_status()["checked_out"])
+            await asyncio.sleep(self._interval)
+
+
+class Fixtures:
+    """測試資料：專用使用者、每個 worker 一個 Session、預先加入的購物車項目"""
+
+    def __init__(self, palette_ids: list, gender_id: int, style_id: int, k: int):
+        self.palette_ids = palette_ids
+        self.gender_id = gender_id
+        self.style_id = style_id
+        self.k = k
+        self.session_ids: list = []
+
+    def session_body(self) -> dict:
+        return {
+            "user_id": LOAD_TEST_USER,
+            "selected_palette_ids": self.palette_ids,
+            "gender_id": self.gender_id,
+            "style_id": self.style_id,
+            # 每次請求內容不同，避免被合併為同一次 /recommend
+            "user_image": f"load_test/{secrets.token_hex(8)}.jpg",
+            "skin_color_hex": "#D4A574",
+            "hair_color_hex": "#4A3728",
+            "k": self.k,
+        }
+
+    def round_body(self) -> dict:
+        return {
+            "selected_palette_ids": self.palette_ids,
+            "previous_round": [],
+            "user_text": secrets.token_hex(8),
+            "k": self.k,
+        }
+
+
+async def prepare(client, max_concurrency: int, k: int) -> Fixtures:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from app.core.lookups import get_lookups
+    from app.database import AsyncSessionLocal
+    from app.models.user import User
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(pg_insert(User).values(id=LOAD_TEST_USER, user_name="load test").on_conflict_do_nothing())
+        await db.commit()
+
+    lookups = get_lookups()
+    fixtures = Fixtures(
+        palette_ids=sorted(lookups.season_palettes.names)[:2],
+        gender_id=min(lookups.sexes.names),
+        style_id=min(lookups.styles.names),
+        k=k,
+    )
+
+    for _ in range(max_concurrency):
+        response = await client.post("/api/sessions", json=fixtures.session_body())
+        response.raise_for_status()
+        fixtures.session_ids.append(response.json()["session_id"])
+
+    for start in range(0, CART_ITEMS, 100):
+        response = await client.post("/api/cart/batch", json={
+            "user_id": LOAD_TEST_USER,
+            "items": [
+                {"image_id": f"load_test_{i:04d}", "link": f"https://shop.example.com/items/{i}"}
+                for i in range(start, min(start + 100, CART_ITEMS))
+            ],
+        })
+        response.raise_for_status()
+    return fixtures
+
+
+async def cleanup() -> None:
+    from sqlalchemy import delete
+
+    from app.database import AsyncSessionLocal
+    from app.models.user import User
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.id == LOAD_TEST_USER))
+        await db.commit()
+
+
+def make_request(scenario: str, fixtures: Fixtures, worker: int):
+    """回傳 (method, url, kwargs)"""
+    if scenario == "color":
+        image = secrets.token_bytes(3072).hex()
+        return "POST", "/api/color-analysis", {"json": {"image": image}}
+    if scenario == "session":
+        return "POST", "/api/sessions", {"json": fixtures.session_body()}
+    if scenario == "round":
+        session_id = fixtures.session_ids[worker % len(fixtures.session_ids)]
+        return "POST", f"/api/sessions/{session_id}/rounds", {"json": fixtures.round_body()}
+    if scenario == "cart_add":
+        image_id = f"load_test_{secrets.randbelow(CART_ITEMS * 2):04d}"
+        return "POST", "/api/cart", {"json": {"user_id": LOAD_TEST_USER, "image_id": image_id, "link": "https://shop.example.com"}}
+    if scenario == "cart_list":
+        return "GET", "/api/cart", {"params": {"user_id": LOAD_TEST_USER, "limit": 50}}
+    raise ValueError(scenario)
+
+
+async def run_level(client, scenario: str, concurrency: int, total: int, fixtures: Fixtures, queries: QueryCounter) -> dict:
+    from app.database import pool_status
+
+    latencies: list = []
+    statuses: Counter = Counter()
+    remaining = total
+
+    async def worker(worker_id: int) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request(scenario, fixtures, worker_id)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[response.status_code] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    queries_before = queries.count
+    async with PoolSampler(pool_status) as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    errors = sum(n for code, n in statuses.items() if not (isinstance(code, int) and code < 400))
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items(), key=str)},
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(statistics.fmean(latencies) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+        "db_connections": {
+            "max_checked_out": max(sampler.samples, default=0),
+            "avg_checked_out": round(statistics.fmean(sampler.samples), 2) if sampler.samples else 0.0,
+        },
+        "queries_per_request": round((queries.count - queries_before) / len(latencies), 2),
+    }
+
+
+async def run(args, concurrency_levels: list, scenarios: list) -> list:
+    import httpx
+
+    from app.database import async_engine
+    from app.main import app
+
+    queries = QueryCounter(async_engine)
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+            try:
+                fixtures = await prepare(client, max(concurrency_levels), args.k)
+                for scenario in scenarios:
+                    for concurrency in concurrency_levels:
+                        if args.warmup:
+                            await run_level(client, scenario, concurrency, args.warmup, fixtures, queries)
+                        result = await run_level(client, scenario, concurrency, args.requests, fixtures, queries)
+                        results.append(result)
+                        latency = result["latency_ms"]
+                        print(
+                            f"{scenario:<10} | {concurrency:>4} | {result['requests']:>6} | {result['errors']:>5} | "
+                            f"{result['rps']:>8.1f} | {latency['p50']:>8.1f} | {latency['p95']:>8.1f} | {latency['p99']:>8.1f} | "
+                            f"{result['db_connections']['max_checked_out']:>7} | {result['queries_per_request']:>7.2f}",
+                            flush=True,
+                        )
+            finally:
+                if not args.keep_data:
+                    await cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗號分隔，可選 {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,10,50", help="逗號分隔的併發數")
+    parser.add_argument("--requests", type=int, default=200, help="每個情境、每個併發數的請求數")
+    parser.add_argument("--warmup", type=int, default=10, help="每輪正式量測前的暖身請求數")
+    parser.add_argument("--k", type=int, default=50, help="推薦圖片數量")
+    parser.add_argument("--ai-port", type=int, default=0, help="AI Service 替身的 port（0 = 自動選擇）")
+    parser.add_argument("--keep-data", action="store_true", help="結束時保留測試資料")
+    parser.add_argument("--output", help="將結果寫入 JSON 檔")
+    fake_ai_service.add_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+
+    # AI_SERVICE_URL 需在載入 app 設定前指定
+    fake_ai_config = fake_ai_service.config_from_args(args)
+    ai_port = args.ai_port or free_port()
+    os.environ["AI_SERVICE_URL"] = f"http://127.0.0.1:{ai_port}"
+    server, thread = start_fake_ai(fake_ai_config, ai_port)
+
+    from app.config import get_settings
+    settings = get_settings()
+
+    print(f"🚀 scenarios={','.join(scenarios)} concurrency={args.concurrency} requests={args.requests} k={args.k}")
+    print(f"   AI latency: analyze={args.analyze_latency} recommend={args.recommend_latency} error_rate={args.error_rate}")
+    print(f"   DB pool: {settings.DB_POOL_SIZE} + {settings.DB_MAX_OVERFLOW} overflow, persist mode={settings.RESULT_PERSIST_MODE}")
+    print(f"{'scenario':<10} | {'conc':>4} | {'reqs':>6} | {'errs':>5} | {'rps':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'db max':>7} | {'q/req':>7}")
+    print("-" * 100)
+    try:
+        results = asyncio.run(run(args, concurrency_levels, scenarios))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "config": {
+                "k": args.k,
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "fake_ai": vars(fake_ai_config),
+                "db_pool_size": settings.DB_POOL_SIZE,
+                "db_max_overflow": settings.DB_MAX_OVERFLOW,
+                "result_persist_mode": settings.RESULT_PERSIST_MODE,
+                "fast_json_responses": settings.FAST_JSON_RESPONSES,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
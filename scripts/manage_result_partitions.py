@@ -0,0 +1,186 @@
+"""
+round_recommended_result 月份 partition 維護
+
+- 預先建立本月起 --premake 個月的 partition（寫入的月份沒有 partition 時會寫入 DEFAULT partition；
+  之後建立該月份 partition 時，將這些資料從 DEFAULT partition 搬回）
+- 超過保留期限（--retain-months）的 partition：可先匯出為 CSV.gz（--archive-dir），
+  再以 DETACH PARTITION CONCURRENTLY 分離（不鎖住寫入），最後刪除（--detach-only 時保留為獨立資料表）
+
+建議每天由 cron / Kubernetes CronJob 執行一次，重複執行不會有副作用。
+
+用法：
+    python scripts/manage_result_partitions.py [--premake 3] [--retain-months 12]
+                                               [--archive-dir ./archive] [--detach-only] [--dry-run]
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+
+PARENT_TABLE = "round_recommended_result"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# 與 migration 相同：保留頁面空間給 like / dislike 的 HOT update，並讓 autovacuum 及早處理當月 partition
+PARTITION_STORAGE = "fillfactor = 90, autovacuum_vacuum_scale_factor = 0.02, autovacuum_analyze_scale_factor = 0.02"
+BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    lower: datetime
+    upper: datetime
+
+
+def add_months(month_start: datetime, months: int) -> datetime:
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def current_month() -> datetime:
+    now = datetime.now(timezone.utc)
+    return datetime(now.year, now.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month_start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month_start:%Y_%m}"
+
+
+def list_partitions(conn) -> List[Partition]:
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+        ORDER BY c.relname
+    """), {"parent": PARENT_TABLE}).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_PATTERN.search(bound or "")
+        if not match:
+            continue
+        lower, upper = (datetime.fromisoformat(value).astimezone(timezone.utc) for value in match.groups())
+        partitions.append(Partition(name, lower, upper))
+    return partitions
+
+
+def default_rows(conn) -> List[Tuple[datetime, int]]:
+    """DEFAULT partition 中各月份（UTC）的資料筆數"""
+    rows = conn.execute(text(f"""
+        SELECT date_trunc('month', created_at AT TIME ZONE 'UTC') AS month, count(*)
+        FROM {DEFAULT_PARTITION}
+        GROUP BY 1
+        ORDER BY 1
+    """)).all()
+    return [(month.replace(tzinfo=timezone.utc), count) for month, count in rows]
+
+
+def create_partition(conn, lower: datetime, pending_rows: int) -> None:
+    name = partition_name(lower)
+    bound = f"FROM ('{lower.isoformat()}') TO ('{add_months(lower, 1).isoformat()}')"
+    if not pending_rows:
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} FOR VALUES {bound} '
+            f"WITH ({PARTITION_STORAGE})"
+        ))
+        return
+
+    # DEFAULT partition 已有此月份的資料時無法直接建立 partition：在同一交易中建立獨立資料表、
+    # 搬移資料後再 ATTACH（期間此月份的寫入會等待）
+    with engine.begin() as tx:
+        tx.execute(text(
+            f'CREATE TABLE "{name}" (LIKE {PARENT_TABLE} INCLUDING DEFAULTS) WITH ({PARTITION_STORAGE})'
+        ))
+        tx.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :lower AND created_at < :upper
+                RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+        """), {"lower": lower, "upper": add_months(lower, 1)})
+        tx.execute(text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{name}" FOR VALUES {bound}'))
+
+
+def premake(conn, months: int, dry_run: bool) -> None:
+    existing = {p.lower for p in list_partitions(conn)}
+    pending = dict(default_rows(conn))
+    start = current_month()
+    # 當月之前漏建的月份（維護腳本停止執行期間寫入 DEFAULT partition 的資料）也一併建立
+    months_to_create = sorted({month for month in pending if month < start} | {
+        add_months(start, offset) for offset in range(months + 1)
+    })
+    for lower in months_to_create:
+        if lower in existing:
+            continue
+        name = partition_name(lower)
+        pending_rows = pending.get(lower, 0)
+        moved = f", move {pending_rows:,} rows from {DEFAULT_PARTITION}" if pending_rows else ""
+        print(f"➕ create {name} [{lower:%Y-%m-%d}, {add_months(lower, 1):%Y-%m-%d}){moved}")
+        if not dry_run:
+            create_partition(conn, lower, pending_rows)
+
+
+def archive(conn, partition: Partition, archive_dir: str) -> str:
+    """以 COPY 將 partition 匯出為 CSV.gz，回傳檔案路徑"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition.name}.csv.gz")
+    tmp_path = path + ".tmp"
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cursor, gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        cursor.copy_expert(f'COPY "{partition.name}" TO STDOUT WITH (FORMAT csv, HEADER)', f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def expire(conn, retain_months: int, archive_dir: str, detach_only: bool, dry_run: bool) -> None:
+    cutoff = add_months(current_month(), -retain_months)
+    for partition in list_partitions(conn):
+        if partition.upper > cutoff:
+            continue
+
+        print(f"🗄️  expire {partition.name} [{partition.lower:%Y-%m-%d}, {partition.upper:%Y-%m-%d})")
+        if dry_run:
+            continue
+        if archive_dir:
+            print(f"   archived to {archive(conn, partition, archive_dir)}")
+        # DETACH ... CONCURRENTLY 不能在交易中執行；只短暫取得 SHARE UPDATE EXCLUSIVE lock，不阻擋寫入
+        conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}" CONCURRENTLY'))
+        if detach_only:
+            print("   detached (kept as a standalone table)")
+        else:
+            conn.execute(text(f'DROP TABLE "{partition.name}"'))
+            print("   dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--premake", type=int, default=3, help="預先建立本月之後幾個月的 partition")
+    parser.add_argument("--retain-months", type=int, default=12, help="保留最近幾個完整月份（0 = 不移除）")
+    parser.add_argument("--archive-dir", help="移除前將 partition 匯出為 CSV.gz 的目錄")
+    parser.add_argument("--detach-only", action="store_true", help="只分離不刪除（保留為獨立資料表）")
+    parser.add_argument("--dry-run", action="store_true", help="只列出將執行的動作")
+    args = parser.parse_args()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        premake(conn, args.premake, args.dry_run)
+        if args.retain_months > 0:
+            expire(conn, args.retain_months, args.archive_dir, args.detach_only, args.dry_run)
+
+        print(f"📊 {PARENT_TABLE} partitions:")
+        for partition in list_partitions(conn):
+            print(f"   {partition.name:<40} [{partition.lower:%Y-%m-%d}, {partition.upper:%Y-%m-%d})")
+        for month, count in default_rows(conn):
+            print(f"⚠️  {DEFAULT_PARTITION} holds {count:,} rows for {month:%Y-%m}")
+
+
+if __name__ == "__main__":
+    main()
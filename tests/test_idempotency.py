@@ -0,0 +1,239 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core.ai_client import get_ai_client
+from app.core.idempotency import IdempotencyStore
+from app.core.resilience import CircuitBreaker
+from app.core.single_flight import SingleFlight, fingerprint
+from app.routers import sessions
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """每個測試使用獨立的 Idempotency-Key 保存與 single-flight"""
+    store = IdempotencyStore(max_entries=100, ttl=None)
+    monkeypatch.setattr(sessions, "idempotency_store", store)
+    monkeypatch.setattr(sessions, "recommend_flights", SingleFlight())
+    return store
+
+
+# ---- IdempotencyStore ----
+
+def test_same_key_and_request_replays_stored_response():
+    store = IdempotencyStore(max_entries=10, ttl=None)
+    assert store.get("user:a", "key-1", "fp") is None
+
+    store.set("user:a", "key-1", "fp", {"session_id": 1})
+    assert store.get("user:a", "key-1", "fp") == {"session_id": 1}
+    assert store.stats() == {"keys": 1, "replays": 1}
+
+
+def test_same_key_with_different_request_is_conflict():
+    store = IdempotencyStore(max_entries=10, ttl=None)
+    store.set("user:a", "key-1", "fp", {"session_id": 1})
+
+    with pytest.raises(HTTPException) as exc_info:
+        store.get("user:a", "key-1", "other-fp")
+    assert exc_info.value.status_code == 409
+    assert store.replays == 0
+
+
+def test_keys_are_scoped():
+    store = IdempotencyStore(max_entries=10, ttl=None)
+    store.set("user:a", "key-1", "fp", {"session_id": 1})
+    # 不同使用者使用相同 key 互不影響（也不會 409）
+    assert store.get("user:b", "key-1", "other-fp") is None
+
+
+# ---- _run_once ----
+
+async def test_run_once_replays_with_header(store):
+    calls = 0
+
+    async def create():
+        nonlocal calls
+        calls += 1
+        return {"session_id": calls}
+
+    first = await sessions._run_once("user:a", "fp", "key-1", Response(), create)
+    response = Response()
+    replayed = await sessions._run_once("user:a", "fp", "key-1", response, create)
+
+    assert replayed == first == {"session_id": 1}
+    assert calls == 1
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+async def test_run_once_reused_key_with_different_body_is_conflict(store):
+    async def create():
+        return {"session_id": 1}
+
+    await sessions._run_once("user:a", "fp", "key-1", Response(), create)
+    with pytest.raises(HTTPException) as exc_info:
+        await sessions._run_once("user:a", "other-fp", "key-1", Response(), create)
+    assert exc_info.value.status_code == 409
+
+
+async def test_run_once_failure_is_not_stored(store):
+    async def fail():
+        raise HTTPException(status_code=503, detail="AI Service is unavailable")
+
+    async def create():
+        return {"session_id": 1}
+
+    with pytest.raises(HTTPException):
+        await sessions._run_once("user:a", "fp", "key-1", Response(), fail)
+    # 失敗的請求可用同一個 key 重試
+    assert await sessions._run_once("user:a", "fp", "key-1", Response(), create) == {"session_id": 1}
+
+
+async def test_run_once_coalesces_concurrent_duplicates(store):
+    calls = 0
+    release = asyncio.Event()
+
+    async def create():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"session_id": calls}
+
+    duplicates = [
+        asyncio.create_task(sessions._run_once("user:a", "fp", key, Response(), create))
+        for key in ("key-1", "key-1", None)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*duplicates) == [{"session_id": 1}] * 3
+    assert calls == 1
+
+
+# ---- API：Idempotency-Key 標頭 ----
+
+class FakeAIClient:
+    """回傳固定推薦結果的 AI Service"""
+
+    def __init__(self):
+        self.calls = 0
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=0.5, min_requests=10, window=10, open_seconds=30.0, half_open_calls=1
+        )
+
+    async def recommend(self, payload: dict) -> dict:
+        self.calls += 1
+        return {
+            "recommended_images": [
+                {"image_id": f"df_{i:05d}", "rank_order": i + 1, "score": 1 - i / 100, "explanation_text": "pytest"}
+                for i in range(payload["k"])
+            ],
+            "vector_saved": True,
+        }
+
+
+@pytest.fixture
+def ai_client(client):
+    from app.main import app
+
+    ai_client = FakeAIClient()
+    app.dependency_overrides[get_ai_client] = lambda: ai_client
+    yield ai_client
+    app.dependency_overrides.pop(get_ai_client, None)
+
+
+def _session_body(user_id: str, **overrides) -> dict:
+    body = {
+        "user_id": user_id,
+        "selected_palette_ids": [1, 2],
+        "gender_id": 1,
+        "style_id": 1,
+        "user_image": "uploads/pytest.jpg",
+        "skin_color_hex": "#D4A574",
+        "hair_color_hex": "#4A3728",
+        "k": 5,
+    }
+    body.update(overrides)
+    return body
+
+
+async def test_create_session_with_idempotency_key(store, user_id, client, ai_client):
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+
+    first = await client.post("/api/sessions", json=_session_body(user_id), headers=headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    replayed = await client.post("/api/sessions", json=_session_body(user_id), headers=headers)
+    assert replayed.status_code == 201
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["session_id"] == first.json()["session_id"]
+    assert ai_client.calls == 1
+
+    conflict = await client.post("/api/sessions", json=_session_body(user_id, k=3), headers=headers)
+    assert conflict.status_code == 409
+    assert ai_client.calls == 1
+
+
+def _round_body(**overrides) -> dict:
+    body = {"selected_palette_ids": [1], "like": ["df_00000"], "previous_round": ["df_00000", "df_00001"], "k": 5}
+    body.update(overrides)
+    return body
+
+
+async def test_replay_while_circuit_is_open(store, user_id, client, ai_client):
+    session_headers = {"Idempotency-Key": uuid.uuid4().hex}
+    round_headers = {"Idempotency-Key": uuid.uuid4().hex}
+    first_session = await client.post("/api/sessions", json=_session_body(user_id), headers=session_headers)
+    assert first_session.status_code == 201
+    session_id = first_session.json()["session_id"]
+    first_round = await client.post(f"/api/sessions/{session_id}/rounds", json=_round_body(), headers=round_headers)
+    assert first_round.status_code == 201
+
+    for _ in range(ai_client.circuit_breaker.min_requests):
+        ai_client.circuit_breaker.record_failure()
+
+    # 斷路器開啟：新請求回傳 503，已保存的回應照常重送
+    rejected = await client.post("/api/sessions", json=_session_body(user_id, k=3))
+    assert rejected.status_code == 503
+    rejected = await client.post(f"/api/sessions/{session_id}/rounds", json=_round_body(k=3))
+    assert rejected.status_code == 503
+
+    replayed = await client.post("/api/sessions", json=_session_body(user_id), headers=session_headers)
+    assert replayed.status_code == 201
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["session_id"] == session_id
+
+    replayed = await client.post(f"/api/sessions/{session_id}/rounds", json=_round_body(), headers=round_headers)
+    assert replayed.status_code == 201
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["round_id"] == first_round.json()["round_id"]
+    assert ai_client.calls == 2
+
+
+@pytest.mark.parametrize("stream", ["ndjson", "sse"])
+async def test_stream_rejects_idempotency_key(store, user_id, client, ai_client, stream):
+    session = await client.post(
+        "/api/sessions",
+        params={"stream": stream},
+        json=_session_body(user_id),
+        headers={"Idempotency-Key": uuid.uuid4().hex}
+    )
+    assert session.status_code == 400
+
+    round_response = await client.post(
+        "/api/sessions/1/rounds",
+        params={"stream": stream},
+        json=_round_body(),
+        headers={"Idempotency-Key": uuid.uuid4().hex}
+    )
+    assert round_response.status_code == 400
+    assert ai_client.calls == 0
+
+
+def test_request_fingerprint_covers_body():
+    assert fingerprint(_session_body("u")) == fingerprint(_session_body("u"))
+    assert fingerprint(_session_body("u")) != fingerprint(_session_body("u", k=3))
@@ -0,0 +1,348 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.core import resilience
+from app.core.ai_client import AIServiceClient
+from app.core.resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    AIMDLimiter,
+    AIServiceUnavailable,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimitExceeded,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # 只替換 resilience 模組看到的 time，event loop 仍使用真實時間
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    options = dict(failure_threshold=0.5, min_requests=4, window=10, open_seconds=30.0, half_open_calls=1)
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def _limiter(**overrides) -> AIMDLimiter:
+    options = dict(initial_limit=10, min_limit=2, max_limit=20, latency_target=1.0, queue_timeout=0.05)
+    options.update(overrides)
+    return AIMDLimiter(**options)
+
+
+# ---- CircuitBreaker ----
+
+def test_breaker_stays_closed_until_min_requests(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.times_opened == 1
+
+
+def test_breaker_opens_exactly_at_failure_threshold(clock):
+    breaker = _breaker()
+    for succeeded in (True, True, False):
+        breaker.record_success() if succeeded else breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.record_failure()  # 2 / 4 = 0.5
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_breaker_below_threshold_stays_closed(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_success()
+    breaker.record_failure()  # 1 / 4 = 0.25
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_open_breaker_rejects_until_open_seconds(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.advance(10)
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after == pytest.approx(20)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.rejected == 1
+
+    clock.advance(20)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+
+def _half_open_breaker(clock, **overrides) -> CircuitBreaker:
+    breaker = _breaker(**overrides)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.advance(breaker.open_seconds)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    return breaker
+
+
+def test_half_open_limits_probes(clock):
+    breaker = _half_open_breaker(clock, half_open_calls=2)
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # check() 不佔用試探名額，也不因半開而拒絕
+    breaker.check()
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = _half_open_breaker(clock)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.snapshot()["window_requests"] == 1
+    breaker.before_call()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = _half_open_breaker(clock)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_cancelled_probe_returns_slot(clock):
+    breaker = _half_open_breaker(clock)
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_cancelled()
+    breaker.before_call()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+
+# ---- AIMDLimiter ----
+
+@pytest.mark.anyio
+async def test_limiter_additive_increase(clock):
+    limiter = _limiter()
+    for _ in range(10):
+        await limiter.acquire()
+        limiter.release(latency=0.1, succeeded=True)
+    # 每次成功 +1/limit，約一輪（limit 次）增加 1
+    assert limiter.limit == 10
+    assert limiter._limit == pytest.approx(10.95, abs=0.01)
+    await limiter.acquire()
+    limiter.release(latency=0.1, succeeded=True)
+    assert limiter.limit == 11
+
+
+@pytest.mark.anyio
+async def test_limiter_increase_capped_at_max(clock):
+    limiter = _limiter(initial_limit=20)
+    for _ in range(50):
+        await limiter.acquire()
+        limiter.release(latency=0.1, succeeded=True)
+    assert limiter.limit == 20
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("succeeded, latency", [(False, 0.1), (True, 5.0)], ids=["failure", "slow"])
+async def test_limiter_multiplicative_decrease(clock, succeeded, latency):
+    limiter = _limiter()
+    await limiter.acquire()
+    limiter.release(latency=latency, succeeded=succeeded)
+    assert limiter.limit == 5
+
+
+@pytest.mark.anyio
+async def test_limiter_decreases_once_per_latency_period(clock):
+    limiter = _limiter(initial_limit=16)
+    for _ in range(3):
+        await limiter.acquire()
+    for _ in range(3):
+        limiter.release(latency=2.0, succeeded=False)
+    assert limiter.limit == 8
+
+    clock.advance(2.0)
+    await limiter.acquire()
+    limiter.release(latency=2.0, succeeded=False)
+    assert limiter.limit == 4
+
+    for _ in range(3):
+        clock.advance(2.0)
+        await limiter.acquire()
+        limiter.release(latency=2.0, succeeded=False)
+    assert limiter.limit == 2
+
+
+@pytest.mark.anyio
+async def test_limiter_unknown_result_does_not_adjust(clock):
+    limiter = _limiter()
+    await limiter.acquire()
+    limiter.release(latency=5.0, succeeded=None)
+    assert limiter.limit == 10
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_limiter_queue_timeout_raises(clock):
+    limiter = _limiter(initial_limit=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    assert limiter.saturated
+
+    with pytest.raises(ConcurrencyLimitExceeded) as exc_info:
+        await limiter.acquire()
+    assert isinstance(exc_info.value, AIServiceUnavailable)
+    assert exc_info.value.retry_after >= 1.0
+    assert limiter.rejected == 1
+    assert limiter.snapshot()["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_limiter_hands_slot_to_waiter(clock):
+    limiter = _limiter(initial_limit=2, queue_timeout=1.0)
+    await limiter.acquire()
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release(latency=0.1, succeeded=True)
+    await waiter
+    assert limiter.in_flight == 2
+
+
+@pytest.mark.anyio
+async def test_limiter_cancelled_waiter_does_not_leak_slot(clock):
+    limiter = _limiter(initial_limit=2, queue_timeout=1.0)
+    await limiter.acquire()
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release(latency=0.1, succeeded=None)
+    limiter.release(latency=0.1, succeeded=None)
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()["queued"] == 0
+
+
+# ---- AIServiceClient：斷路器與併發上限的整合 ----
+
+def _ai_client(monkeypatch, handler, **settings) -> AIServiceClient:
+    options = get_settings().model_copy(update={
+        "AI_SERVICE_URL": "http://ai-service.test",
+        "AI_RECOMMEND_CONCURRENCY_INITIAL": 10,
+        "AI_RECOMMEND_CONCURRENCY_MIN": 1,
+        "AI_RECOMMEND_QUEUE_TIMEOUT": 0.05,
+        **settings,
+    })
+    client = AIServiceClient(options)
+    monkeypatch.setattr(client, "_client", httpx.AsyncClient(
+        base_url=options.AI_SERVICE_URL, transport=httpx.MockTransport(handler)
+    ))
+    return client
+
+
+def _recommend_limiter(client: AIServiceClient) -> AIMDLimiter:
+    return client._limiters[AIServiceClient.RECOMMEND_PATH]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("outcome", ["server_error", "timeout"])
+async def test_client_decreases_limit_on_5xx_or_timeout(monkeypatch, outcome):
+    def handler(request):
+        if outcome == "timeout":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(503, json={"detail": "overloaded"})
+
+    client = _ai_client(monkeypatch, handler)
+    with pytest.raises((httpx.HTTPStatusError, httpx.ReadTimeout)):
+        await client.recommend({"k": 1})
+
+    assert _recommend_limiter(client).limit == 5
+    assert _recommend_limiter(client).in_flight == 0
+    assert client.circuit_breaker.snapshot()["failure_rate"] == 1.0
+
+
+@pytest.mark.anyio
+async def test_client_4xx_is_not_a_service_failure(monkeypatch):
+    client = _ai_client(monkeypatch, lambda request: httpx.Response(422, json={"detail": "bad request"}))
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.recommend({"k": 1})
+
+    assert _recommend_limiter(client).limit == 10
+    assert client.circuit_breaker.snapshot()["failure_rate"] == 0.0
+
+
+@pytest.mark.anyio
+async def test_client_releases_slot_when_cancelled(monkeypatch):
+    started = asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        await asyncio.sleep(3600)
+
+    client = _ai_client(monkeypatch, handler)
+    call = asyncio.create_task(client.recommend({"k": 1}))
+    await started.wait()
+    assert _recommend_limiter(client).in_flight == 1
+
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert _recommend_limiter(client).in_flight == 0
+    assert _recommend_limiter(client).limit == 10
+    assert client.circuit_breaker.snapshot()["window_requests"] == 0
+
+
+@pytest.mark.anyio
+async def test_client_queue_timeout_is_unavailable(monkeypatch):
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json={"recommended_images": []})
+
+    client = _ai_client(monkeypatch, handler, AI_RECOMMEND_CONCURRENCY_INITIAL=1)
+    first = asyncio.create_task(client.recommend({"k": 1}))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AIServiceUnavailable):
+        await client.recommend({"k": 1})
+
+    release.set()
+    assert await first == {"recommended_images": []}
+    assert _recommend_limiter(client).in_flight == 0
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from app.config import Settings
+from app.core import lookups
+from app.core.color_engine import get_color_engine
+from app.core.season_classifier import agreement_by_threshold, classify_season
+from app.routers import color_analysis
+from app.schemas.color_analysis import ColorAnalysisRequest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def registry(db):
+    return await lookups.load_registry(db)
+
+
+def _jitter(rng: random.Random, hex_color: str, amount: int) -> str:
+    channels = (int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+    return "#" + "".join(f"{min(max(c + rng.randint(-amount, amount), 0), 255):02X}" for c in channels)
+
+
+def _palette_samples(registry, per_season: int = 20, jitter: int = 16) -> list:
+    """
+    膚色、髮色、眼睛顏色取自同一個季節色盤的樣本（標記為該季節色）
+
+    每個色碼的 RGB 各加上 ±jitter 的偏移，避免完全落在色盤上（距離為 0、信心度恆為 1）。
+    """
+    rng = random.Random(0)
+    samples = []
+    for palette_id, colors in registry.palette_colors.items():
+        season = registry.season_palettes.names[palette_id]
+        hex_colors = [color.color_hex for color in colors]
+        for _ in range(per_season):
+            samples.append((*(_jitter(rng, rng.choice(hex_colors), jitter) for _ in range(3)), season))
+    return samples
+
+
+def _request(registry, **overrides) -> ColorAnalysisRequest:
+    colors = registry.palette_colors[min(registry.palette_colors)]
+    options = dict(
+        image="data:image/jpeg;base64,AAAA",
+        skin_color_hex=colors[0].color_hex,
+        hair_color_hex=colors[1].color_hex,
+        eye_color_hex=colors[2].color_hex,
+    )
+    options.update(overrides)
+    return ColorAnalysisRequest(**options)
+
+
+def test_fast_path_is_disabled_by_default():
+    # 本地判斷與 AI Service 的一致率需先以 scripts/benchmark_season_classifier.py 驗證
+    assert Settings.model_fields["COLOR_ANALYSIS_FAST_PATH"].default is False
+
+
+async def test_local_result_does_not_claim_eye_analysis(registry):
+    request = _request(registry)
+    expected = classify_season(
+        get_color_engine(registry), request.skin_color_hex, request.hair_color_hex, request.eye_color_hex
+    )
+
+    response = color_analysis._classify_locally(request, registry)
+    assert response.season_12 == expected.season
+    assert response.season_confidence == expected.confidence
+    assert response.eye_color is None
+    assert response.eye_color_confidence is None
+
+    response = color_analysis._classify_locally(_request(registry, eye_color="brown"), registry)
+    assert response.eye_color == "brown"
+    assert response.eye_color_confidence is None
+
+
+async def test_low_confidence_falls_back_to_ai(registry, monkeypatch):
+    monkeypatch.setattr(color_analysis.settings, "COLOR_ANALYSIS_LOCAL_CONFIDENCE", 1.01)
+    assert color_analysis._classify_locally(_request(registry), registry) is None
+
+
+async def test_agreement_counts_local_and_matched(registry):
+    samples = _palette_samples(registry, per_season=1, jitter=0)
+    expected = [
+        classify_season(get_color_engine(registry), *sample[:3]) for sample in samples
+    ]
+    # 把第一筆的 AI 結果改成其他季節色，模擬判斷不一致
+    other_season = next(season for *_, season in samples if season != expected[0].season)
+    samples[0] = (*samples[0][:3], other_season)
+
+    [everything, strict] = agreement_by_threshold(get_color_engine(registry), samples, [0.0, 1.01])
+    assert (everything.samples, everything.local) == (len(samples), len(samples))
+    assert everything.matched == sum(result.season == season for result, (*_, season) in zip(expected, samples))
+    assert everything.matched < everything.local
+    assert (strict.local, strict.coverage, strict.agreement) == (0, 0.0, 0.0)
+
+
+async def test_palette_samples_agree_at_configured_threshold(registry):
+    """
+    下限檢查：三個色碼都來自同一個色盤時，高於門檻的本地判斷應幾乎都回到該色盤
+
+    這不取代與 AI Service 實際結果的比較（scripts/benchmark_season_classifier.py），
+    只防止門檻或距離權重的修改讓本地判斷在最容易的情況下也出錯。
+    """
+    threshold = Settings.model_fields["COLOR_ANALYSIS_LOCAL_CONFIDENCE"].default
+    [unfiltered, row] = agreement_by_threshold(
+        get_color_engine(registry), _palette_samples(registry), [0.0, threshold]
+    )
+    assert row.coverage >= 0.5, row
+    assert row.agreement >= 0.95, row
+    assert row.agreement >= unfiltered.agreement, (unfiltered, row)
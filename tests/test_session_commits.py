@@ -0,0 +1,123 @@
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core import lookups
+from app.core.image_catalog import get_image_catalog
+from app.core.write_behind import ResultWriteBehind
+from app.database import AsyncSessionLocal
+from app.routers.sessions import _create_round, _create_session
+from app.schemas.session import RoundCreateRequest, SessionCreateRequest
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeAIClient:
+    """回傳固定推薦結果的 AI Service（error 不為 None 時丟出該例外）"""
+
+    def __init__(self, error: Optional[Exception] = None, vector_saved: bool = True):
+        self.error = error
+        self.vector_saved = vector_saved
+
+    async def recommend(self, payload: dict) -> dict:
+        if self.error:
+            raise self.error
+        return {
+            "recommended_images": [
+                {"image_id": f"df_{i:05d}", "rank_order": i + 1, "score": 1 - i / 100, "explanation_text": "pytest"}
+                for i in range(payload["k"])
+            ],
+            "vector_saved": self.vector_saved,
+        }
+
+
+def _session_request(user_id: str) -> SessionCreateRequest:
+    return SessionCreateRequest(
+        user_id=user_id,
+        selected_palette_ids=[1, 2],
+        gender_id=1,
+        style_id=1,
+        user_image="uploads/pytest.jpg",
+        skin_color_hex="#D4A574",
+        hair_color_hex="#4A3728",
+        k=5
+    )
+
+
+def _round_request() -> RoundCreateRequest:
+    return RoundCreateRequest(
+        selected_palette_ids=[1],
+        like=["df_00000"],
+        dislike=[{"image_id": "df_00001", "comment": "pytest"}],
+        previous_round=["df_00000", "df_00001"],
+        k=5
+    )
+
+
+@pytest.fixture
+async def registry(db):
+    return await lookups.load_registry(db)
+
+
+@pytest.fixture
+def result_writer():
+    return ResultWriteBehind(AsyncSessionLocal)
+
+
+async def _new_session(user_id, registry, result_writer) -> int:
+    async with AsyncSessionLocal() as db:
+        response = await _create_session(
+            db, _session_request(user_id), FakeAIClient(), registry, get_image_catalog(), result_writer
+        )
+    return response.session_id
+
+
+async def test_create_session_commits_once(user_id, registry, result_writer):
+    async with AsyncSessionLocal() as db:
+        response = await _create_session(
+            db, _session_request(user_id), FakeAIClient(), registry, get_image_catalog(), result_writer
+        )
+        assert len(response.recommended_images) == 5
+        assert db.info["commit_count"] == 1
+
+
+async def test_create_session_does_not_commit_when_ai_fails(user_id, registry, result_writer):
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(HTTPException):
+            await _create_session(
+                db,
+                _session_request(user_id),
+                FakeAIClient(error=httpx.ConnectError("AI Service is down")),
+                registry,
+                get_image_catalog(),
+                result_writer
+            )
+        assert db.info.get("commit_count", 0) == 0
+
+
+async def test_create_round_commits_once(user_id, registry, result_writer):
+    session_id = await _new_session(user_id, registry, result_writer)
+
+    async with AsyncSessionLocal() as db:
+        response = await _create_round(
+            db, session_id, _round_request(), FakeAIClient(), registry, get_image_catalog(), result_writer
+        )
+        assert len(response.recommended_images) == 5
+        assert db.info["commit_count"] == 1
+
+
+@pytest.mark.parametrize("ai_client", [
+    FakeAIClient(error=httpx.ReadTimeout("AI Service timed out")),
+    FakeAIClient(vector_saved=False),
+], ids=["ai_error", "vector_not_saved"])
+async def test_create_round_does_not_commit_when_ai_fails(user_id, registry, result_writer, ai_client):
+    session_id = await _new_session(user_id, registry, result_writer)
+
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(HTTPException):
+            await _create_round(
+                db, session_id, _round_request(), ai_client, registry, get_image_catalog(), result_writer
+            )
+        assert db.info.get("commit_count", 0) == 0
@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+
+from app.database import async_engine
+from app.repositories.session import RoundRecommendedResultRepository, RoundRepository, SessionRepository
+
+pytestmark = pytest.mark.anyio
+
+IMAGES_PER_ROUND = 5
+DISLIKE_COMMENT = "pytest: too bright"
+
+
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    """記錄期間在 API 連線池上執行的 SQL"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _record)
+
+
+async def _create_session_with_rounds(db, user_id: str, rounds: int) -> int:
+    session = await SessionRepository.create_session(
+        db=db,
+        user_id=user_id,
+        user_image="uploads/pytest.jpg",
+        gender_id=1,
+        style_id=1,
+        skin_color_hex="#D4A574",
+        hair_color_hex="#4A3728"
+    )
+    for round_index in range(rounds):
+        round_obj = await RoundRepository.create_round(db, session.id, [1])
+        await RoundRecommendedResultRepository.bulk_create_results(db, round_obj.id, [
+            {
+                "image_id": f"df_{round_index:03d}_{i:03d}",
+                "rank_order": i + 1,
+                "score": 1 - i / IMAGES_PER_ROUND,
+                "explanation_text": "pytest",
+            }
+            for i in range(IMAGES_PER_ROUND)
+        ])
+        if round_index:
+            # 回饋寫入前一輪（排除剛建立的這一輪）
+            updated = await RoundRecommendedResultRepository.apply_feedback(
+                db=db,
+                session_id=session.id,
+                like=[f"df_{round_index - 1:03d}_000"],
+                dislike=[{"image_id": f"df_{round_index - 1:03d}_001", "comment": DISLIKE_COMMENT}],
+                like_action_id=1,
+                dislike_action_id=2,
+                exclude_round_id=round_obj.id
+            )
+            assert updated == 2
+    await db.commit()
+    return session.id
+
+
+async def test_history_statement_count_does_not_grow_with_rounds(db, user_id, client):
+    counts = {}
+    for rounds in (1, 5, 15):
+        session_id = await _create_session_with_rounds(db, user_id, rounds)
+
+        with count_statements() as statements:
+            response = await client.get(f"/api/sessions/{session_id}", params={"limit": 50})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["rounds"]) == rounds
+        assert all(len(r["results"]) == IMAGES_PER_ROUND for r in body["rounds"])
+        # 除了最後一輪，每一輪都有一個 LIKE 與一個附留言的 DISLIKE
+        feedback = [
+            sorted((r["action"], r["dislike_desc"]) for r in round_body["results"] if r["action"])
+            for round_body in body["rounds"]
+        ]
+        assert feedback.count([("DISLIKE", DISLIKE_COMMENT), ("LIKE", None)]) == rounds - 1
+        assert feedback.count([]) == 1
+        counts[rounds] = len(statements)
+
+    assert counts[1] == counts[5] == counts[15], counts
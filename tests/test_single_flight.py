@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight, fingerprint
+
+pytestmark = pytest.mark.anyio
+
+
+class Upstream:
+    """計算呼叫次數、可控制何時完成的上游呼叫"""
+
+    def __init__(self, result="result", error=None):
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+async def test_concurrent_identical_requests_are_coalesced():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    callers = [asyncio.create_task(flights.do("key", upstream)) for _ in range(5)]
+    await upstream.started.wait()
+    upstream.release.set()
+
+    assert await asyncio.gather(*callers) == ["result"] * 5
+    assert upstream.calls == 1
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+async def test_different_keys_run_separately():
+    flights = SingleFlight()
+    first, second = Upstream("first"), Upstream("second")
+    first.release.set()
+    second.release.set()
+
+    assert await asyncio.gather(flights.do("a", first), flights.do("b", second)) == ["first", "second"]
+    assert first.calls == second.calls == 1
+
+
+async def test_key_is_released_after_completion():
+    flights = SingleFlight()
+    upstream = Upstream()
+    upstream.release.set()
+
+    await flights.do("key", upstream)
+    await flights.do("key", upstream)
+    assert upstream.calls == 2
+
+
+async def test_waiters_share_the_leader_exception():
+    flights = SingleFlight()
+    upstream = Upstream(error=RuntimeError("upstream failed"))
+
+    callers = [asyncio.create_task(flights.do("key", upstream)) for _ in range(3)]
+    await upstream.started.wait()
+    upstream.release.set()
+
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert upstream.calls == 1
+
+
+async def test_cancelled_waiter_does_not_cancel_the_flight():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    leader = asyncio.create_task(flights.do("key", upstream))
+    follower = asyncio.create_task(flights.do("key", upstream))
+    await upstream.started.wait()
+
+    # 第一個請求（建立 flight 的 client）斷線，其他等待者與執行本身不受影響
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    upstream.release.set()
+    assert await follower == "result"
+    assert upstream.calls == 1
+
+
+async def test_flight_completes_when_every_waiter_is_cancelled():
+    flights = SingleFlight()
+    upstream = Upstream()
+
+    caller = asyncio.create_task(flights.do("key", upstream))
+    await upstream.started.wait()
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    assert flights.stats()["in_flight"] == 1
+    upstream.release.set()
+    # 執行仍會完成（例如寫入資料庫），完成後釋放 key
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint(1, {"a": 1, "b": [1, 2]}) == fingerprint(1, {"b": [1, 2], "a": 1})
+    assert fingerprint(1, {"a": 1}) != fingerprint(2, {"a": 1})
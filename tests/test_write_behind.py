@@ -0,0 +1,97 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.core import write_behind
+from app.core.write_behind import PERSIST_WRITE_BEHIND, ResultWriteBehind
+
+pytestmark = pytest.mark.anyio
+
+IMAGES_PER_ROUND = 3
+
+
+class FakeRepository:
+    """
+    依 Round ID 決定寫入結果的推薦結果 repository
+
+    failures[round_id] 為該 Round 逐 Round 寫入時依序丟出的例外；
+    多個 Round 合併寫入時，只要任一 Round 設定了 failures 就丟出 IntegrityError。
+    """
+
+    def __init__(self, failures: dict):
+        self.failures = failures
+        self.written = []
+
+    async def bulk_create_results_for_rounds(self, db, results_by_round: dict) -> int:
+        round_ids = list(results_by_round)
+        if len(round_ids) > 1 and any(round_id in self.failures for round_id in round_ids):
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        if len(round_ids) == 1 and self.failures.get(round_ids[0]):
+            raise self.failures[round_ids[0]].pop(0)
+        self.written.extend(round_ids)
+        return sum(len(results) for results in results_by_round.values())
+
+
+@asynccontextmanager
+async def _fake_session():
+    yield None
+
+
+def _operational_error() -> OperationalError:
+    return OperationalError("INSERT", {}, Exception("server closed the connection unexpectedly"))
+
+
+def _images() -> list:
+    return [{"image_id": f"df_{i:05d}", "rank_order": i + 1} for i in range(IMAGES_PER_ROUND)]
+
+
+async def _write_rounds(monkeypatch, failures: dict, round_ids=(1, 2, 3)):
+    repository = FakeRepository(failures)
+    monkeypatch.setattr(write_behind, "RoundRecommendedResultRepository", repository)
+    writer = ResultWriteBehind(
+        _fake_session, mode=PERSIST_WRITE_BEHIND, flush_interval=0.05, max_retries=2, retry_backoff=0
+    )
+    writer.start()
+    for round_id in round_ids:
+        await writer.submit(session_id=1, round_id=round_id, recommended_images=_images())
+    await writer.close()
+    return writer, repository
+
+
+async def test_rounds_are_merged_into_one_write(monkeypatch):
+    writer, repository = await _write_rounds(monkeypatch, failures={})
+    assert repository.written == [1, 2, 3]
+    assert writer.flushes == 1
+    assert writer.rows_written == 3 * IMAGES_PER_ROUND
+    assert writer.dropped_rounds == 0
+
+
+async def test_fallback_retries_transient_errors(monkeypatch):
+    # 合併寫入違反約束後逐 Round 寫入，Round 2 第一次遇到連線中斷，重試後寫入
+    writer, repository = await _write_rounds(monkeypatch, failures={2: [_operational_error()]})
+    assert sorted(repository.written) == [1, 2, 3]
+    assert writer.retries == 1
+    assert writer.rows_written == 3 * IMAGES_PER_ROUND
+    assert writer.dropped_rounds == 0
+    assert writer.stats()["pending_rounds"] == 0
+
+
+async def test_fallback_counts_only_unwritten_rounds(monkeypatch):
+    # Round 2 重試用盡仍失敗：只有 Round 2 計入 dropped_rounds，其他 Round 照常寫入
+    writer, repository = await _write_rounds(monkeypatch, failures={2: [_operational_error() for _ in range(3)]})
+    assert sorted(repository.written) == [1, 3]
+    assert writer.retries == 2
+    assert writer.rows_written == 2 * IMAGES_PER_ROUND
+    assert writer.dropped_rounds == 1
+    assert writer.stats()["pending_rounds"] == 0
+
+
+async def test_integrity_error_is_not_retried(monkeypatch):
+    writer, repository = await _write_rounds(
+        monkeypatch,
+        failures={2: [IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))]}
+    )
+    assert sorted(repository.written) == [1, 3]
+    assert writer.retries == 0
+    assert writer.dropped_rounds == 1